@@ -0,0 +1,41 @@
+"""Keep parking_details.updated_at current on every update
+
+The ingest job and the API cache the detail in memory and reload it when
+max(updated_at) or the row count moves, so updates made outside the ORM
+(manual SQL, scraper scripts) must bump updated_at too.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION parking_details_touch() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER parking_details_touch BEFORE UPDATE ON parking_details "
+        "FOR EACH ROW EXECUTE FUNCTION parking_details_touch()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS parking_details_touch ON parking_details")
+    op.execute("DROP FUNCTION IF EXISTS parking_details_touch()")
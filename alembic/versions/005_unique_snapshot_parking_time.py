@@ -0,0 +1,44 @@
+"""Make (parking_id, recorded_at) unique on parking_snapshots
+
+Snapshots are now copied from a write-behind buffer that may replay a
+batch after an outage; the unique index lets the copy skip rows that are
+already stored. It replaces idx_snapshot_parking_time, which had the same
+columns.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "DELETE FROM parking_snapshots a USING parking_snapshots b "
+        "WHERE a.parking_id = b.parking_id AND a.recorded_at = b.recorded_at AND a.id > b.id"
+    )
+    op.create_index(
+        "uq_snapshot_parking_time",
+        "parking_snapshots",
+        ["parking_id", sa.text("recorded_at DESC")],
+        unique=True,
+    )
+    op.drop_index("idx_snapshot_parking_time", table_name="parking_snapshots")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "idx_snapshot_parking_time",
+        "parking_snapshots",
+        ["parking_id", sa.text("recorded_at DESC")],
+    )
+    op.drop_index("uq_snapshot_parking_time", table_name="parking_snapshots")
@@ -0,0 +1,116 @@
+"""Partition parking_snapshots by day on recorded_at
+
+Retention used to be one DELETE over the whole table; with daily range
+partitions it drops the partitions past the retention window instead, and
+history reads only scan the days they ask for. The existing rows are copied
+into a partitioned table that has partitions from the oldest stored day to a
+week ahead, plus a default partition. Afterwards the scheduler creates
+partitions ahead of time (see app.infrastructure.partitions).
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = "id, parking_id, free_spots, total_spots, status, tendence, recorded_at"
+
+
+def _rename_old() -> None:
+    """Free the table and index names, and keep the id sequence out of the drop."""
+    op.execute("ALTER TABLE parking_snapshots RENAME TO parking_snapshots_old")
+    op.execute("ALTER INDEX uq_snapshot_parking_time RENAME TO uq_snapshot_parking_time_old")
+    op.execute("ALTER INDEX idx_snapshot_recorded_at RENAME TO idx_snapshot_recorded_at_old")
+    op.execute("ALTER INDEX parking_snapshots_pkey RENAME TO parking_snapshots_old_pkey")
+    op.execute("ALTER SEQUENCE parking_snapshots_id_seq OWNED BY NONE")
+
+
+def _create_indexes() -> None:
+    op.execute(
+        "CREATE UNIQUE INDEX uq_snapshot_parking_time "
+        "ON parking_snapshots (parking_id, recorded_at DESC)"
+    )
+    op.execute("CREATE INDEX idx_snapshot_recorded_at ON parking_snapshots (recorded_at DESC)")
+
+
+def _copy_and_drop_old() -> None:
+    op.execute(
+        f"INSERT INTO parking_snapshots ({_COLUMNS}) SELECT {_COLUMNS} FROM parking_snapshots_old"
+    )
+    op.execute("DROP TABLE parking_snapshots_old")
+    op.execute("ALTER SEQUENCE parking_snapshots_id_seq OWNED BY parking_snapshots.id")
+
+
+def upgrade() -> None:
+    _rename_old()
+    op.execute(
+        """
+        CREATE TABLE parking_snapshots (
+            id BIGINT NOT NULL DEFAULT nextval('parking_snapshots_id_seq'),
+            parking_id INTEGER NOT NULL REFERENCES parkings (id),
+            free_spots INTEGER,
+            total_spots INTEGER NOT NULL,
+            status INTEGER NOT NULL,
+            tendence INTEGER,
+            recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, recorded_at)
+        ) PARTITION BY RANGE (recorded_at)
+        """
+    )
+    _create_indexes()
+    op.execute("CREATE TABLE parking_snapshots_default PARTITION OF parking_snapshots DEFAULT")
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            first_day date := COALESCE(
+                (SELECT min(recorded_at AT TIME ZONE 'UTC')::date FROM parking_snapshots_old),
+                (now() AT TIME ZONE 'UTC')::date
+            );
+            day date;
+        BEGIN
+            FOR day IN
+                SELECT generate_series(
+                    first_day, (now() AT TIME ZONE 'UTC')::date + 7, interval '1 day'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF parking_snapshots FOR VALUES FROM (%L) TO (%L)',
+                    'parking_snapshots_p' || to_char(day, 'YYYYMMDD'),
+                    day::timestamp AT TIME ZONE 'UTC',
+                    (day + 1)::timestamp AT TIME ZONE 'UTC'
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+    _copy_and_drop_old()
+
+
+def downgrade() -> None:
+    _rename_old()
+    op.execute(
+        """
+        CREATE TABLE parking_snapshots (
+            id BIGINT NOT NULL DEFAULT nextval('parking_snapshots_id_seq') PRIMARY KEY,
+            parking_id INTEGER NOT NULL REFERENCES parkings (id),
+            free_spots INTEGER,
+            total_spots INTEGER NOT NULL,
+            status INTEGER NOT NULL,
+            tendence INTEGER,
+            recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        )
+        """
+    )
+    _create_indexes()
+    # Dropping the partitioned table drops every partition with it.
+    _copy_and_drop_old()
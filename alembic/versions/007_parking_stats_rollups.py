@@ -0,0 +1,51 @@
+"""Hourly and daily availability rollups per parking
+
+Long-range history used to be rebuilt from raw snapshots, up to tens of
+thousands of points per request. The flush job now merges one sample per
+parking and ingest cycle into these tables, and history at 1h or 1d
+resolution reads them. They fill from the upgrade on; until they cover a
+range, history buckets the part before the first full rollup bucket from
+the gap-filled raw series instead.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("parking_stats_hourly", "parking_stats_daily")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_table(
+            table,
+            sa.Column("parking_id", sa.Integer(), sa.ForeignKey("parkings.id"), primary_key=True),
+            sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+            sa.Column("samples", sa.Integer(), nullable=False),
+            sa.Column("free_samples", sa.Integer(), nullable=False),
+            sa.Column("free_min", sa.Integer(), nullable=True),
+            sa.Column("free_max", sa.Integer(), nullable=True),
+            sa.Column("free_sum", sa.BigInteger(), nullable=False),
+            sa.Column("occupancy_samples", sa.Integer(), nullable=False),
+            sa.Column("occupancy_sum", sa.Float(), nullable=False),
+            sa.Column("status_open", sa.Integer(), nullable=False),
+            sa.Column("status_full", sa.Integer(), nullable=False),
+            sa.Column("status_no_data", sa.Integer(), nullable=False),
+            sa.Column("status_out_of_service", sa.Integer(), nullable=False),
+            sa.Column("last_sample_at", sa.DateTime(timezone=True), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_table(table)
@@ -0,0 +1,145 @@
+"""Per-worker fan-out of parking updates to Server-Sent Events clients.
+
+Each worker holds a single Redis pub/sub subscription to the channel the
+ingest job publishes on (see ``RedisCache.publish``). Every message is
+turned into one SSE event — rendered once from the live dataset — and
+handed to all connections of the worker through bounded queues, along
+with a periodic keep-alive comment. A client whose queue is full is evicted
+rather than buffered without limit; its EventSource reconnects with
+``Last-Event-ID`` and resumes from there.
+"""
+
+import asyncio
+from dataclasses import dataclass
+
+import redis.asyncio as aioredis
+import structlog
+
+from app.api.live_data import LiveDatasetCache
+from app.config import settings
+from app.infrastructure.changes import decode_record
+from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY, RedisCache
+
+logger = structlog.get_logger()
+
+UPDATES_CHANNEL = f"{PARKINGS_CACHE_KEY}:updates"
+KEEPALIVE = b": keep-alive\n\n"
+
+
+def sse_event(version: str, data: bytes) -> bytes:
+    return b"id: " + version.encode() + b"\nevent: changes\ndata: " + data + b"\n\n"
+
+
+@dataclass(eq=False, slots=True)
+class Subscription:
+    queue: asyncio.Queue
+
+
+class UpdateBroadcaster:
+    def __init__(
+        self,
+        live: LiveDatasetCache,
+        queue_size: int = 4,
+        heartbeat_interval: float = 15.0,
+        reconnect_delay: float = 1.0,
+    ) -> None:
+        self._live = live
+        self._queue_size = queue_size
+        self._heartbeat_interval = heartbeat_interval
+        self._reconnect_delay = reconnect_delay
+        self._subscribers: set[Subscription] = set()
+        self._task: asyncio.Task | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+        self._last_version: str | None = None
+        self._closed = False
+        self.events = 0
+        self.evictions = 0
+
+    def subscribe(self, pool: aioredis.Redis) -> Subscription:
+        """Register a connection, starting the worker's pub/sub listener if needed."""
+        if not self._closed and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._listen(pool))
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        subscription = Subscription(queue=asyncio.Queue(maxsize=self._queue_size))
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def broadcast(self, event: bytes) -> None:
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._evict(subscription)
+
+    def _evict(self, subscription: Subscription) -> None:
+        """Drop a slow consumer: its stream ends after the pending events are discarded."""
+        self._subscribers.discard(subscription)
+        queue = subscription.queue
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        self.evictions += 1
+
+    async def _heartbeat(self) -> None:
+        # One timer per worker; a client that leaves keep-alives unread fills up and is evicted.
+        while not self._closed:
+            await asyncio.sleep(self._heartbeat_interval)
+            self.broadcast(KEEPALIVE)
+
+    async def _listen(self, pool: aioredis.Redis) -> None:
+        cache = RedisCache(pool, default_ttl=settings.cache_ttl)
+        while not self._closed:
+            try:
+                async with pool.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(UPDATES_CHANNEL)
+                    # Anything published before this point is covered by the current version.
+                    self._last_version = await cache.get_etag(PARKINGS_CACHE_KEY)
+                    while not self._closed:
+                        # A bounded wait instead of listen(): a blocking read on a quiet
+                        # channel runs into the pool's socket_timeout and reconnects.
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=self._heartbeat_interval
+                        )
+                        if message is not None:
+                            await self._on_message(cache, message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("stream_listener_error", exc_info=True)
+                await asyncio.sleep(self._reconnect_delay)
+
+    async def _on_message(self, cache: RedisCache, data: bytes) -> None:
+        record = decode_record(data)
+        dataset = await self._live.get_version(cache, record.version)
+        if dataset is None or not dataset.version or dataset.version == self._last_version:
+            return
+        if dataset.version == record.version and record.prev == self._last_version:
+            body = dataset.changes_body(record.prev, set(record.ids))
+        else:
+            # A message was missed (or the data moved on): send the full list.
+            body = dataset.changes_body(None, None)
+        self._last_version = dataset.version
+        self.events += 1
+        self.broadcast(sse_event(dataset.version, body))
+
+    async def close(self) -> None:
+        self._closed = True
+        for task in (self._task, self._heartbeat_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._task = self._heartbeat_task = None
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "events": self.events,
+            "evictions": self.evictions,
+            "listening": self._task is not None and not self._task.done(),
+        }
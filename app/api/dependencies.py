@@ -10,10 +10,17 @@ import redis.asyncio as aioredis
 from fastapi import HTTPException, Request, Security
 from fastapi.security import APIKeyHeader
 
+from app.api.broadcast import UpdateBroadcaster
+from app.api.detail_cache import DetailCache
+from app.api.live_data import LiveDatasetCache
+from app.api.nearby_index import NearbyIndex
 from app.config import settings
+from app.infrastructure.circuit_breaker import CircuitBreaker, five_t_breaker
 from app.infrastructure.database import async_session_factory
 from app.infrastructure.five_t_client import FiveTClient
+from app.infrastructure.ingest_stats import IngestLog
 from app.infrastructure.redis_cache import RedisCache
+from app.infrastructure.snapshot_buffer import SnapshotBuffer
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
@@ -40,11 +47,40 @@ def get_cache_service(request: Request) -> RedisCache:
     return RedisCache(pool=get_redis_pool(request), default_ttl=settings.cache_ttl)
 
 
+def get_live_data(request: Request) -> LiveDatasetCache:
+    return request.app.state.live_data
+
+
+def get_nearby_index(request: Request) -> NearbyIndex:
+    return request.app.state.nearby_index
+
+
+def get_detail_cache(request: Request) -> DetailCache:
+    return request.app.state.detail_cache
+
+
+def get_broadcaster(request: Request) -> UpdateBroadcaster:
+    return request.app.state.broadcaster
+
+
+def get_circuit_breaker(request: Request) -> CircuitBreaker:
+    return five_t_breaker(get_redis_pool(request))
+
+
+def get_ingest_log(request: Request) -> IngestLog:
+    return IngestLog(get_redis_pool(request), kept=settings.ingest_cycles_kept)
+
+
+def get_snapshot_buffer(request: Request) -> SnapshotBuffer:
+    return SnapshotBuffer(get_redis_pool(request))
+
+
 def get_parking_repository(request: Request) -> FiveTClient:
     return FiveTClient(
         client=get_http_client(request),
         url=settings.five_t_api_url,
         timeout=settings.five_t_timeout,
+        breaker=get_circuit_breaker(request),
     )
 
 
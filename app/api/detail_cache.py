@@ -0,0 +1,64 @@
+"""In-memory copy of the static GTT detail, reloaded only when it changes.
+
+``parking_details`` changes a few times a year, yet enriching every ingest
+cycle and every ``/nearby`` answer used to re-read and re-validate all of
+it. The cache holds each parking's validated ``ParkingDetailSchema`` and
+its JSON fragment, so enrichment is a dict lookup. Whether the table moved
+is checked with one aggregate probe (``max(updated_at)`` and the row
+count, which also catches deletions); a trigger keeps ``updated_at``
+current on every update. Probes run at most every ``probe_interval``
+seconds.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.schemas import ParkingDetailSchema
+from app.infrastructure.db_models import ParkingDetailEntity
+
+
+class DetailCache:
+    def __init__(self, probe_interval: float = 0.0) -> None:
+        self._probe_interval = probe_interval
+        self._details: dict[int, ParkingDetailSchema] = {}
+        self._fragments: dict[int, dict] = {}
+        self._stamp: tuple[datetime | None, int] | None = None
+        self._probed_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self.version = 0
+        self.probes = 0
+        self.reloads = 0
+
+    def get(self, parking_id: int) -> ParkingDetailSchema | None:
+        return self._details.get(parking_id)
+
+    def fragment(self, parking_id: int) -> dict | None:
+        """The detail as it appears in a JSON-mode dump of ``ParkingSchema``."""
+        return self._fragments.get(parking_id)
+
+    async def refresh(self, session: AsyncSession) -> None:
+        """Reload the detail if the table changed since the last probe."""
+        if time.monotonic() - self._probed_at < self._probe_interval:
+            return
+        async with self._lock:
+            if time.monotonic() - self._probed_at < self._probe_interval:
+                return
+            probe = select(func.max(ParkingDetailEntity.updated_at), func.count())
+            stamp = tuple((await session.execute(probe)).one())
+            self.probes += 1
+            if stamp != self._stamp:
+                rows = (await session.execute(select(ParkingDetailEntity))).scalars().all()
+                details = {d.parking_id: ParkingDetailSchema.model_validate(d) for d in rows}
+                self._details = details
+                self._fragments = {pid: d.model_dump(mode="json") for pid, d in details.items()}
+                self._stamp = stamp
+                self.version += 1
+                self.reloads += 1
+            self._probed_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"details": len(self._details), "probes": self.probes, "reloads": self.reloads}
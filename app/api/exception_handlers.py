@@ -8,7 +8,13 @@ import structlog
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
-from app.domain.exceptions import FiveTApiError, ParkingNotFoundError
+from app.config import settings
+from app.domain.exceptions import (
+    CircuitOpenError,
+    DatasetNotReadyError,
+    FiveTApiError,
+    ParkingNotFoundError,
+)
 
 logger = structlog.get_logger()
 
@@ -18,6 +24,22 @@ def register_exception_handlers(app: FastAPI) -> None:
     async def parking_not_found_handler(request: Request, exc: ParkingNotFoundError):
         return JSONResponse(status_code=404, content={"detail": str(exc)})
 
+    @app.exception_handler(CircuitOpenError)
+    async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Upstream API temporarily unavailable"},
+            headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+        )
+
+    @app.exception_handler(DatasetNotReadyError)
+    async def dataset_not_ready_handler(request: Request, exc: DatasetNotReadyError):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Parking data not available yet"},
+            headers={"Retry-After": str(max(1, round(settings.refresh_wait_seconds)))},
+        )
+
     @app.exception_handler(FiveTApiError)
     async def five_t_error_handler(request: Request, exc: FiveTApiError):
         logger.error("five_t_api_error", error=str(exc))
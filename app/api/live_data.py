@@ -0,0 +1,218 @@
+"""Per-worker in-memory copy of the live parking dataset.
+
+Holds the decoded dataset, its pre-rendered bodies and the version (ETag)
+it was read at. Reads trust the copy for ``revalidate_interval`` seconds,
+then revalidate with a single GET of the version key; the payload is only
+re-downloaded and re-validated when the version moved. Redis becomes the
+distribution channel rather than a per-request dependency. The same probe
+reads when the source last confirmed the data, which gives its age.
+
+Derived structures (such as the per-parking index) are built lazily, once
+per version, and live as long as the dataset they were derived from. The
+column-oriented filter indexes are the exception: they are built as soon as
+a version is loaded, so no request pays for them.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+
+import orjson
+
+from app.api.ranking import ListFilters, ParkingColumns
+from app.api.schemas import ParkingChangesResponse, ParkingListResponse, ParkingSchema
+from app.domain.interfaces import CacheService
+from app.infrastructure.prerender import IDENTITY, RenderedBody, content_hash
+from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY
+from app.infrastructure.single_flight import SingleFlight
+
+# Bound on the per-version memo of rendered change bodies.
+MAX_DELTAS = 32
+# Bound on the per-version memo of rendered filtered lists.
+MAX_FILTERED = 64
+
+
+@dataclass(frozen=True)
+class ParkingEntry:
+    """A single parking with its rendered JSON body and content hash."""
+
+    parking: ParkingSchema
+    body: bytes
+    etag: str
+
+
+@dataclass(frozen=True)
+class LiveDataset:
+    version: str
+    listing: ParkingListResponse
+    bodies: dict[str, bytes] = field(default_factory=dict)
+    # Rendered change bodies keyed by the client's version (None: full list).
+    deltas: dict[str | None, bytes] = field(default_factory=dict, compare=False)
+    # Rendered filtered lists keyed by the normalized filter combination.
+    filtered: dict[ListFilters, RenderedBody] = field(default_factory=dict, compare=False)
+
+    @cached_property
+    def entries(self) -> dict[int, ParkingEntry]:
+        """Parkings indexed by ID. A lot's ETag only moves when that lot changes."""
+        index = {}
+        for p in self.listing.parkings:
+            body = p.model_dump_json().encode()
+            index[p.id] = ParkingEntry(parking=p, body=body, etag=content_hash(body))
+        return index
+
+    @cached_property
+    def columns(self) -> ParkingColumns:
+        """Column-oriented copy of the parkings for vectorized filtering and sorting."""
+        return ParkingColumns.from_parkings(self.listing.parkings)
+
+    @cached_property
+    def locations_key(self) -> str:
+        """Hash of the parking IDs and coordinates, which change only with master data."""
+        return content_hash(orjson.dumps([(p.id, p.lat, p.lng) for p in self.listing.parkings]))
+
+    def filtered_body(self, filters: ListFilters) -> RenderedBody:
+        """Render, once per filter combination, the list of matching parkings.
+
+        The ETag is the hash of the rendered body, so it is distinct for every
+        combination and version.
+        """
+        rendered = self.filtered.get(filters)
+        if rendered is not None:
+            return rendered
+        parkings = self.listing.parkings
+        rows = self.columns.mask(filters).nonzero()[0].tolist()
+        body = (
+            ParkingListResponse(
+                total=len(rows),
+                last_update=self.listing.last_update,
+                source=self.listing.source,
+                parkings=[parkings[i] for i in rows],
+            )
+            .model_dump_json()
+            .encode()
+        )
+        rendered = RenderedBody(etag=content_hash(body), variants={IDENTITY: body})
+        if len(self.filtered) < MAX_FILTERED:
+            self.filtered[filters] = rendered
+        return rendered
+
+    def changes_body(self, since: str | None, touched: set[int] | None) -> bytes:
+        """Render, once per ``since``, the changes for a client at that version.
+
+        ``touched`` holds the IDs that moved since then; None means the client
+        needs the full list.
+        """
+        key = since if touched is not None else None
+        body = self.deltas.get(key)
+        if body is not None:
+            return body
+        if touched is None:
+            parkings, removed = self.listing.parkings, []
+        else:
+            entries = self.entries
+            parkings = [entries[pid].parking for pid in sorted(touched) if pid in entries]
+            removed = sorted(pid for pid in touched if pid not in entries)
+        body = (
+            ParkingChangesResponse(
+                version=self.version,
+                full=touched is None,
+                last_update=self.listing.last_update,
+                parkings=parkings,
+                removed=removed,
+            )
+            .model_dump_json()
+            .encode()
+        )
+        if len(self.deltas) < MAX_DELTAS:
+            self.deltas[key] = body
+        return body
+
+
+class LiveDatasetCache:
+    def __init__(self, revalidate_interval: float = 1.0) -> None:
+        self._revalidate_interval = revalidate_interval
+        self._entry: LiveDataset | None = None
+        self._checked_at = 0.0
+        # Wall-clock time the source last confirmed the current version.
+        self._confirmed_at: float | None = None
+        self._lock = asyncio.Lock()
+        # Coalesces this worker's upstream refreshes on a cache miss.
+        self.refreshes = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.probes = 0
+
+    async def get(self, cache: CacheService) -> LiveDataset | None:
+        """Return the current dataset, or None if nothing is cached."""
+        entry = self._entry
+        now = time.monotonic()
+        if entry is not None:
+            if now - self._checked_at < self._revalidate_interval:
+                self.hits += 1
+                return entry
+            self.probes += 1
+            version, confirmed_at = await cache.get_pointer(PARKINGS_CACHE_KEY)
+            if version == entry.version:
+                self._confirmed_at = confirmed_at
+                self._checked_at = now
+                self.hits += 1
+                return entry
+        return await self._reload(cache, stale=entry)
+
+    async def get_version(self, cache: CacheService, version: str) -> LiveDataset | None:
+        """Return the dataset, reloading unless it is already at ``version``."""
+        entry = self._entry
+        if entry is not None and entry.version == version:
+            self.hits += 1
+            return entry
+        return await self._reload(cache, stale=entry)
+
+    async def _reload(self, cache: CacheService, stale: LiveDataset | None) -> LiveDataset | None:
+        async with self._lock:
+            if self._entry is not None and self._entry is not stale:
+                # Another request reloaded while we were waiting for the lock.
+                self.hits += 1
+                return self._entry
+            self.misses += 1
+            data, version, bodies, confirmed_at = await cache.get_snapshot(PARKINGS_CACHE_KEY)
+            self._confirmed_at = confirmed_at
+            if data is None:
+                self._entry = None
+                return None
+            dataset = LiveDataset(
+                version=version or "",
+                listing=ParkingListResponse(**data),
+                bodies=bodies,
+            )
+            # Build the filter indexes now rather than on the first filtered request.
+            dataset.columns
+            # Payloads written without a version cannot be revalidated: don't keep them.
+            self._entry = dataset if version else None
+            self._checked_at = time.monotonic()
+            return dataset
+
+    def put(self, dataset: LiveDataset) -> None:
+        """Install a dataset this worker has just written to Redis."""
+        if dataset.version:
+            self._entry = dataset
+            self._checked_at = time.monotonic()
+            self._confirmed_at = time.time()
+
+    def age(self) -> float | None:
+        """Seconds since the source last confirmed the current dataset, if known."""
+        if self._entry is None or self._confirmed_at is None:
+            return None
+        return max(0.0, time.time() - self._confirmed_at)
+
+    def stats(self) -> dict:
+        entry = self._entry
+        return {
+            "version": entry.version if entry else None,
+            "age": self.age(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "probes": self.probes,
+            "refreshes": self.refreshes.calls,
+            "refreshes_shared": self.refreshes.shared,
+        }
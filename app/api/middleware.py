@@ -3,6 +3,10 @@
 Provides security headers injection, request ID propagation for log
 correlation, access logging, and sliding-window rate limiting backed
 by Redis.
+
+Each middleware is plain ASGI: it adds its headers to the
+``http.response.start`` message as it passes, so responses (including
+streamed ones) go through without being wrapped or buffered.
 """
 
 import logging
@@ -12,9 +16,8 @@ import uuid
 
 import structlog
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config import settings
 from app.infrastructure.rate_limiter import RateLimiter
@@ -26,50 +29,85 @@ _struct_access = structlog.wrap_logger(access_logger)
 _REQUEST_ID_RE = re.compile(r"^[\w\-]{1,64}$")
 
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
-        client_id = request.headers.get("X-Request-ID", "")
+def _client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RequestIDMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client_id = Headers(scope=scope).get("X-Request-ID", "")
         request_id = client_id if _REQUEST_ID_RE.match(client_id) else str(uuid.uuid4())
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+            await send(message)
+
         structlog.contextvars.bind_contextvars(request_id=request_id)
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        structlog.contextvars.unbind_contextvars("request_id")
-        return response
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            structlog.contextvars.unbind_contextvars("request_id")
+
 
+class AccessLogMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class AccessLogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
         start = time.perf_counter()
-        response = await call_next(request)
-        duration_ms = round((time.perf_counter() - start) * 1000, 2)
-        _struct_access.info(
-            "http_request",
-            method=request.method,
-            path=request.url.path,
-            status_code=response.status_code,
-            duration_ms=duration_ms,
-            client_ip=request.client.host if request.client else "unknown",
-        )
-        return response
-
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    SKIP_PATHS = {"/health", "/docs", "/redoc", "/openapi.json"}
+
+        async def send_logged(message: Message) -> None:
+            # Logged when the headers go out, so streamed bodies do not inflate the duration.
+            if message["type"] == "http.response.start":
+                duration_ms = round((time.perf_counter() - start) * 1000, 2)
+                _struct_access.info(
+                    "http_request",
+                    method=scope["method"],
+                    path=scope["path"],
+                    status_code=message["status"],
+                    duration_ms=duration_ms,
+                    client_ip=_client_ip(scope),
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_logged)
+
+
+class RateLimitMiddleware:
+    SKIP_PATHS = {"/health", "/ready", "/docs", "/redoc", "/openapi.json"}
     _ADMIN_RATE_LIMIT = 30
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        if request.url.path in self.SKIP_PATHS:
-            return await call_next(request)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
 
-        pool = request.app.state.redis_pool
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path in self.SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        pool = scope["app"].state.redis_pool
         limiter = RateLimiter(pool)
-        client_ip = request.client.host if request.client else "unknown"
+        client_ip = _client_ip(scope)
 
-        if request.url.path.startswith("/api/v1/admin"):
+        if path.startswith("/api/v1/admin"):
             identifier = f"admin:{client_ip}"
             max_requests = self._ADMIN_RATE_LIMIT
         else:
-            api_key = request.headers.get("X-API-Key")
+            api_key = Headers(scope=scope).get("X-API-Key")
 
             tier: str | None = None
             if api_key:
@@ -91,10 +129,11 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             allowed, remaining, reset_at = await limiter.check(identifier, max_requests)
         except Exception:
             logger.warning("rate_limit_redis_error", exc_info=True)
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         if not allowed:
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=429,
                 content={"detail": "Rate limit exceeded"},
                 headers={
@@ -104,15 +143,21 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     "Retry-After": str(max(1, reset_at - int(time.time()))),
                 },
             )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_limits(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-RateLimit-Limit"] = str(max_requests)
+                headers["X-RateLimit-Remaining"] = str(remaining)
+                headers["X-RateLimit-Reset"] = str(reset_at)
+            await send(message)
 
-        response = await call_next(request)
-        response.headers["X-RateLimit-Limit"] = str(max_requests)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(reset_at)
-        return response
+        await self.app(scope, receive, send_with_limits)
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     _CSP = "; ".join(
         [
             "default-src 'self'",
@@ -124,14 +169,29 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
             "frame-ancestors 'none'",
         ]
     )
-
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["Cache-Control"] = "no-store"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=(self)"
-        response.headers["Strict-Transport-Security"] = "max-age=63072000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = self._CSP
-        return response
+    _HEADERS = {
+        "X-Content-Type-Options": "nosniff",
+        "X-Frame-Options": "DENY",
+        "Cache-Control": "no-store",
+        "Referrer-Policy": "strict-origin-when-cross-origin",
+        "Permissions-Policy": "camera=(), microphone=(), geolocation=(self)",
+        "Strict-Transport-Security": "max-age=63072000; includeSubDomains",
+        "Content-Security-Policy": _CSP,
+    }
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in self._HEADERS.items():
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,113 @@
+"""Per-worker spatial index that answers ``/nearby`` from memory.
+
+The index covers the ``parkings`` master data from the database plus every
+parking in the live dataset. It is rebuilt only when the IDs or locations
+in the live dataset change, or after ``refresh_interval`` seconds to pick
+up rows edited directly in the database. Availability is read from the
+current live dataset at query time, so a new ingest cycle does not trigger
+a rebuild. GTT detail comes from the worker's ``DetailCache``, and a
+change to it rebuilds the offline entries too.
+"""
+
+import asyncio
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.detail_cache import DetailCache
+from app.api.live_data import LiveDataset
+from app.api.schemas import ParkingDetailSchema, ParkingSchema
+from app.infrastructure.db_models import ParkingEntity
+from app.infrastructure.db_repository import ParkingDBRepository
+from app.infrastructure.spatial import GridIndex
+
+
+def offline_schema(entity: ParkingEntity, detail: ParkingDetailSchema | None) -> ParkingSchema:
+    """A parking known from master data only, with no live availability."""
+    return ParkingSchema(
+        id=entity.id,
+        name=entity.name,
+        status=0,
+        total_spots=entity.total_spots,
+        free_spots=None,
+        tendence=None,
+        lat=entity.lat,
+        lng=entity.lng,
+        status_label="nessun dato",
+        is_available=False,
+        occupancy_percentage=None,
+        detail=detail,
+    )
+
+
+class NearbyIndex:
+    def __init__(
+        self,
+        details: DetailCache,
+        refresh_interval: float = 3600.0,
+        cell_meters: float = 1000.0,
+    ) -> None:
+        self._details = details
+        self._refresh_interval = refresh_interval
+        self._cell_meters = cell_meters
+        self._grid: GridIndex | None = None
+        self._offline: dict[int, ParkingSchema] = {}
+        self._key: tuple[str, int] | None = None
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+        self.rebuilds = 0
+
+    def _fresh(self, key: tuple[str, int]) -> bool:
+        return (
+            self._grid is not None
+            and self._key == key
+            and time.monotonic() - self._built_at < self._refresh_interval
+        )
+
+    async def _current(self, dataset: LiveDataset, session: AsyncSession) -> GridIndex:
+        await self._details.refresh(session)
+        key = (dataset.locations_key, self._details.version)
+        if self._fresh(key):
+            return self._grid
+        async with self._lock:
+            if self._fresh(key):
+                return self._grid
+            rows = await ParkingDBRepository(session).list_parkings()
+            points = {e.id: (e.lat, e.lng) for e in rows}
+            points.update((p.id, (p.lat, p.lng)) for p in dataset.listing.parkings)
+            self._offline = {e.id: offline_schema(e, self._details.get(e.id)) for e in rows}
+            self._grid = GridIndex(
+                ((pid, lat, lng) for pid, (lat, lng) in points.items()), self._cell_meters
+            )
+            self._key = key
+            self._built_at = time.monotonic()
+            self.rebuilds += 1
+            return self._grid
+
+    async def search(
+        self,
+        dataset: LiveDataset,
+        session: AsyncSession,
+        lat: float,
+        lng: float,
+        radius_meters: float,
+        limit: int,
+    ) -> list[ParkingSchema]:
+        """Parkings within the radius, nearest first, with live data where available."""
+        grid = await self._current(dataset, session)
+        entries = dataset.entries
+        parkings = []
+        for distance, pid in grid.within(lat, lng, radius_meters):
+            entry = entries.get(pid)
+            parking = entry.parking if entry is not None else self._offline.get(pid)
+            if parking is not None:
+                parkings.append(parking.model_copy(update={"distance_m": round(distance, 1)}))
+                if len(parkings) == limit:
+                    break
+        return parkings
+
+    def stats(self) -> dict:
+        return {
+            "parkings": len(self._grid) if self._grid is not None else 0,
+            "rebuilds": self.rebuilds,
+        }
@@ -0,0 +1,178 @@
+"""Column-oriented filtering and ranking of the live dataset for list queries.
+
+The parking list is copied once per data version into NumPy columns.
+Every filter predicate maps to a boolean mask: flags are precomputed
+columns, ``min_spots`` is a binary search over the free-spot counts kept
+in sorted order, and each payment term is matched once against the
+distinct payment methods. Masks and the sort orders that do not depend
+on a query point are memoised for the life of the version; distances to
+a query point are computed for every lot in one vectorized pass.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field, fields
+from typing import Literal
+
+import numpy as np
+
+from app.api.schemas import ParkingSchema
+from app.infrastructure.spatial import EARTH_RADIUS_M
+
+SortKey = Literal["distance", "free_spots", "occupancy", "price"]
+
+
+@dataclass(frozen=True)
+class ListFilters:
+    """A normalized filter combination; hashable, so it can key cached responses."""
+
+    available: bool | None = None
+    min_spots: int | None = None
+    payment: str | None = None
+    covered: bool | None = None
+    metro: bool | None = None
+    disabled: bool | None = None
+
+    def __post_init__(self) -> None:
+        if self.payment is not None:
+            object.__setattr__(self, "payment", self.payment.strip().lower() or None)
+
+    def is_empty(self) -> bool:
+        return all(getattr(self, f.name) is None for f in fields(self))
+
+
+def _column(values: Sequence[float | None]) -> np.ndarray:
+    """Float column with NaN for unknown values (sorted last)."""
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _flags(values: Sequence[bool]) -> np.ndarray:
+    return np.array(values, dtype=bool)
+
+
+@dataclass(frozen=True, eq=False)
+class ParkingColumns:
+    lat: np.ndarray
+    lng: np.ndarray
+    free_spots: np.ndarray
+    occupancy: np.ndarray
+    price: np.ndarray
+    available: np.ndarray
+    covered: np.ndarray
+    metro: np.ndarray
+    disabled: np.ndarray
+    # Rows with a known free-spot count, ascending by count, and those counts.
+    free_rows: np.ndarray
+    free_sorted: np.ndarray
+    # Lowercased payment method -> rows accepting it.
+    payments: dict[str, np.ndarray]
+    # Point-independent sort orders and filter masks, computed on first use.
+    orders: dict[str, np.ndarray] = field(default_factory=dict)
+    masks: dict[ListFilters, np.ndarray] = field(default_factory=dict)
+
+    @classmethod
+    def from_parkings(cls, parkings: Sequence[ParkingSchema]) -> "ParkingColumns":
+        free_spots = _column([p.free_spots for p in parkings])
+        known = np.flatnonzero(~np.isnan(free_spots))
+        free_rows = known[np.argsort(free_spots[known], kind="stable")]
+        payments: dict[str, list[int]] = {}
+        for row, p in enumerate(parkings):
+            for method in p.detail.payment_methods if p.detail else ():
+                payments.setdefault(method.strip().lower(), []).append(row)
+        n = len(parkings)
+        return cls(
+            lat=np.radians(np.array([p.lat for p in parkings], dtype=np.float64)),
+            lng=np.radians(np.array([p.lng for p in parkings], dtype=np.float64)),
+            free_spots=free_spots,
+            occupancy=_column([p.occupancy_percentage for p in parkings]),
+            price=_column([p.detail.hourly_rate_daytime if p.detail else None for p in parkings]),
+            available=_flags([p.is_available for p in parkings]),
+            covered=_flags([bool(p.detail and p.detail.is_covered) for p in parkings]),
+            metro=_flags([bool(p.detail and p.detail.has_metro_access) for p in parkings]),
+            disabled=_flags([bool(p.detail and p.detail.disabled_spots) for p in parkings]),
+            free_rows=free_rows,
+            free_sorted=free_spots[free_rows],
+            payments={m: np.isin(np.arange(n), rows) for m, rows in payments.items()},
+        )
+
+    def __len__(self) -> int:
+        return len(self.available)
+
+    def distances(self, lat: float, lng: float) -> np.ndarray:
+        """Haversine distance in meters from a point to every lot."""
+        phi, lmb = np.radians(lat), np.radians(lng)
+        a = (
+            np.sin((self.lat - phi) / 2) ** 2
+            + np.cos(phi) * np.cos(self.lat) * np.sin((self.lng - lmb) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def order(self, key: SortKey) -> np.ndarray:
+        """Row indices for a point-independent sort, unknown values last."""
+        order = self.orders.get(key)
+        if order is None:
+            # Stable sorts keep feed order among ties; NaN sorts after every number.
+            if key == "free_spots":
+                order = np.argsort(-self.free_spots, kind="stable")
+            elif key == "occupancy":
+                order = np.argsort(self.occupancy, kind="stable")
+            elif key == "price":
+                order = np.argsort(self.price, kind="stable")
+            else:
+                raise ValueError(f"{key!r} depends on the query point")
+            self.orders[key] = order
+        return order
+
+    def _at_least(self, spots: int) -> np.ndarray:
+        mask = np.zeros(len(self), dtype=bool)
+        # Lots without a count never qualify: they are not in free_rows.
+        mask[self.free_rows[np.searchsorted(self.free_sorted, spots, side="left") :]] = True
+        return mask
+
+    def _accepts(self, term: str) -> np.ndarray:
+        """Lots with a payment method containing ``term`` (e.g. "telepass")."""
+        mask = np.zeros(len(self), dtype=bool)
+        for method, rows in self.payments.items():
+            if term in method:
+                mask |= rows
+        return mask
+
+    def mask(self, filters: ListFilters) -> np.ndarray:
+        """Rows matching every predicate of ``filters``."""
+        mask = self.masks.get(filters)
+        if mask is None:
+            mask = np.ones(len(self), dtype=bool)
+            for flag, column in (
+                (filters.available, self.available),
+                (filters.covered, self.covered),
+                (filters.metro, self.metro),
+                (filters.disabled, self.disabled),
+            ):
+                if flag is not None:
+                    mask &= column if flag else ~column
+            if filters.min_spots is not None:
+                mask &= self._at_least(filters.min_spots)
+            if filters.payment is not None:
+                mask &= self._accepts(filters.payment)
+            self.masks[filters] = mask
+        return mask
+
+    def rank(
+        self,
+        sort: SortKey | None,
+        lat: float | None = None,
+        lng: float | None = None,
+        filters: ListFilters = ListFilters(),
+        limit: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray | None]:
+        """Indices of the matching lots in ``sort`` order, and their distances if sorted by it."""
+        mask = self.mask(filters)
+        distances = None
+        if sort == "distance":
+            distances = self.distances(lat, lng)
+            order = np.flatnonzero(mask)
+            order = order[np.argsort(distances[order], kind="stable")]
+        else:
+            order = self.order(sort) if sort is not None else np.arange(len(self))
+            order = order[mask[order]]
+        order = order[:limit]
+        return order, distances[order] if distances is not None else None
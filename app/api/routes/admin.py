@@ -1,4 +1,4 @@
-"""Admin routes for API key management.
+"""Admin routes for API key management, cache and ingest introspection.
 
 All endpoints require the ``X-Admin-Key`` header to match the
 ``ADMIN_API_KEY`` environment variable (constant-time comparison).
@@ -7,13 +7,31 @@ All endpoints require the ``X-Admin-Key`` header to match the
 import hmac
 from typing import Literal
 
-from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.dependencies import get_db_session
+from app.api.broadcast import UpdateBroadcaster
+from app.api.dependencies import (
+    get_broadcaster,
+    get_cache_service,
+    get_circuit_breaker,
+    get_db_session,
+    get_detail_cache,
+    get_ingest_log,
+    get_live_data,
+    get_nearby_index,
+    get_snapshot_buffer,
+)
+from app.api.detail_cache import DetailCache
+from app.api.live_data import LiveDatasetCache
+from app.api.nearby_index import NearbyIndex
 from app.config import settings
 from app.infrastructure.api_key_service import ApiKeyService
+from app.infrastructure.circuit_breaker import CircuitBreaker
+from app.infrastructure.ingest_stats import IngestLog
+from app.infrastructure.redis_cache import RedisCache
+from app.infrastructure.snapshot_buffer import SnapshotBuffer
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
@@ -94,3 +112,38 @@ async def revoke_api_key(
     if not found:
         raise HTTPException(status_code=404, detail="Key not found")
     return {"status": "revoked", "key_id": key_id}
+
+
+@router.get("/cache")
+async def cache_stats(
+    _: None = Depends(_verify_admin),
+    cache: RedisCache = Depends(get_cache_service),
+    live: LiveDatasetCache = Depends(get_live_data),
+    broadcaster: UpdateBroadcaster = Depends(get_broadcaster),
+    nearby: NearbyIndex = Depends(get_nearby_index),
+    breaker: CircuitBreaker = Depends(get_circuit_breaker),
+    details: DetailCache = Depends(get_detail_cache),
+) -> dict:
+    """Counters of this worker's dataset, indexes and SSE fan-out, Redis and the 5T breaker."""
+    return {
+        "live": live.stats(),
+        "nearby": nearby.stats(),
+        "details": details.stats(),
+        "stream": broadcaster.stats(),
+        "redis": await cache.info(),
+        "breaker": await breaker.stats(),
+    }
+
+
+@router.get("/ingest")
+async def ingest_stats(
+    limit: int | None = Query(None, ge=1, le=1000),
+    _: None = Depends(_verify_admin),
+    ingest: IngestLog = Depends(get_ingest_log),
+    buffer: SnapshotBuffer = Depends(get_snapshot_buffer),
+) -> dict:
+    """Per-stage timings, byte and row counts of the last ingest cycles, newest first.
+
+    ``snapshot_buffer`` gives the depth and lag of snapshots not yet in Postgres.
+    """
+    return {**await ingest.stats(limit), "snapshot_buffer": await buffer.stats()}
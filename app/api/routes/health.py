@@ -2,7 +2,9 @@
 
 Returns the operational status of all backing services. Used by Docker
 HEALTHCHECK, load balancers, and uptime monitors to determine whether
-the instance should receive traffic.
+the instance should receive traffic. ``/ready`` is the readiness
+handshake with the ingest job: it only succeeds once a dataset has been
+published, which matters when ingest runs in a separate worker.
 """
 
 from fastapi import APIRouter, Depends
@@ -11,9 +13,10 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_cache_service, get_db_session
-from app.api.schemas import HealthResponse
+from app.api.schemas import HealthResponse, ReadinessResponse
 from app.config import settings
 from app.domain.interfaces import CacheService
+from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY
 
 router = APIRouter(tags=["system"])
 
@@ -45,3 +48,18 @@ async def health_check(
     if not all_ok:
         return JSONResponse(content=response.model_dump(), status_code=503)
     return response
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(
+    cache: CacheService = Depends(get_cache_service),
+) -> ReadinessResponse | JSONResponse:
+    version, _ = await cache.get_pointer(PARKINGS_CACHE_KEY)
+    response = ReadinessResponse(
+        status="ready" if version else "waiting",
+        ingest_mode=settings.ingest_mode,
+        dataset_version=version,
+    )
+    if version is None:
+        return JSONResponse(content=response.model_dump(), status_code=503)
+    return response
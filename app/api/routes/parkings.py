@@ -2,94 +2,277 @@
 
 Supports ETag-based conditional requests to minimize bandwidth for
 polling clients. Data is served from cache when available, falling
-back to a live 5T API fetch on cache miss.
+back to a live 5T API fetch on cache miss; concurrent misses share one
+fetch per worker, and a Redis lock lets a single worker fetch while the
+others wait for its result. Data 5T has not confirmed for a while is
+still served, marked stale, while it is refreshed in the background.
+With ``INGEST_MODE=external`` the API never calls 5T itself: a miss waits
+for the ingest worker to publish instead.
+Each worker keeps the decoded dataset in memory (see
+``app.api.live_data``), and the unfiltered list is streamed from bodies
+pre-rendered and pre-compressed by the ingest job; filtered lists are
+rendered once per version and filter combination.
+Clients that stay connected get updates pushed over SSE instead of polling.
+History over long ranges is served as aggregated buckets, from rollup
+tables where they exist.
+``/nearby`` is answered from a per-worker spatial index, with PostGIS as the
+fallback.
 """
 
-from datetime import datetime, timezone
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
 
+import orjson
 import structlog
-from fastapi import APIRouter, Depends, Header, Query, Security
-from fastapi.responses import JSONResponse, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Security
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.broadcast import Subscription, UpdateBroadcaster, sse_event
 from app.api.dependencies import (
+    get_broadcaster,
     get_cache_service,
     get_db_session,
+    get_detail_cache,
+    get_live_data,
+    get_nearby_index,
     get_parking_repository,
     verify_api_key,
 )
+from app.api.detail_cache import DetailCache
+from app.api.live_data import LiveDataset, LiveDatasetCache
+from app.api.nearby_index import NearbyIndex, offline_schema
+from app.api.ranking import ListFilters, SortKey
 from app.api.schemas import (
-    ParkingDetailSchema,
+    HistoryBucketSchema,
+    ParkingChangesResponse,
     ParkingHistoryResponse,
     ParkingListResponse,
     ParkingSchema,
     SnapshotSchema,
 )
-from app.domain.exceptions import ParkingNotFoundError
+from app.config import settings
+from app.domain.exceptions import CircuitOpenError, DatasetNotReadyError, ParkingNotFoundError
 from app.domain.interfaces import CacheService, ParkingRepository
+from app.infrastructure.changes import touched_since
 from app.infrastructure.db_repository import ParkingDBRepository
+from app.infrastructure.prerender import IDENTITY, content_hash, negotiate, response_headers
 from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY
+from app.infrastructure.snapshots import Resolution, pick_resolution
 
 logger = structlog.get_logger()
 
 router = APIRouter(prefix="/api/v1/parkings", tags=["parkings"])
 
+# How often a worker waiting on another worker's refresh checks for its result.
+REFRESH_POLL_SECONDS = 0.1
+
+# Strong references to background refreshes until they finish.
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def _refresh_from_upstream(
+    cache: CacheService,
+    repository: ParkingRepository,
+    live: LiveDatasetCache,
+    stale: LiveDataset | None = None,
+) -> LiveDataset:
+    """Fetch 5T and publish, unless another worker is already doing it.
+
+    The worker holding the refresh lock fetches; the others poll for the
+    version it publishes and only fetch themselves if it has not appeared
+    within ``refresh_wait_seconds``. When refreshing a ``stale`` dataset,
+    its GTT detail is carried over to the new one.
+    """
+    token = await cache.acquire_lock(PARKINGS_CACHE_KEY, settings.refresh_lock_seconds)
+    if token is None:
+        deadline = time.monotonic() + settings.refresh_wait_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(REFRESH_POLL_SECONDS)
+            dataset = await live.get(cache)
+            if dataset is not None:
+                return dataset
+        logger.warning("parkings_refresh_wait_timeout")
+    try:
+        parkings = await repository.fetch_all()
+        known = stale.entries if stale is not None else {}
+        schemas = [
+            ParkingSchema.from_domain(p).model_copy(update={"detail": known[p.id].parking.detail})
+            if p.id in known
+            else ParkingSchema.from_domain(p)
+            for p in parkings
+        ]
+        response = ParkingListResponse(
+            total=len(schemas),
+            last_update=datetime.now(timezone.utc),
+            source=stale.listing.source if stale is not None else "5T Torino Open Data",
+            parkings=schemas,
+        )
+        version = await cache.publish(PARKINGS_CACHE_KEY, response.model_dump(mode="json"))
+    finally:
+        if token is not None:
+            await cache.release_lock(PARKINGS_CACHE_KEY, token)
+    # Read the published version back so this worker serves its rendered bodies.
+    dataset = await live.get_version(cache, version) if version else None
+    return dataset or LiveDataset(version="", listing=response)
+
+
+async def _wait_for_ingest(cache: CacheService, live: LiveDatasetCache) -> LiveDataset:
+    """Wait up to ``refresh_wait_seconds`` for the ingest worker to publish a dataset."""
+    deadline = time.monotonic() + settings.refresh_wait_seconds
+    while time.monotonic() < deadline:
+        await asyncio.sleep(REFRESH_POLL_SECONDS)
+        dataset = await live.get(cache)
+        if dataset is not None:
+            return dataset
+    logger.warning("parkings_ingest_wait_timeout")
+    raise DatasetNotReadyError("No parking dataset has been published yet")
+
+
+async def _refresh_quietly(
+    cache: CacheService,
+    repository: ParkingRepository,
+    live: LiveDatasetCache,
+    stale: LiveDataset,
+) -> None:
+    try:
+        await live.refreshes.do(
+            PARKINGS_CACHE_KEY, lambda: _refresh_from_upstream(cache, repository, live, stale)
+        )
+    except CircuitOpenError:
+        logger.info("parkings_background_refresh_skipped", reason="circuit_open")
+    except Exception:
+        logger.warning("parkings_background_refresh_failed", exc_info=True)
+
+
+def _is_stale(age: float | None) -> bool:
+    return age is not None and age > settings.cache_soft_ttl
+
+
+def _render_etag(version: str, stale: bool, *params: object) -> str:
+    """Validator of a list rendered per request: one per version, variant and ``stale`` flag.
+
+    It never equals a pre-rendered body's ETag, so a client holding the
+    fresh body is not told ``304`` once the data has gone stale.
+    """
+    return content_hash(orjson.dumps([version, stale, *map(repr, params)]))
+
 
 async def _get_parkings_data(
     cache: CacheService,
     repository: ParkingRepository,
-) -> tuple[ParkingListResponse, str]:
-    cached = await cache.get(PARKINGS_CACHE_KEY)
-    if cached:
-        etag = await cache.get_etag(PARKINGS_CACHE_KEY)
-        return ParkingListResponse(**cached), etag or ""
-
-    parkings = await repository.fetch_all()
-    schemas = [ParkingSchema.from_domain(p) for p in parkings]
-    response = ParkingListResponse(
-        total=len(schemas),
-        last_update=datetime.now(timezone.utc),
-        source="5T Torino Open Data",
-        parkings=schemas,
+    live: LiveDatasetCache,
+) -> LiveDataset:
+    dataset = await live.get(cache)
+    external = settings.ingest_mode == "external"
+    if dataset is not None:
+        if external:
+            # The ingest worker keeps retrying 5T; stale data is served as is.
+            return dataset
+        if _is_stale(live.age()) and PARKINGS_CACHE_KEY not in live.refreshes:
+            # Serve what we have; the refresh runs without holding up this request.
+            task = asyncio.create_task(_refresh_quietly(cache, repository, live, dataset))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return dataset
+    # Concurrent misses in this worker share a single refresh (or wait).
+    if external:
+        return await live.refreshes.do(PARKINGS_CACHE_KEY, lambda: _wait_for_ingest(cache, live))
+    return await live.refreshes.do(
+        PARKINGS_CACHE_KEY, lambda: _refresh_from_upstream(cache, repository, live)
     )
-    etag = await cache.set_with_etag(PARKINGS_CACHE_KEY, response.model_dump(mode="json"))
-    return response, etag
 
 
 @router.get("", response_model=ParkingListResponse)
 async def get_parkings(
     available: bool | None = Query(None, description="Filter by availability"),
     min_spots: int | None = Query(None, ge=0, description="Minimum free spots"),
+    payment: str | None = Query(
+        None, max_length=50, description="Accepted payment method (e.g. telepass)"
+    ),
+    covered: bool | None = Query(None, description="Filter by covered parking"),
+    metro: bool | None = Query(None, description="Filter by metro access"),
+    disabled: bool | None = Query(None, description="Filter by spots for disabled drivers"),
+    sort: SortKey | None = Query(None, description="Order results (distance needs lat/lng)"),
+    lat: float | None = Query(None, ge=-90, le=90),
+    lng: float | None = Query(None, ge=-180, le=180),
+    limit: int | None = Query(None, ge=1, le=500, description="Return at most this many"),
     api_key: str | None = Security(verify_api_key),
     cache: CacheService = Depends(get_cache_service),
     repository: ParkingRepository = Depends(get_parking_repository),
+    live: LiveDatasetCache = Depends(get_live_data),
     if_none_match: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
 ) -> ParkingListResponse | Response:
     """Get real-time parking availability in Torino.
 
     Supports ETag conditional requests via the If-None-Match header.
-    Optionally filter by availability and minimum free spots.
+    Optionally filter by availability, minimum free spots, payment method,
+    covered, metro access and disabled spots, sort by distance from
+    ``lat``/``lng``, free spots, occupancy or price, and cap the result
+    with ``limit``. Each filter combination has its own ETag.
+
+    ``X-Data-Age`` tells how many seconds ago 5T last confirmed the data.
+    Past the soft TTL the list is marked ``stale: true`` and refreshed in
+    the background, so it keeps answering while 5T is down.
     """
-    if if_none_match:
-        current_etag = await cache.get_etag(PARKINGS_CACHE_KEY)
-        if current_etag and if_none_match.strip('"') == current_etag:
-            return Response(status_code=304, headers={"ETag": f'"{current_etag}"'})
+    if sort == "distance" and (lat is None or lng is None):
+        raise HTTPException(status_code=422, detail="sort=distance requires lat and lng")
+    filters = ListFilters(
+        available=available,
+        min_spots=min_spots,
+        payment=payment,
+        covered=covered,
+        metro=metro,
+        disabled=disabled,
+    )
+    dataset = await _get_parkings_data(cache, repository, live)
+    etag = dataset.version
+    age = live.age() if etag else None
+    stale = _is_stale(age)
+    freshness = {"X-Data-Age": str(int(age))} if age is not None else {}
 
-    data, etag = await _get_parkings_data(cache, repository)
+    # Stale lists are rendered per request: the pre-rendered bodies say stale: false.
+    if sort is None and limit is None and etag and not stale:
+        if filters.is_empty():
+            encoding = negotiate(accept_encoding)
+            body = dataset.bodies.get(encoding)
+        else:
+            encoding = IDENTITY
+            rendered = dataset.filtered_body(filters)
+            etag, body = rendered.etag, rendered.variants[IDENTITY]
+        if if_none_match and if_none_match.strip('"') == etag:
+            return Response(status_code=304, headers={"ETag": f'"{etag}"', **freshness})
+        if body is not None:
+            return Response(
+                content=body,
+                media_type="application/json",
+                headers={**response_headers(etag, encoding), **freshness},
+            )
+    if etag:
+        etag = _render_etag(dataset.version, stale, sort, lat, lng, limit, filters)
+        if if_none_match and if_none_match.strip('"') == etag:
+            return Response(status_code=304, headers={"ETag": f'"{etag}"', **freshness})
 
-    filtered = data.parkings
-    if available is not None:
-        filtered = [p for p in filtered if p.is_available == available]
-    if min_spots is not None:
-        filtered = [p for p in filtered if p.free_spots is not None and p.free_spots >= min_spots]
+    data = dataset.listing
+    order, distances = dataset.columns.rank(sort, lat, lng, filters, limit)
+    filtered = [data.parkings[i] for i in order.tolist()]
+    if distances is not None:
+        filtered = [
+            p.model_copy(update={"distance_m": round(d, 1)})
+            for p, d in zip(filtered, distances.tolist())
+        ]
 
     result = ParkingListResponse(
         total=len(filtered),
         last_update=data.last_update,
         source=data.source,
         parkings=filtered,
+        stale=stale,
     )
-    headers = {"ETag": f'"{etag}"'} if etag else {}
+    headers = {"ETag": f'"{etag}"', **freshness} if etag else {}
     return JSONResponse(content=result.model_dump(mode="json"), headers=headers)
 
 
@@ -99,57 +282,66 @@ async def get_nearby_parkings(
     lng: float = Query(..., ge=-180, le=180),
     radius: int = Query(1000, ge=100, le=5000, description="Radius in meters"),
     limit: int = Query(10, ge=1, le=50),
+    expand: bool = Query(
+        False, description="Widen the radius until `limit` parkings are found (bounded)"
+    ),
     api_key: str | None = Security(verify_api_key),
     db: AsyncSession = Depends(get_db_session),
     cache: CacheService = Depends(get_cache_service),
     repository: ParkingRepository = Depends(get_parking_repository),
+    live: LiveDatasetCache = Depends(get_live_data),
+    nearby: NearbyIndex = Depends(get_nearby_index),
+    details: DetailCache = Depends(get_detail_cache),
 ) -> ParkingListResponse:
-    """Find parkings within radius (meters) of a point.
+    """Find parkings within radius (meters) of a point, nearest first.
 
-    Uses PostGIS for spatial filtering, then merges real-time availability
-    data from the 5T cache so results include live free_spots and status.
-    """
-    repo = ParkingDBRepository(db)
-    entities = await repo.find_nearby(lat, lng, radius, limit)
+    Each result carries its ``distance_m``. With ``expand`` the search
+    returns the ``limit`` nearest parkings up to ``nearby_max_radius_meters``
+    away, sparing clients a retry loop with growing radii.
 
-    # Build a lookup of real-time data from cache
-    live_data: dict[int, ParkingSchema] = {}
+    Answered from this worker's in-memory spatial index merged with the
+    live dataset. Falls back to a PostGIS spatial query, merged with
+    whatever live data is cached, when there is no live dataset or the
+    index cannot be built.
+    """
+    # Nearest-first search with a limit: the K nearest within the maximum radius
+    # are exactly what growing the radius step by step would end up returning.
+    radius = max(radius, settings.nearby_max_radius_meters) if expand else radius
+    dataset = None
     try:
-        data, _ = await _get_parkings_data(cache, repository)
-        live_data = {p.id: p for p in data.parkings}
+        dataset = await _get_parkings_data(cache, repository, live)
     except Exception:
         logger.warning("nearby_cache_miss", msg="Could not load live data for merge")
 
-    parkings = []
-    for e in entities:
-        live = live_data.get(e.id)
-        if live:
-            # Use live data enriched with detail from DB join
-            detail_dict = (
-                ParkingDetailSchema.model_validate(e.detail).model_dump() if e.detail else None
-            )
-            merged_detail = ParkingDetailSchema(**detail_dict) if detail_dict else live.detail
-            parkings.append(live.model_copy(update={"detail": merged_detail}))
+    if dataset is not None and dataset.version:
+        try:
+            parkings = await nearby.search(dataset, db, lat, lng, radius, limit)
+        except Exception:
+            logger.warning("nearby_index_unavailable", exc_info=True)
         else:
-            detail_dict = (
-                ParkingDetailSchema.model_validate(e.detail).model_dump() if e.detail else None
-            )
-            parkings.append(
-                ParkingSchema(
-                    id=e.id,
-                    name=e.name,
-                    status=0,
-                    total_spots=e.total_spots,
-                    free_spots=None,
-                    tendence=None,
-                    lat=e.lat,
-                    lng=e.lng,
-                    status_label="nessun dato",
-                    is_available=False,
-                    occupancy_percentage=None,
-                    detail=ParkingDetailSchema(**detail_dict) if detail_dict else None,
-                )
+            return ParkingListResponse(
+                total=len(parkings),
+                last_update=datetime.now(timezone.utc),
+                source="Spatial index + 5T real-time",
+                parkings=parkings,
             )
+
+    repo = ParkingDBRepository(db)
+    entries = dataset.entries if dataset is not None else {}
+    await details.refresh(db)
+
+    parkings = []
+    for e, distance in await repo.find_nearby(lat, lng, radius, limit):
+        update: dict = {"distance_m": round(distance, 1)}
+        detail = details.get(e.id)
+        entry = entries.get(e.id)
+        if entry is None:
+            parkings.append(offline_schema(e, detail).model_copy(update=update))
+            continue
+        # Use live data enriched with the cached detail
+        if detail is not None:
+            update["detail"] = detail
+        parkings.append(entry.parking.model_copy(update=update))
     return ParkingListResponse(
         total=len(parkings),
         last_update=datetime.now(timezone.utc),
@@ -158,30 +350,139 @@ async def get_nearby_parkings(
     )
 
 
+async def _changes_since(dataset: LiveDataset, since: str | None, cache: CacheService) -> bytes:
+    if since is not None and (body := dataset.deltas.get(since)) is not None:
+        return body
+    touched = None
+    if since is not None and dataset.version:
+        records = await cache.get_changes(PARKINGS_CACHE_KEY)
+        touched = touched_since(records, dataset.version, since)
+    return dataset.changes_body(since, touched)
+
+
+@router.get("/changes", response_model=ParkingChangesResponse)
+async def get_parking_changes(
+    since: str = Query(..., min_length=1, description="Data version (ETag) held by the client"),
+    api_key: str | None = Security(verify_api_key),
+    cache: CacheService = Depends(get_cache_service),
+    repository: ParkingRepository = Depends(get_parking_repository),
+    live: LiveDatasetCache = Depends(get_live_data),
+) -> ParkingChangesResponse | Response:
+    """Get only the parkings that changed since a given data version.
+
+    Pass the ETag of the last list (or the ``version`` of the last delta) as
+    ``since``. When that version is unknown or older than the retained change
+    log, the full list is returned with ``full: true``.
+    """
+    dataset = await _get_parkings_data(cache, repository, live)
+    return Response(
+        content=await _changes_since(dataset, since.strip('"'), cache),
+        media_type="application/json",
+    )
+
+
+async def _event_stream(
+    broadcaster: UpdateBroadcaster, subscription: Subscription, version: str, first: bytes
+) -> AsyncIterator[bytes]:
+    # ``first`` is the dataset's shared rendered body: only the framed copy is per client.
+    try:
+        yield sse_event(version, first)
+        # The broadcaster queues None when it evicts this client as a slow consumer.
+        while (event := await subscription.queue.get()) is not None:
+            yield event
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get("/stream", response_model=None)
+async def stream_parkings(
+    request: Request,
+    api_key: str | None = Security(verify_api_key),
+    cache: CacheService = Depends(get_cache_service),
+    repository: ParkingRepository = Depends(get_parking_repository),
+    live: LiveDatasetCache = Depends(get_live_data),
+    broadcaster: UpdateBroadcaster = Depends(get_broadcaster),
+    last_event_id: str | None = Header(None),
+) -> StreamingResponse:
+    """Push parking updates as Server-Sent Events.
+
+    Every ``changes`` event carries the body of ``/changes`` relative to the
+    previous event: the first one (or any after a missed update) is the full
+    list with ``full: true``. On reconnect, ``Last-Event-ID`` resumes from the
+    version the client already holds.
+    """
+    # Subscribe before reading the dataset so no version can slip in between.
+    subscription = broadcaster.subscribe(request.app.state.redis_pool)
+    try:
+        dataset = await _get_parkings_data(cache, repository, live)
+        first = await _changes_since(dataset, last_event_id, cache)
+    except BaseException:
+        broadcaster.unsubscribe(subscription)
+        raise
+    return StreamingResponse(
+        _event_stream(broadcaster, subscription, dataset.version, first),
+        media_type="text/event-stream",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{parking_id}", response_model=ParkingSchema)
 async def get_parking(
     parking_id: int,
     api_key: str | None = Security(verify_api_key),
     cache: CacheService = Depends(get_cache_service),
     repository: ParkingRepository = Depends(get_parking_repository),
-) -> ParkingSchema:
-    """Get a single parking by ID."""
-    data, _ = await _get_parkings_data(cache, repository)
-    for p in data.parkings:
-        if p.id == parking_id:
-            return p
-    raise ParkingNotFoundError(parking_id)
+    live: LiveDatasetCache = Depends(get_live_data),
+    if_none_match: str | None = Header(None),
+) -> ParkingSchema | Response:
+    """Get a single parking by ID.
+
+    The ETag is per parking, so a client polling one lot gets a 304 as long
+    as that lot is unchanged, whatever happens to the others.
+    """
+    dataset = await _get_parkings_data(cache, repository, live)
+    entry = dataset.entries.get(parking_id)
+    if entry is None:
+        raise ParkingNotFoundError(parking_id)
+    headers = {"ETag": f'"{entry.etag}"'}
+    if if_none_match and if_none_match.strip('"') == entry.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
 
 @router.get("/{parking_id}/history", response_model=ParkingHistoryResponse)
 async def get_parking_history(
     parking_id: int,
     hours: int = Query(24, ge=1, le=720),
+    resolution: Resolution | None = Query(
+        None, description="raw, or 5m/1h/1d buckets; by default the finest that fits the range"
+    ),
     api_key: str | None = Security(verify_api_key),
     db: AsyncSession = Depends(get_db_session),
 ) -> ParkingHistoryResponse:
-    """Get availability history for a parking (default: last 24h)."""
+    """Get availability history for a parking (default: last 24h).
+
+    Raw history has one snapshot per ingest cycle; aggregated resolutions
+    return buckets with min/avg/max free spots, average occupancy and the
+    status mix. Without ``resolution``, a range of more than
+    ``history_max_points`` cycles (about 26 h with the defaults) is answered
+    with buckets only: ``snapshots`` is empty and ``total_snapshots`` is 0.
+    Pass ``resolution=raw`` to get the snapshots of any range.
+    """
+    if resolution is None:
+        step = timedelta(seconds=settings.fetch_interval_seconds)
+        resolution = pick_resolution(hours, step, settings.history_max_points)
     repo = ParkingDBRepository(db)
+    if resolution != "raw":
+        buckets = await repo.get_history_buckets(parking_id, hours, resolution)
+        return ParkingHistoryResponse(
+            parking_id=parking_id,
+            hours=hours,
+            resolution=resolution,
+            total_snapshots=0,
+            snapshots=[],
+            buckets=[HistoryBucketSchema.model_validate(b) for b in buckets],
+        )
     snapshots = await repo.get_history(parking_id, hours)
     return ParkingHistoryResponse(
         parking_id=parking_id,
@@ -8,9 +8,10 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_serializer
 
 from app.domain.models import Parking
+from app.infrastructure.snapshots import Resolution
 
 
 class ParkingDetailSchema(BaseModel):
@@ -54,9 +55,23 @@ class ParkingSchema(BaseModel):
     is_available: bool
     occupancy_percentage: float | None = Field(None, ge=0, le=100)
     detail: ParkingDetailSchema | None = None
+    # Set only by /nearby and sort=distance: meters from the query point.
+    distance_m: float | None = None
+
+    @model_serializer(mode="wrap")
+    def _omit_unset_distance(self, handler):
+        # Left out everywhere else, so stored bodies and their ETags do not change.
+        data = handler(self)
+        if self.distance_m is None:
+            data.pop("distance_m", None)
+        return data
 
     @classmethod
-    def from_domain(cls, parking: Parking, detail: dict | None = None) -> ParkingSchema:
+    def from_domain(
+        cls, parking: Parking, detail: ParkingDetailSchema | dict | None = None
+    ) -> ParkingSchema:
+        if isinstance(detail, dict):
+            detail = ParkingDetailSchema(**detail) if detail else None
         return cls(
             id=parking.id,
             name=parking.name,
@@ -69,7 +84,7 @@ class ParkingSchema(BaseModel):
             status_label=parking.status_label,
             is_available=parking.is_available,
             occupancy_percentage=parking.occupancy_percentage,
-            detail=ParkingDetailSchema(**detail) if detail else None,
+            detail=detail,
         )
 
 
@@ -78,6 +93,18 @@ class ParkingListResponse(BaseModel):
     last_update: datetime
     source: str
     parkings: list[ParkingSchema]
+    # True when 5T has not confirmed the data within the soft TTL.
+    stale: bool = False
+
+
+class ParkingChangesResponse(BaseModel):
+    """Parkings changed since a client's data version, or the full list if ``full``."""
+
+    version: str
+    full: bool
+    last_update: datetime
+    parkings: list[ParkingSchema]
+    removed: list[int] = Field(default_factory=list)
 
 
 class SnapshotSchema(BaseModel):
@@ -90,11 +117,26 @@ class SnapshotSchema(BaseModel):
     recorded_at: datetime
 
 
+class HistoryBucketSchema(BaseModel):
+    model_config = {"from_attributes": True}
+
+    bucket: datetime
+    samples: int
+    free_min: int | None = None
+    free_avg: float | None = None
+    free_max: int | None = None
+    occupancy_avg: float | None = None
+    status_mix: dict[str, int]
+
+
 class ParkingHistoryResponse(BaseModel):
     parking_id: int
     hours: int
+    resolution: Resolution = "raw"
     total_snapshots: int
     snapshots: list[SnapshotSchema]
+    # Filled instead of ``snapshots`` for any resolution but raw.
+    buckets: list[HistoryBucketSchema] = Field(default_factory=list)
 
 
 class HealthResponse(BaseModel):
@@ -102,3 +144,9 @@ class HealthResponse(BaseModel):
     version: str
     environment: str
     services: dict[str, str]
+
+
+class ReadinessResponse(BaseModel):
+    status: str
+    ingest_mode: str
+    dataset_version: str | None
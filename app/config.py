@@ -7,6 +7,7 @@ The module exports a cached singleton accessible as ``settings``.
 
 import json
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import field_validator, model_validator
 from pydantic_settings import BaseSettings
@@ -37,10 +38,32 @@ class Settings(BaseSettings):
 
     five_t_api_url: str = "https://opendata.5t.torino.it/get_pk"
     five_t_timeout: int = 10
+    fetch_interval_seconds: int = 120
+    # "embedded" runs the ingest jobs in the API process; "external" leaves
+    # them to a separate ``python -m app.ingest`` worker.
+    ingest_mode: Literal["embedded", "external"] = "embedded"
+    leader_lease_seconds: int = 30
+    ingest_cycles_kept: int = 100
+    breaker_failure_threshold: int = 3
+    breaker_base_backoff_seconds: float = 10.0
+    breaker_max_backoff_seconds: float = 300.0
 
     cache_ttl: int = 120
+    # Data unconfirmed by 5T for longer than the soft TTL is served marked stale
+    # (with a background refresh); the last known good copy lasts the hard TTL.
+    cache_soft_ttl: int = 180
+    cache_hard_ttl: int = 86400
+    cache_versions_kept: int = 5
     cache_compression: bool = True
     cache_compression_threshold: int = 512
+    live_cache_revalidate_seconds: float = 1.0
+    refresh_lock_seconds: float = 15.0
+    refresh_wait_seconds: float = 5.0
+    stream_queue_size: int = 4
+    stream_heartbeat_seconds: float = 15.0
+    nearby_index_refresh_seconds: float = 3600.0
+    detail_cache_probe_seconds: float = 60.0
+    nearby_max_radius_meters: int = 20000
 
     rate_limit_anonymous: int = 20
     rate_limit_authenticated: int = 100
@@ -73,6 +96,15 @@ class Settings(BaseSettings):
     httpx_keepalive_expiry: float = 30.0
 
     snapshot_retention_days: int = 30
+    # Daily snapshot partitions created ahead of today
+    snapshot_partitions_ahead_days: int = 7
+    snapshot_storage_mode: Literal["full", "changes"] = "changes"
+    snapshot_keyframe_minutes: int = 60
+    snapshot_flush_seconds: int = 10
+    # Buffer entries (one per ingest cycle) copied per transaction
+    snapshot_flush_batch: int = 500
+    # History without an explicit resolution picks the finest one within this many points
+    history_max_points: int = 800
 
     model_config = {"env_file": ".env", "extra": "ignore"}
 
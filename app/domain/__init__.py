@@ -7,12 +7,14 @@ infrastructure layer to satisfy contracts without inheritance coupling.
 
 from app.domain.exceptions import FiveTApiError, ParkingNotFoundError
 from app.domain.interfaces import CacheService, ParkingRepository
-from app.domain.models import Parking
+from app.domain.models import ChangeRecord, Parking, Snapshot
 
 __all__ = [
     "CacheService",
+    "ChangeRecord",
     "FiveTApiError",
     "Parking",
     "ParkingNotFoundError",
     "ParkingRepository",
+    "Snapshot",
 ]
@@ -10,6 +10,22 @@ class FiveTApiError(Exception):
     """Raised when communication with the 5T API fails."""
 
 
+class CircuitOpenError(FiveTApiError):
+    """Raised without calling 5T while its circuit breaker is open."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        self.retry_after = retry_after
+        super().__init__(f"Circuit breaker {name} is open")
+
+
+class DatasetNotReadyError(Exception):
+    """Raised when no dataset has been published yet and the API may not fetch one itself."""
+
+
+class StaleLeaderError(Exception):
+    """Raised when a write carries a fencing token older than the current leader's."""
+
+
 class ParkingNotFoundError(Exception):
     """Raised when a requested parking does not exist."""
 
@@ -9,7 +9,7 @@ from __future__ import annotations
 
 from typing import Protocol
 
-from app.domain.models import Parking
+from app.domain.models import ChangeRecord, Parking
 
 
 class ParkingRepository(Protocol):
@@ -19,7 +19,23 @@ class ParkingRepository(Protocol):
 class CacheService(Protocol):
     async def get(self, key: str) -> dict | None: ...
     async def set(self, key: str, value: dict, ttl: int | None = None) -> None: ...
-    async def set_with_etag(self, key: str, value: dict, ttl: int | None = None) -> str: ...
+    async def publish(
+        self,
+        key: str,
+        value: dict,
+        ttl: int | None = None,
+        prev: str | None = None,
+        changed: tuple[int, ...] = (),
+        fence: int | None = None,
+    ) -> str: ...
+    async def touch(self, key: str, version: str, ttl: int | None = None) -> bool: ...
+    async def get_changes(self, key: str) -> list[ChangeRecord]: ...
     async def get_etag(self, key: str) -> str | None: ...
+    async def get_pointer(self, key: str) -> tuple[str | None, float | None]: ...
+    async def get_snapshot(
+        self, key: str
+    ) -> tuple[dict | None, str | None, dict[str, bytes], float | None]: ...
+    async def acquire_lock(self, key: str, ttl: float) -> str | None: ...
+    async def release_lock(self, key: str, token: str) -> None: ...
     async def delete(self, key: str) -> None: ...
     async def ping(self) -> bool: ...
@@ -6,6 +6,7 @@ as computed properties on the entities themselves.
 """
 
 from dataclasses import dataclass, field
+from datetime import datetime
 
 
 @dataclass(frozen=True)
@@ -65,3 +66,39 @@ class ParkingDetail:
     payment_methods: list[str] = field(default_factory=list)
     cameras: int | None = None
     notes: str = ""
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Availability of a parking at a point in time (history series entry)."""
+
+    parking_id: int
+    free_spots: int | None
+    total_spots: int
+    status: int
+    tendence: int | None
+    recorded_at: datetime
+
+
+@dataclass(frozen=True)
+class HistoryBucket:
+    """Availability of a parking aggregated over one interval, one sample per ingest cycle."""
+
+    parking_id: int
+    bucket: datetime
+    samples: int
+    free_min: int | None
+    free_avg: float | None
+    free_max: int | None
+    occupancy_avg: float | None
+    # Samples per status: open, full, no_data, out_of_service (as in ``status_label``).
+    status_mix: dict[str, int]
+
+
+@dataclass(frozen=True)
+class ChangeRecord:
+    """One step of the published-dataset change log: which parkings differ from ``prev``."""
+
+    version: str
+    prev: str
+    ids: tuple[int, ...]
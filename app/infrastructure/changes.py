@@ -0,0 +1,46 @@
+"""Change log linking consecutive published datasets.
+
+For every version it publishes, the ingest job records the version it
+replaced and the IDs of the parkings whose content differs between the two.
+Walking the log back from the current version yields every parking touched
+since an older version, without keeping older datasets around.
+"""
+
+from collections.abc import Iterable, Mapping
+
+import orjson
+
+from app.domain.models import ChangeRecord
+
+
+def encode_record(record: ChangeRecord) -> bytes:
+    return orjson.dumps({"version": record.version, "prev": record.prev, "ids": record.ids})
+
+
+def decode_record(raw: bytes) -> ChangeRecord:
+    data = orjson.loads(raw)
+    return ChangeRecord(version=data["version"], prev=data["prev"], ids=tuple(data["ids"]))
+
+
+def changed_ids(old: Mapping[int, str], new: Mapping[int, str]) -> tuple[int, ...]:
+    """IDs added, removed or modified between two ``{id: content hash}`` maps."""
+    return tuple(sorted(pid for pid in old.keys() | new.keys() if old.get(pid) != new.get(pid)))
+
+
+def touched_since(records: Iterable[ChangeRecord], current: str, since: str) -> set[int] | None:
+    """IDs touched between ``since`` and ``current``, given records newest first.
+
+    Returns None when the log does not reach back to ``since`` unbroken.
+    """
+    if since == current:
+        return set()
+    touched: set[int] = set()
+    version = current
+    for record in records:
+        if record.version != version:
+            return None
+        touched.update(record.ids)
+        version = record.prev
+        if version == since:
+            return touched
+    return None
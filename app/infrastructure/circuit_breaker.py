@@ -0,0 +1,153 @@
+"""Circuit breaker around upstream calls, with its state shared in Redis.
+
+The breaker is closed while calls succeed. After ``failure_threshold``
+consecutive failures it opens for a jittered, exponentially growing
+cool-down, during which every caller fails fast with
+``CircuitOpenError`` instead of waiting for a timeout. When the cool-down
+ends, a single caller across all workers is let through as a half-open
+probe: success closes the breaker, failure opens it again for twice as
+long (up to ``max_backoff``).
+
+State lives in one Redis hash per upstream endpoint, so every worker and
+the ingest job agree on it; transitions are logged and counted in the
+same hash. Without Redis the breaker lets every call through.
+"""
+
+import random
+import time
+
+import redis.asyncio as aioredis
+import structlog
+
+from app.config import settings
+from app.domain.exceptions import CircuitOpenError
+
+logger = structlog.get_logger()
+
+BREAKER_KEY_PREFIX = f"{settings.redis_key_prefix}breaker:"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        pool: aioredis.Redis,
+        name: str,
+        failure_threshold: int = 3,
+        base_backoff: float = 10.0,
+        max_backoff: float = 300.0,
+        probe_timeout: float = 15.0,
+    ) -> None:
+        self._pool = pool
+        self.name = name
+        self._key = f"{BREAKER_KEY_PREFIX}{name}"
+        self._failure_threshold = failure_threshold
+        self._base_backoff = base_backoff
+        self._max_backoff = max_backoff
+        self._probe_timeout = probe_timeout
+
+    async def _read(self) -> dict[str, str]:
+        raw = await self._pool.hgetall(self._key)
+        return {k.decode(): v.decode() for k, v in raw.items()}
+
+    def backoff(self, opens: int) -> float:
+        """Cool-down after the ``opens``-th consecutive opening, with jitter."""
+        ceiling = min(self._max_backoff, self._base_backoff * 2 ** (opens - 1))
+        return ceiling * random.uniform(0.5, 1.0)
+
+    async def allow(self) -> None:
+        """Return if a call may proceed; raise ``CircuitOpenError`` otherwise."""
+        try:
+            state = await self._read()
+            current = state.get("state", CLOSED)
+            if current == CLOSED:
+                return
+            remaining = float(state.get("open_until", 0)) - time.time()
+            if current == OPEN and remaining > 0:
+                raise CircuitOpenError(self.name, remaining)
+            # Cool-down over: one caller across all workers probes the upstream.
+            probe = await self._pool.set(
+                f"{self._key}:probe", 1, nx=True, px=int(self._probe_timeout * 1000)
+            )
+        except CircuitOpenError:
+            raise
+        except Exception:
+            logger.warning("circuit_breaker_unavailable", breaker=self.name, exc_info=True)
+            return
+        if not probe:
+            raise CircuitOpenError(self.name, self._probe_timeout)
+        if current != HALF_OPEN:
+            await self._transition(current, HALF_OPEN, {"state": HALF_OPEN})
+
+    async def record_success(self) -> None:
+        try:
+            async with self._pool.pipeline(transaction=True) as pipe:
+                pipe.hget(self._key, "state")
+                pipe.hset(self._key, "failures", 0)
+                current, _ = await pipe.execute()
+            if current is not None and current.decode() != CLOSED:
+                await self._transition(
+                    current.decode(), CLOSED, {"state": CLOSED, "opens": 0, "open_until": 0}
+                )
+        except Exception:
+            logger.warning("circuit_breaker_unavailable", breaker=self.name, exc_info=True)
+
+    async def record_failure(self) -> None:
+        try:
+            async with self._pool.pipeline(transaction=True) as pipe:
+                pipe.hincrby(self._key, "failures", 1)
+                pipe.hget(self._key, "state")
+                pipe.hget(self._key, "opens")
+                failures, current, opens = await pipe.execute()
+            current = current.decode() if current is not None else CLOSED
+            if current == HALF_OPEN or (current == CLOSED and failures >= self._failure_threshold):
+                opens = int(opens or 0) + 1
+                backoff = self.backoff(opens)
+                await self._transition(
+                    current,
+                    OPEN,
+                    {"state": OPEN, "opens": opens, "open_until": time.time() + backoff},
+                    backoff=round(backoff, 1),
+                )
+        except Exception:
+            logger.warning("circuit_breaker_unavailable", breaker=self.name, exc_info=True)
+
+    async def _transition(self, old: str, new: str, fields: dict, **log) -> None:
+        async with self._pool.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key, mapping=fields)
+            pipe.hincrby(self._key, f"transitions:{new}", 1)
+            if new != HALF_OPEN:
+                pipe.delete(f"{self._key}:probe")
+            await pipe.execute()
+        logger.warning("circuit_breaker_transition", breaker=self.name, old=old, new=new, **log)
+
+    async def stats(self) -> dict:
+        try:
+            state = await self._read()
+        except Exception:
+            return {}
+        return {
+            "state": state.get("state", CLOSED),
+            "failures": int(state.get("failures", 0)),
+            "open_until": float(state.get("open_until", 0)) or None,
+            "transitions": {
+                k.removeprefix("transitions:"): int(v)
+                for k, v in state.items()
+                if k.startswith("transitions:")
+            },
+        }
+
+
+def five_t_breaker(pool: aioredis.Redis) -> CircuitBreaker:
+    """The breaker guarding the 5T parking feed, shared by request paths and the ingest job."""
+    return CircuitBreaker(
+        pool,
+        "five_t",
+        failure_threshold=settings.breaker_failure_threshold,
+        base_backoff=settings.breaker_base_backoff_seconds,
+        max_backoff=settings.breaker_max_backoff_seconds,
+        probe_timeout=settings.five_t_timeout + 5,
+    )
@@ -4,6 +4,8 @@ Defines the persistent representation of parking master data,
 static detail (GTT enrichment), time-series availability snapshots,
 and API key management.
 Uses PostGIS geography types for spatial indexing of parking locations.
+Snapshots are range-partitioned by day (see ``app.infrastructure.partitions``)
+and rolled up per hour and per day for long-range history.
 """
 
 from datetime import datetime
@@ -20,10 +22,12 @@ from sqlalchemy import (
     Numeric,
     String,
     Text,
+    event,
     func,
 )
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.schema import DDL
 
 
 class Base(DeclarativeBase):
@@ -72,8 +76,9 @@ class ParkingDetailEntity(Base):
     payment_methods: Mapped[list[str] | None] = mapped_column(ARRAY(String(50)), nullable=True)
     cameras: Mapped[int | None] = mapped_column(Integer, nullable=True)
     notes: Mapped[str] = mapped_column(Text, nullable=False, server_default="")
+    # Also bumped by a trigger on raw-SQL updates; the detail caches probe it.
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, server_default=func.now()
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
     )
 
     parking: Mapped["ParkingEntity"] = relationship(back_populates="detail")
@@ -82,6 +87,7 @@ class ParkingDetailEntity(Base):
 class ParkingSnapshot(Base):
     __tablename__ = "parking_snapshots"
 
+    # The partition key has to be part of the primary key.
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     parking_id: Mapped[int] = mapped_column(Integer, ForeignKey("parkings.id"), nullable=False)
     free_spots: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -89,15 +95,57 @@ class ParkingSnapshot(Base):
     status: Mapped[int] = mapped_column(Integer, nullable=False)
     tendence: Mapped[int | None] = mapped_column(Integer, nullable=True)
     recorded_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, server_default=func.now()
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
     )
 
     __table_args__ = (
-        Index("idx_snapshot_parking_time", "parking_id", recorded_at.desc()),
+        # Unique so that replaying a snapshot buffer batch inserts nothing twice.
+        Index("uq_snapshot_parking_time", "parking_id", recorded_at.desc(), unique=True),
         Index("idx_snapshot_recorded_at", recorded_at.desc()),
+        {"postgresql_partition_by": "RANGE (recorded_at)"},
     )
 
 
+# Daily partitions are created by the scheduler; until then rows land here.
+event.listen(
+    ParkingSnapshot.__table__,
+    "after_create",
+    DDL("CREATE TABLE parking_snapshots_default PARTITION OF parking_snapshots DEFAULT"),
+)
+
+
+class _StatsRollup:
+    """Availability of one parking over one bucket, one sample per ingest cycle.
+
+    Sums and counts are stored instead of averages so that samples can be
+    merged in; ``last_sample_at`` lets a replayed flush skip samples already
+    counted.
+    """
+
+    parking_id: Mapped[int] = mapped_column(Integer, ForeignKey("parkings.id"), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    free_samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    free_min: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    free_max: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    free_sum: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    occupancy_samples: Mapped[int] = mapped_column(Integer, nullable=False)
+    occupancy_sum: Mapped[float] = mapped_column(Float, nullable=False)
+    status_open: Mapped[int] = mapped_column(Integer, nullable=False)
+    status_full: Mapped[int] = mapped_column(Integer, nullable=False)
+    status_no_data: Mapped[int] = mapped_column(Integer, nullable=False)
+    status_out_of_service: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_sample_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class ParkingStatsHourly(_StatsRollup, Base):
+    __tablename__ = "parking_stats_hourly"
+
+
+class ParkingStatsDaily(_StatsRollup, Base):
+    __tablename__ = "parking_stats_daily"
+
+
 class ApiKeyEntity(Base):
     __tablename__ = "api_keys"
 
@@ -5,91 +5,364 @@ for historical and spatial queries. All queries use parameterized
 SQLAlchemy statements to prevent injection.
 """
 
+from collections.abc import Mapping
 from datetime import datetime, timedelta, timezone
 
+import orjson
 from geoalchemy2 import Geography
-from sqlalchemy import cast, func, insert, select
+from sqlalchemy import Select, cast, func, or_, select, text
+from sqlalchemy.dialects.postgresql import Insert
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import noload
 
-from app.domain.models import Parking
-from app.infrastructure.db_models import ParkingEntity, ParkingSnapshot
+from app.config import settings
+from app.domain.models import HistoryBucket, Parking, Snapshot
+from app.infrastructure.db_models import (
+    ParkingEntity,
+    ParkingSnapshot,
+    ParkingStatsDaily,
+    ParkingStatsHourly,
+)
+from app.infrastructure.prerender import content_hash
+from app.infrastructure.snapshots import (
+    BUCKET_WIDTHS,
+    STATUS_KEYS,
+    Resolution,
+    bucket_series,
+    bucket_start,
+    fill_gaps,
+)
+
+SNAPSHOT_COLUMNS = ("parking_id", "free_spots", "total_spots", "status", "tendence", "recorded_at")
+SAMPLE_COLUMNS = ("parking_id", "free_spots", "total_spots", "status", "recorded_at")
+
+# Transaction-level advisory lock serializing rollup merges across processes.
+ROLLUP_LOCK_ID = 0x524F4C4C
+
+# Rollup tables by resolution, with the date_trunc unit of their buckets.
+ROLLUPS = {"1h": (ParkingStatsHourly, "hour"), "1d": (ParkingStatsDaily, "day")}
 
 
 class ParkingDBRepository:
     def __init__(self, session: AsyncSession) -> None:
         self._session = session
 
-    async def upsert_parking_metadata(self, parkings: list[Parking]) -> int:
-        for p in parkings:
-            geo = func.ST_SetSRID(func.ST_MakePoint(p.lng, p.lat), 4326)
-            stmt = (
-                pg_insert(ParkingEntity)
-                .values(
-                    id=p.id,
-                    name=p.name,
-                    total_spots=p.total_spots,
-                    lat=p.lat,
-                    lng=p.lng,
-                    location=geo,
-                )
-                .on_conflict_do_update(
-                    index_elements=["id"],
-                    set_={
+    @staticmethod
+    def master_changes(
+        parkings: list[Parking], known: Mapping[int, str]
+    ) -> tuple[list[Parking], dict[int, str]]:
+        """Parkings whose master data hash differs from ``known``, and the hashes of all.
+
+        Master data is the name, capacity and coordinates, which 5T almost
+        never changes; availability is not part of the hash.
+        """
+        hashes = {
+            p.id: content_hash(orjson.dumps([p.name, p.total_spots, p.lat, p.lng]))
+            for p in parkings
+        }
+        return [p for p in parkings if known.get(p.id) != hashes[p.id]], hashes
+
+    @staticmethod
+    def upsert_statement(parkings: list[Parking]) -> Insert:
+        """One batched upsert of master data, geography included.
+
+        Conflicting rows whose values already match are left alone, so an
+        unchanged parking costs neither a dead tuple nor WAL.
+        """
+        excluded = pg_insert(ParkingEntity).excluded
+        return (
+            pg_insert(ParkingEntity)
+            .values(
+                [
+                    {
+                        "id": p.id,
                         "name": p.name,
                         "total_spots": p.total_spots,
                         "lat": p.lat,
                         "lng": p.lng,
-                        "location": geo,
-                    },
-                )
+                        "location": func.ST_SetSRID(func.ST_MakePoint(p.lng, p.lat), 4326),
+                    }
+                    for p in parkings
+                ]
             )
-            await self._session.execute(stmt)
+            .on_conflict_do_update(
+                index_elements=["id"],
+                set_={
+                    "name": excluded.name,
+                    "total_spots": excluded.total_spots,
+                    "lat": excluded.lat,
+                    "lng": excluded.lng,
+                    "location": excluded.location,
+                },
+                where=or_(
+                    ParkingEntity.name.is_distinct_from(excluded.name),
+                    ParkingEntity.total_spots.is_distinct_from(excluded.total_spots),
+                    ParkingEntity.lat.is_distinct_from(excluded.lat),
+                    ParkingEntity.lng.is_distinct_from(excluded.lng),
+                    ParkingEntity.location.is_(None),
+                ),
+            )
+        )
+
+    async def upsert_parking_metadata(self, parkings: list[Parking]) -> int:
+        """Write the master data of ``parkings`` in one statement; returns the rows sent.
+
+        Callers diff against what they last wrote (``master_changes``) and
+        pass only the parkings that changed.
+        """
+        if not parkings:
+            return 0
+        await self._session.execute(self.upsert_statement(parkings))
         await self._session.flush()
         return len(parkings)
 
-    async def store_snapshots(self, parkings: list[Parking]) -> int:
+    async def copy_snapshots(self, rows: list[dict]) -> int:
+        """Bulk-load snapshot rows with binary COPY, skipping rows already stored.
+
+        Rows go to a session-local staging table first and are moved with
+        ``ON CONFLICT DO NOTHING`` on ``(parking_id, recorded_at)``, so loading
+        the same rows twice is a no-op. Returns the rows inserted; the caller
+        commits.
+        """
+        if not rows:
+            return 0
+        await self._session.execute(
+            text(
+                "CREATE TEMP TABLE IF NOT EXISTS snapshot_staging ("
+                "parking_id integer, free_spots integer, total_spots integer, "
+                "status integer, tendence integer, recorded_at timestamptz"
+                ") ON COMMIT DELETE ROWS"
+            )
+        )
+        connection = await self._session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "snapshot_staging",
+            records=[tuple(row[c] for c in SNAPSHOT_COLUMNS) for row in rows],
+            columns=SNAPSHOT_COLUMNS,
+        )
+        columns = ", ".join(SNAPSHOT_COLUMNS)
+        result = await self._session.execute(
+            text(
+                f"INSERT INTO parking_snapshots ({columns}) "
+                f"SELECT {columns} FROM snapshot_staging "
+                "ON CONFLICT (parking_id, recorded_at) DO NOTHING"
+            )
+        )
+        await self._session.execute(text("TRUNCATE snapshot_staging"))
+        return result.rowcount
+
+    @staticmethod
+    def rollup_statement(table: str, unit: str) -> str:
+        """Merge the staged samples into the *unit* buckets of a rollup *table*.
+
+        Samples not newer than a bucket's ``last_sample_at`` are already
+        counted and skipped, so replaying a flush does not count them twice.
+        The status mix follows ``Parking.status_label``, and occupancy is
+        ``Parking.occupancy_percentage`` before rounding.
+        """
+        bucket = f"date_trunc('{unit}', s.recorded_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'"
+        merged = ", ".join(
+            f"{c} = r.{c} + EXCLUDED.{c}"
+            for c in (
+                "samples",
+                "free_samples",
+                "free_sum",
+                "occupancy_samples",
+                "occupancy_sum",
+                *(f"status_{k}" for k in STATUS_KEYS),
+            )
+        )
+        return (
+            f"WITH fresh AS ("
+            f"SELECT s.*, {bucket} AS bucket, "
+            "CASE WHEN s.free_spots IS NOT NULL AND s.total_spots > 0 THEN "
+            "(1 - LEAST(GREATEST(s.free_spots, 0), s.total_spots)::float8 / s.total_spots) * 100 "
+            "END AS occupancy "
+            "FROM sample_staging s) "
+            f"INSERT INTO {table} AS r (parking_id, bucket, samples, free_samples, free_min, "
+            "free_max, free_sum, occupancy_samples, occupancy_sum, status_open, status_full, "
+            "status_no_data, status_out_of_service, last_sample_at) "
+            "SELECT f.parking_id, f.bucket, count(*), count(f.free_spots), min(f.free_spots), "
+            "max(f.free_spots), COALESCE(sum(f.free_spots), 0), count(f.occupancy), "
+            "COALESCE(sum(f.occupancy), 0), "
+            "count(*) FILTER (WHERE f.status <> 0 AND f.free_spots <> 0), "
+            "count(*) FILTER (WHERE f.status <> 0 AND f.free_spots = 0), "
+            "count(*) FILTER (WHERE f.status <> 0 AND f.free_spots IS NULL), "
+            "count(*) FILTER (WHERE f.status = 0), max(f.recorded_at) "
+            f"FROM fresh f LEFT JOIN {table} e "
+            "ON e.parking_id = f.parking_id AND e.bucket = f.bucket "
+            "WHERE e.last_sample_at IS NULL OR f.recorded_at > e.last_sample_at "
+            "GROUP BY f.parking_id, f.bucket "
+            f"ON CONFLICT (parking_id, bucket) DO UPDATE SET {merged}, "
+            "free_min = LEAST(r.free_min, EXCLUDED.free_min), "
+            "free_max = GREATEST(r.free_max, EXCLUDED.free_max), "
+            "last_sample_at = GREATEST(r.last_sample_at, EXCLUDED.last_sample_at)"
+        )
+
+    async def update_rollups(self, samples: list[dict]) -> None:
+        """Merge per-cycle samples of every parking into the hourly and daily rollups.
+
+        Samples are loaded with binary COPY like snapshots; the caller commits,
+        together with the snapshot rows of the same cycles. The merge holds an
+        advisory lock until then: the ``last_sample_at`` check reads buckets
+        before they are locked, so two overlapping flushes (an old leader
+        still running after losing its lease) would otherwise both count the
+        same samples.
+        """
+        if not samples:
+            return
+        await self._session.execute(
+            text("SELECT pg_advisory_xact_lock(:lock)"), {"lock": ROLLUP_LOCK_ID}
+        )
+        await self._session.execute(
+            text(
+                "CREATE TEMP TABLE IF NOT EXISTS sample_staging ("
+                "parking_id integer, free_spots integer, total_spots integer, "
+                "status integer, recorded_at timestamptz"
+                ") ON COMMIT DELETE ROWS"
+            )
+        )
+        connection = await self._session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "sample_staging",
+            records=[tuple(s[c] for c in SAMPLE_COLUMNS) for s in samples],
+            columns=SAMPLE_COLUMNS,
+        )
+        for entity, unit in ROLLUPS.values():
+            await self._session.execute(text(self.rollup_statement(entity.__tablename__, unit)))
+        await self._session.execute(text("TRUNCATE sample_staging"))
+
+    async def get_history_buckets(
+        self, parking_id: int, hours: int, resolution: Resolution
+    ) -> list[HistoryBucket]:
+        """Aggregated history for the last N hours, newest bucket first.
+
+        Hourly and daily buckets come from the rollup tables; 5-minute buckets
+        are computed from the raw series, which is short at that resolution.
+        Rollups only exist from the upgrade (or a parking's first cycle) on,
+        and their first bucket is partial: the part of the range before their
+        first full bucket is bucketed from the raw series instead.
+        """
+        width = BUCKET_WIDTHS[resolution]
+        if resolution not in ROLLUPS:
+            series = await self.get_history(parking_id, hours)
+            return bucket_series(series, width)
+        entity, _ = ROLLUPS[resolution]
         now = datetime.now(timezone.utc)
-        rows = [
-            {
-                "parking_id": p.id,
-                "free_spots": p.free_spots,
-                "total_spots": p.total_spots,
-                "status": p.status,
-                "tendence": p.tendence,
-                "recorded_at": now,
-            }
-            for p in parkings
-        ]
-        await self._session.execute(insert(ParkingSnapshot), rows)
-        await self._session.commit()
-        return len(rows)
+        since = bucket_start(now - timedelta(hours=hours), width)
+        earliest = (
+            await self._session.execute(
+                select(func.min(entity.bucket)).where(entity.parking_id == parking_id)
+            )
+        ).scalar_one()
+        if earliest is None:
+            rolled_from = now + width
+        elif earliest >= since:
+            rolled_from = earliest + width
+        else:
+            rolled_from = since
+        stmt = (
+            select(entity)
+            .where(entity.parking_id == parking_id, entity.bucket >= rolled_from)
+            .order_by(entity.bucket.desc())
+        )
+        result = await self._session.execute(stmt)
+        buckets = [_bucket_from_rollup(r) for r in result.scalars().all()]
+        if rolled_from > since:
+            series = await self._series(parking_id, since, min(rolled_from, now))
+            raw = [s for s in reversed(series) if s.recorded_at < rolled_from]
+            buckets += bucket_series(raw, width)
+        return buckets
 
-    async def find_nearby(
-        self, lat: float, lng: float, radius_meters: int = 1000, limit: int = 10
-    ) -> list[ParkingEntity]:
-        """Spatial query: parkings within *radius_meters*, with detail joined."""
+    async def list_parkings(self) -> list[ParkingEntity]:
+        """All parkings master data. Detail is not loaded (see ``DetailCache``)."""
+        stmt = select(ParkingEntity).options(noload(ParkingEntity.detail))
+        result = await self._session.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    def nearby_statement(lat: float, lng: float, radius_meters: float, limit: int) -> Select:
+        """The *limit* parkings nearest to a point within *radius_meters*.
+
+        Ordering by the KNN operator (``<->``) lets the GiST index on
+        ``location`` return rows nearest first, so the scan stops after
+        *limit* matches instead of sorting every parking in the radius.
+        """
         point = cast(func.ST_SetSRID(func.ST_MakePoint(lng, lat), 4326), Geography)
-        stmt = (
-            select(ParkingEntity)
-            .options(joinedload(ParkingEntity.detail))
+        return (
+            select(ParkingEntity, func.ST_Distance(ParkingEntity.location, point))
+            .options(noload(ParkingEntity.detail))
             .where(func.ST_DWithin(ParkingEntity.location, point, radius_meters))
+            .order_by(ParkingEntity.location.op("<->")(point))
             .limit(limit)
         )
-        result = await self._session.execute(stmt)
-        return list(result.unique().scalars().all())
 
-    async def get_history(self, parking_id: int, hours: int = 24) -> list[ParkingSnapshot]:
-        """Return snapshots for a parking within the last N hours."""
-        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+    async def find_nearby(
+        self, lat: float, lng: float, radius_meters: float = 1000, limit: int = 10
+    ) -> list[tuple[ParkingEntity, float]]:
+        """Spatial query: ``(parking, distance in meters)`` nearest first, without detail."""
+        result = await self._session.execute(self.nearby_statement(lat, lng, radius_meters, limit))
+        return [(entity, distance) for entity, distance in result.all()]
+
+    async def get_history(self, parking_id: int, hours: int = 24) -> list[Snapshot]:
+        """Return the snapshot series for a parking within the last N hours.
+
+        Rows are stored change-only, so the regular per-cycle series is rebuilt
+        by carrying each row forward. The lookback is widened by one keyframe
+        interval to pick up the row that is still in effect at the cutoff.
+        Both bounds are on ``recorded_at``, so only the daily partitions of the
+        window are scanned.
+        """
+        now = datetime.now(timezone.utc)
+        series = await self._series(parking_id, now - timedelta(hours=hours), now)
+        return series[::-1]
+
+    async def _series(self, parking_id: int, start: datetime, until: datetime) -> list[Snapshot]:
+        """The per-cycle series from *start* to *until*, oldest first."""
+        hold = timedelta(minutes=settings.snapshot_keyframe_minutes)
         stmt = (
             select(ParkingSnapshot)
             .where(
                 ParkingSnapshot.parking_id == parking_id,
-                ParkingSnapshot.recorded_at >= cutoff,
+                ParkingSnapshot.recorded_at >= start - hold,
+                ParkingSnapshot.recorded_at <= until,
             )
-            .order_by(ParkingSnapshot.recorded_at.desc())
+            .order_by(ParkingSnapshot.recorded_at.asc())
         )
         result = await self._session.execute(stmt)
-        return list(result.scalars().all())
+        rows = [
+            Snapshot(
+                parking_id=r.parking_id,
+                free_spots=r.free_spots,
+                total_spots=r.total_spots,
+                status=r.status,
+                tendence=r.tendence,
+                recorded_at=r.recorded_at,
+            )
+            for r in result.scalars().all()
+        ]
+        series = fill_gaps(
+            rows,
+            step=timedelta(seconds=settings.fetch_interval_seconds),
+            max_hold=hold,
+            until=until,
+        )
+        return [s for s in series if s.recorded_at >= start]
+
+
+def _bucket_from_rollup(row: ParkingStatsHourly | ParkingStatsDaily) -> HistoryBucket:
+    return HistoryBucket(
+        parking_id=row.parking_id,
+        bucket=row.bucket,
+        samples=row.samples,
+        free_min=row.free_min,
+        free_avg=round(row.free_sum / row.free_samples, 1) if row.free_samples else None,
+        free_max=row.free_max,
+        occupancy_avg=(
+            round(row.occupancy_sum / row.occupancy_samples, 1) if row.occupancy_samples else None
+        ),
+        status_mix={k: getattr(row, f"status_{k}") for k in STATUS_KEYS},
+    )
@@ -2,7 +2,8 @@
 
 Implements the ParkingRepository protocol by fetching real-time XML data
 from the 5T endpoint, delegating parsing to ParkingXMLParser, and
-returning a list of domain Parking entities.
+returning a list of domain Parking entities. An optional circuit breaker
+makes calls fail fast while 5T is known to be down.
 """
 
 import httpx
@@ -10,26 +11,40 @@ import structlog
 
 from app.domain.exceptions import FiveTApiError
 from app.domain.models import Parking
+from app.infrastructure.circuit_breaker import CircuitBreaker
 from app.infrastructure.parser import ParkingXMLParser
 
 logger = structlog.get_logger()
 
 
 class FiveTClient:
-    def __init__(self, client: httpx.AsyncClient, url: str, timeout: int = 10) -> None:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        timeout: int = 10,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
         self._client = client
         self._url = url
         self._timeout = timeout
+        self._breaker = breaker
         self._parser = ParkingXMLParser()
 
     async def fetch_all(self) -> list[Parking]:
+        if self._breaker is not None:
+            await self._breaker.allow()
         logger.info("five_t_fetch_start", url=self._url)
         try:
             response = await self._client.get(self._url, timeout=self._timeout)
             response.raise_for_status()
         except httpx.HTTPError as e:
+            if self._breaker is not None:
+                await self._breaker.record_failure()
             raise FiveTApiError(f"5T API request failed: {e}") from e
+        if self._breaker is not None:
+            await self._breaker.record_success()
 
-        parkings = self._parser.parse_response(response.text)
+        parkings = self._parser.parse_response(response.content)
         logger.info("five_t_fetch_done", count=len(parkings))
         return parkings
@@ -0,0 +1,103 @@
+"""Per-stage timing of ingest cycles, kept as a ring buffer in Redis.
+
+Each run of ``fetch_parking_data`` fills an ``IngestCycle``: how long every
+stage took (5T fetch, parse, detail load, serialization, Redis publish,
+upsert, snapshot insert), the bytes received, row counts, and how the cycle
+ended. The record is logged as structured fields and pushed to a capped
+Redis list, so the admin endpoint shows the last cycles whichever process
+ran them. A cycle longer than the fetch interval is flagged as an overrun:
+with ``max_instances=1`` the scheduler drops the runs it overlaps.
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from statistics import median
+
+import orjson
+import redis.asyncio as aioredis
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+INGEST_CYCLES_KEY = f"{settings.redis_key_prefix}ingest:cycles"
+
+
+@dataclass
+class IngestCycle:
+    started_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    # Milliseconds per stage, in execution order.
+    stages: dict[str, float] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+    bytes: int = 0
+    outcome: str = "running"
+    duration_ms: float = 0.0
+    overrun: bool = False
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as ``name``; repeated stages add up."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stages[name] = round(self.stages.get(name, 0.0) + elapsed, 2)
+
+    def finish(self, outcome: str, interval: float) -> None:
+        self.outcome = outcome
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 2)
+        self.overrun = self.duration_ms > interval * 1000
+
+    def record(self) -> dict:
+        data = asdict(self)
+        del data["_started"]
+        return data
+
+
+class IngestLog:
+    def __init__(self, pool: aioredis.Redis, kept: int = 100) -> None:
+        self._pool = pool
+        self._kept = kept
+
+    async def add(self, cycle: IngestCycle) -> None:
+        try:
+            async with self._pool.pipeline(transaction=True) as pipe:
+                pipe.lpush(INGEST_CYCLES_KEY, orjson.dumps(cycle.record()))
+                pipe.ltrim(INGEST_CYCLES_KEY, 0, self._kept - 1)
+                await pipe.execute()
+        except Exception:
+            logger.warning("ingest_log_error", exc_info=True)
+
+    async def recent(self, limit: int | None = None) -> list[dict]:
+        """The last cycles, newest first."""
+        end = (limit or self._kept) - 1
+        try:
+            raw = await self._pool.lrange(INGEST_CYCLES_KEY, 0, end)
+        except Exception:
+            return []
+        return [orjson.loads(r) for r in raw]
+
+    async def stats(self, limit: int | None = None) -> dict:
+        cycles = await self.recent(limit)
+        stages: dict[str, list[float]] = {}
+        for c in cycles:
+            for name, ms in c["stages"].items():
+                stages.setdefault(name, []).append(ms)
+        outcomes: dict[str, int] = {}
+        for c in cycles:
+            outcomes[c["outcome"]] = outcomes.get(c["outcome"], 0) + 1
+        return {
+            "cycles": len(cycles),
+            "overruns": sum(c["overrun"] for c in cycles),
+            "outcomes": outcomes,
+            "stages_ms": {
+                name: {"median": round(median(ms), 2), "max": max(ms)}
+                for name, ms in stages.items()
+            },
+            "recent": cycles,
+        }
@@ -0,0 +1,95 @@
+"""Leader election over a Redis lease, with fencing tokens.
+
+Every process competes for one lease key; the holder renews it well
+before it expires, and a crashed holder loses it after ``ttl`` seconds.
+Each time the lease changes hands a counter is incremented and handed to
+the new holder as its fencing token. Writers pass the token along, and
+writes carrying a token older than the current one are rejected, so a
+paused leader that wakes up after losing its lease cannot overwrite its
+successor's data.
+"""
+
+import os
+import secrets
+import socket
+import time
+
+import redis.asyncio as aioredis
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+LEADER_KEY = f"{settings.redis_key_prefix}scheduler:leader"
+LEADER_EPOCH_KEY = f"{settings.redis_key_prefix}scheduler:epoch"
+
+# Renew our lease, or take a free one with a new fencing token; 0 if held by someone else.
+_ACQUIRE_SCRIPT = """
+local holder = redis.call("get", KEYS[1])
+if holder == ARGV[1] then
+    redis.call("pexpire", KEYS[1], ARGV[2])
+    return tonumber(redis.call("get", KEYS[2]) or "0")
+end
+if not holder then
+    redis.call("set", KEYS[1], ARGV[1], "px", ARGV[2])
+    return redis.call("incr", KEYS[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLease:
+    def __init__(self, pool: aioredis.Redis, ttl: float = 30.0) -> None:
+        self._pool = pool
+        self._ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self.token: int | None = None
+        self._valid_until = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether we hold the lease. Assumed lost once it could have expired unrenewed."""
+        return self.token is not None and time.monotonic() < self._valid_until
+
+    async def renew(self) -> bool:
+        """Acquire or renew the lease. Returns whether we hold it."""
+        started = time.monotonic()
+        try:
+            token = await self._pool.eval(
+                _ACQUIRE_SCRIPT, 2, LEADER_KEY, LEADER_EPOCH_KEY, self.holder, int(self._ttl * 1000)
+            )
+        except Exception:
+            logger.warning("leader_lease_unavailable", exc_info=True)
+            return self.is_leader
+        if token:
+            self.token = int(token)
+            self._valid_until = started + self._ttl
+        else:
+            self.token = None
+        return self.is_leader
+
+    async def check(self, token: int | None) -> bool:
+        """Whether ``token`` is still the current fencing token and the lease is ours."""
+        if token is None:
+            return False
+        try:
+            holder, epoch = await self._pool.mget(LEADER_KEY, LEADER_EPOCH_KEY)
+        except Exception:
+            return self.is_leader and token == self.token
+        return holder is not None and holder.decode() == self.holder and int(epoch or 0) == token
+
+    async def release(self) -> None:
+        """Give the lease up so another process can take over immediately."""
+        self.token = None
+        try:
+            await self._pool.eval(_RELEASE_SCRIPT, 1, LEADER_KEY, self.holder)
+        except Exception:
+            logger.warning("leader_lease_release_error", exc_info=True)
@@ -1,48 +1,103 @@
 """XML parser for the 5T Open Data parking feed.
 
-Transforms raw XML responses from the 5T API into domain Parking entities.
-Malformed entries are logged and silently skipped to ensure partial data
-availability even when individual records are corrupt.
+Transforms raw XML responses from the 5T API into domain Parking entities
+in a single streaming pass: a hardened expat SAX reader (defusedxml) emits
+one event per ``PK_data`` element and its attributes are mapped straight to
+a ``Parking`` — no DOM or dict tree is materialised. Malformed entries are
+logged and silently skipped to ensure partial data availability even when
+individual records are corrupt.
 """
 
-import defusedxml.minidom
+from collections.abc import Iterator, Mapping
+from xml.sax.handler import ContentHandler
+
+import defusedxml.expatreader
 import structlog
-import xmltodict
 
 from app.domain.exceptions import FiveTApiError
 from app.domain.models import Parking
 
 logger = structlog.get_logger()
 
+ROOT_TAG = "traffic_data"
+ENTRY_TAG = "PK_data"
+CHUNK_SIZE = 64 * 1024
+
+
+class _PKDataHandler(ContentHandler):
+    """Collects the attributes of every ``PK_data`` directly under the root."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.depth = 0
+        self.root: str | None = None
+        self.entries_seen = 0
+        self.pending: list[Mapping[str, str]] = []
+
+    def startElement(self, name: str, attrs) -> None:  # noqa: N802 (SAX API)
+        if self.depth == 0:
+            self.root = name
+        elif self.depth == 1 and name == ENTRY_TAG and self.root == ROOT_TAG:
+            self.entries_seen += 1
+            self.pending.append(dict(attrs))
+        self.depth += 1
+
+    def endElement(self, name: str) -> None:  # noqa: N802 (SAX API)
+        self.depth -= 1
+
 
 class ParkingXMLParser:
     @staticmethod
-    def parse_entry(pk: dict) -> Parking | None:
+    def parse_attributes(attrs: Mapping[str, str]) -> Parking | None:
         try:
             return Parking(
-                id=int(pk["@ID"]),
-                name=pk["@Name"],
-                status=int(pk.get("@status", 0)),
-                total_spots=int(pk.get("@Total", 0)),
-                free_spots=max(0, int(pk["@Free"])) if "@Free" in pk else None,
-                tendence=int(pk["@tendence"]) if "@tendence" in pk else None,
-                lat=float(pk["@lat"]),
-                lng=float(pk["@lng"]),
+                id=int(attrs["ID"]),
+                name=attrs["Name"],
+                status=int(attrs.get("status", 0)),
+                total_spots=int(attrs.get("Total", 0)),
+                free_spots=max(0, int(attrs["Free"])) if "Free" in attrs else None,
+                tendence=int(attrs["tendence"]) if "tendence" in attrs else None,
+                lat=float(attrs["lat"]),
+                lng=float(attrs["lng"]),
             )
         except (KeyError, ValueError, TypeError) as e:
-            logger.warning("parse_parking_failed", error=str(e), parking_id=pk.get("@ID"))
+            logger.warning("parse_parking_failed", error=str(e), parking_id=attrs.get("ID"))
             return None
 
     @classmethod
-    def parse_response(cls, xml_text: str) -> list[Parking]:
+    def parse_entry(cls, pk: dict) -> Parking | None:
+        """Parse an entry keyed xmltodict-style (``@ID``, ``@Name``, ...)."""
+        return cls.parse_attributes({k.removeprefix("@"): v for k, v in pk.items()})
+
+    @classmethod
+    def iter_parkings(cls, xml: bytes | str) -> Iterator[Parking]:
+        """Yield parkings while the payload is being parsed.
+
+        Raises FiveTApiError if the document is malformed, uses forbidden
+        constructs (entities, external references), or is not a 5T feed.
+        """
+        data = xml.encode() if isinstance(xml, str) else xml
+        handler = _PKDataHandler()
+        reader = defusedxml.expatreader.create_parser()
+        reader.setContentHandler(handler)
         try:
-            defusedxml.minidom.parseString(xml_text)  # XXE/DTD/bomb validation
-            data = xmltodict.parse(xml_text)
-            pk_list = data["traffic_data"]["PK_data"]
+            for offset in range(0, len(data), CHUNK_SIZE):
+                reader.feed(data[offset : offset + CHUNK_SIZE])
+                yield from cls._drain(handler)
+            reader.close()
         except Exception as e:
             raise FiveTApiError(f"Unexpected 5T XML format: {e}") from e
+        yield from cls._drain(handler)
+        if handler.root != ROOT_TAG or handler.entries_seen == 0:
+            raise FiveTApiError(f"Unexpected 5T XML format: no {ENTRY_TAG} under {ROOT_TAG}")
 
-        if isinstance(pk_list, dict):
-            pk_list = [pk_list]
+    @classmethod
+    def _drain(cls, handler: _PKDataHandler) -> Iterator[Parking]:
+        pending, handler.pending = handler.pending, []
+        for attrs in pending:
+            if (p := cls.parse_attributes(attrs)) is not None:
+                yield p
 
-        return [p for pk in pk_list if (p := cls.parse_entry(pk)) is not None]
+    @classmethod
+    def parse_response(cls, xml_text: bytes | str) -> list[Parking]:
+        return list(cls.iter_parkings(xml_text))
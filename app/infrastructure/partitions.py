@@ -0,0 +1,110 @@
+"""Daily range partitions of ``parking_snapshots``.
+
+The table is partitioned by ``recorded_at``, one partition per UTC day
+(``parking_snapshots_pYYYYMMDD``), plus a default partition that catches
+rows no daily partition covers yet. Partitions are created a few days
+ahead by a scheduler job, and retention drops whole partitions instead of
+deleting rows, so purging costs neither long locks nor vacuum work.
+History reads bounded on ``recorded_at`` only touch the partitions of
+their window.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SNAPSHOTS_TABLE = "parking_snapshots"
+DEFAULT_PARTITION = f"{SNAPSHOTS_TABLE}_default"
+_PREFIX = f"{SNAPSHOTS_TABLE}_p"
+
+
+def partition_name(day: date) -> str:
+    return f"{_PREFIX}{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> date | None:
+    """The day a daily partition covers, ``None`` for any other table."""
+    if not name.startswith(_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name.removeprefix(_PREFIX), "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def partition_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+async def list_partitions(session: AsyncSession) -> dict[date, str]:
+    """Existing daily partitions by day."""
+    result = await session.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass)"
+        ),
+        {"parent": SNAPSHOTS_TABLE},
+    )
+    partitions = {}
+    for (name,) in result.all():
+        day = partition_day(name)
+        if day is not None:
+            partitions[day] = name
+    return partitions
+
+
+async def create_partition(session: AsyncSession, day: date) -> None:
+    """Create the partition for *day*, moving any rows the default partition holds for it.
+
+    Normally the partition is created ahead and the default partition has
+    nothing to move; the move only happens after the job was down for a
+    while, since Postgres refuses to attach a range the default still holds.
+    """
+    name = partition_name(day)
+    start, end = partition_bounds(day)
+    bounds = {"start": start, "end": end}
+    in_range = "recorded_at >= :start AND recorded_at < :end"
+    await session.execute(text(f"CREATE TABLE {name} (LIKE {SNAPSHOTS_TABLE} INCLUDING DEFAULTS)"))
+    await session.execute(
+        text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds
+    )
+    await session.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+    # Bounds are rendered literally: ATTACH PARTITION takes no parameters.
+    await session.execute(
+        text(
+            f"ALTER TABLE {SNAPSHOTS_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    )
+
+
+async def ensure_partitions(session: AsyncSession, today: date, ahead: int) -> list[str]:
+    """Create the partitions from *today* to *ahead* days later that are missing."""
+    existing = await list_partitions(session)
+    created = []
+    for offset in range(ahead + 1):
+        day = today + timedelta(days=offset)
+        if day not in existing:
+            await create_partition(session, day)
+            created.append(partition_name(day))
+    return created
+
+
+async def drop_partitions_before(session: AsyncSession, cutoff: date) -> list[str]:
+    """Drop every daily partition for a day before *cutoff*.
+
+    Rows older than *cutoff* that ended up in the default partition are
+    deleted; there are none unless partitions were missing when they arrived.
+    """
+    dropped = []
+    for day, name in sorted((await list_partitions(session)).items()):
+        if day < cutoff:
+            await session.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    start, _ = partition_bounds(cutoff)
+    await session.execute(
+        text(f"DELETE FROM {DEFAULT_PARTITION} WHERE recorded_at < :start"), {"start": start}
+    )
+    return dropped
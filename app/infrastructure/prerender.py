@@ -0,0 +1,72 @@
+"""Pre-rendered HTTP bodies for the parking list endpoint.
+
+The ingest job renders the final JSON once per dataset and compresses it
+into identity, gzip and brotli variants keyed by a content hash. Serving
+the unfiltered list then reduces to content negotiation plus a byte copy.
+"""
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+
+import brotli
+
+IDENTITY = "identity"
+GZIP = "gzip"
+BROTLI = "br"
+
+# Server preference when the client accepts several encodings equally.
+ENCODINGS = (BROTLI, GZIP, IDENTITY)
+
+
+@dataclass(frozen=True)
+class RenderedBody:
+    etag: str
+    variants: dict[str, bytes]
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.md5(body, usedforsecurity=False).hexdigest()
+
+
+def render(body: bytes) -> RenderedBody:
+    """Compress a JSON body into every supported encoding."""
+    return RenderedBody(
+        etag=content_hash(body),
+        variants={
+            IDENTITY: body,
+            GZIP: gzip.compress(body, compresslevel=9, mtime=0),
+            BROTLI: brotli.compress(body, mode=brotli.MODE_TEXT, quality=11),
+        },
+    )
+
+
+def negotiate(accept_encoding: str | None) -> str:
+    """Pick the best supported encoding for an Accept-Encoding header."""
+    if not accept_encoding:
+        return IDENTITY
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = IDENTITY, 0.0
+    for coding in ENCODINGS:
+        q = weights.get(coding, wildcard if coding != IDENTITY else 1.0)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def response_headers(etag: str, encoding: str) -> dict[str, str]:
+    headers = {"ETag": f'"{etag}"', "Vary": "Accept-Encoding"}
+    if encoding != IDENTITY:
+        headers["Content-Encoding"] = encoding
+    return headers
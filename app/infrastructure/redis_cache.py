@@ -1,22 +1,47 @@
 """High-performance Redis cache with transparent compression and ETag support.
 
 Uses orjson for serialization and zlib for payload compression above a
-configurable threshold. Provides atomic set-with-ETag operations via
-Redis pipelines for conditional HTTP responses. All operations degrade
-gracefully on connection errors.
+configurable threshold. Datasets are published as immutable,
+content-addressed versions (payload plus pre-rendered bodies) with a
+pointer to the current one, whose version doubles as the ETag of
+conditional HTTP responses. The current version outlives the refresh
+interval (``cache_hard_ttl``) so it can be served as last known good data
+while the source is down. Short-lived locks let one worker refresh a
+dataset while the others wait. All operations degrade gracefully on
+connection errors.
 """
 
-import hashlib
+import secrets
+import time
 
+import orjson
 import redis.asyncio as aioredis
 import structlog
 
 from app.config import settings
+from app.domain.exceptions import StaleLeaderError
+from app.domain.models import ChangeRecord
+from app.infrastructure.changes import decode_record, encode_record
+from app.infrastructure.leader import LEADER_EPOCH_KEY
+from app.infrastructure.prerender import render
 from app.infrastructure.serialization import deserialize, serialize
 
 logger = structlog.get_logger()
 
 PARKINGS_CACHE_KEY = f"{settings.redis_key_prefix}all"
+VERSION_KEY_PREFIX = f"{settings.redis_key_prefix}v:"
+
+# Delete the lock only if it still holds our token (it may have expired and been retaken).
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def version_key(version: str) -> str:
+    return f"{VERSION_KEY_PREFIX}{version}"
 
 
 def create_redis_pool() -> aioredis.Redis:
@@ -59,19 +84,115 @@ class RedisCache:
         except Exception:
             logger.warning("cache_set_error", key=key, exc_info=True)
 
-    async def set_with_etag(self, key: str, value: dict, ttl: int | None = None) -> str:
+    async def publish(
+        self,
+        key: str,
+        value: dict,
+        ttl: int | None = None,
+        prev: str | None = None,
+        changed: tuple[int, ...] = (),
+        fence: int | None = None,
+    ) -> str:
+        """Publish a new version of a dataset in one transaction and return it.
+
+        Writes the immutable ``parking:v:{hash}`` hash (payload and body
+        variants), then moves the ``{key}:etag`` pointer to it and stamps
+        ``{key}:checked`` with the time. The plain ``key`` keeps the current
+        payload for readers unaware of versions, and ``{key}:versions`` lists
+        the last ``cache_versions_kept`` versions, which stay readable for a
+        while after they are superseded. The current version itself lives for
+        ``cache_hard_ttl``. When the caller knows the version it replaces
+        (``prev``) and the IDs that differ from it, a ``ChangeRecord`` is
+        appended to the ``{key}:changes`` log. Every new version is announced
+        on the ``{key}:updates`` pub/sub channel. With a ``fence`` token the
+        transaction only commits while it is the current leader's, and
+        ``StaleLeaderError`` is raised otherwise.
+        """
+        ttl = ttl or self._default_ttl
+        hard_ttl = max(ttl, settings.cache_hard_ttl)
+        kept = settings.cache_versions_kept
         try:
             encoded = self._encode(value)
-            etag = hashlib.md5(encoded, usedforsecurity=False).hexdigest()
-            async with self._pool.pipeline(transaction=True) as pipe:
-                pipe.set(key, encoded, ex=ttl or self._default_ttl)
-                pipe.set(f"{key}:etag", etag, ex=ttl or self._default_ttl)
-                await pipe.execute()
-            return etag
+            rendered = render(orjson.dumps(value))
+            version = rendered.etag
+            vkey = version_key(version)
+            versions_key = f"{key}:versions"
+            etag_key = f"{key}:etag"
+            watched = (etag_key,) if fence is None else (etag_key, LEADER_EPOCH_KEY)
+
+            async def write(pipe) -> None:
+                if fence is not None and int(await pipe.get(LEADER_EPOCH_KEY) or 0) != fence:
+                    raise StaleLeaderError(f"Fencing token {fence} is stale")
+                current = await pipe.get(etag_key)
+                pipe.multi()
+                pipe.hset(vkey, mapping={"data": encoded, **rendered.variants})
+                pipe.expire(vkey, hard_ttl)
+                if current is not None and current.decode() != version:
+                    # Superseded: only needed for a few more cycles.
+                    pipe.expire(version_key(current.decode()), ttl * (kept + 1))
+                pipe.set(key, encoded, ex=hard_ttl)
+                pipe.set(etag_key, version, ex=hard_ttl)
+                pipe.set(f"{key}:checked", time.time(), ex=hard_ttl)
+                pipe.lrem(versions_key, 0, version)
+                pipe.lpush(versions_key, version)
+                pipe.ltrim(versions_key, 0, kept - 1)
+                pipe.expire(versions_key, ttl * (kept + 1))
+                if prev != version:
+                    record = encode_record(
+                        ChangeRecord(version=version, prev=prev or "", ids=changed)
+                    )
+                    if prev is not None:
+                        pipe.lpush(f"{key}:changes", record)
+                        pipe.ltrim(f"{key}:changes", 0, kept - 1)
+                        pipe.expire(f"{key}:changes", ttl * (kept + 1))
+                    pipe.publish(f"{key}:updates", record)
+
+            # The pointer is WATCHed: a publish moving it before EXEC makes the
+            # transaction retry, so the version it leaves is the one shortened.
+            # So is the leader epoch with a fence, and the retry after a leader
+            # change raises StaleLeaderError.
+            await self._pool.transaction(write, *watched)
+            return version
+        except StaleLeaderError:
+            raise
         except Exception:
-            logger.warning("cache_set_etag_error", key=key, exc_info=True)
+            logger.warning("cache_publish_error", key=key, exc_info=True)
             return ""
 
+    async def touch(self, key: str, version: str, ttl: int | None = None) -> bool:
+        """Mark a published version as checked just now and extend its life.
+
+        False if it is no longer current.
+        """
+        ttl = ttl or self._default_ttl
+        hard_ttl = max(ttl, settings.cache_hard_ttl)
+        try:
+            async with self._pool.pipeline(transaction=True) as pipe:
+                pipe.get(f"{key}:etag")
+                pipe.expire(key, hard_ttl)
+                pipe.expire(f"{key}:etag", hard_ttl)
+                pipe.expire(version_key(version), hard_ttl)
+                pipe.expire(f"{key}:versions", ttl * (settings.cache_versions_kept + 1))
+                current, has_payload, _, has_version, _ = await pipe.execute()
+            current_ok = bool(
+                current is not None and current.decode() == version and has_payload and has_version
+            )
+            if current_ok:
+                await self._pool.set(f"{key}:checked", time.time(), ex=hard_ttl)
+            return current_ok
+        except Exception:
+            logger.warning("cache_touch_error", key=key, exc_info=True)
+            return False
+
+    async def get_changes(self, key: str) -> list[ChangeRecord]:
+        """Return the change log of a published dataset, newest first."""
+        try:
+            raw = await self._pool.lrange(f"{key}:changes", 0, -1)
+            return [decode_record(r) for r in raw]
+        except Exception:
+            logger.warning("cache_get_changes_error", key=key, exc_info=True)
+            return []
+
     async def get_etag(self, key: str) -> str | None:
         try:
             etag = await self._pool.get(f"{key}:etag")
@@ -79,11 +200,69 @@ class RedisCache:
         except Exception:
             return None
 
+    async def get_pointer(self, key: str) -> tuple[str | None, float | None]:
+        """Return the current version and when it was last confirmed by the source."""
+        try:
+            version, checked = await self._pool.mget(f"{key}:etag", f"{key}:checked")
+            return (
+                version.decode() if version else None,
+                float(checked) if checked else None,
+            )
+        except Exception:
+            return None, None
+
+    async def get_snapshot(
+        self, key: str
+    ) -> tuple[dict | None, str | None, dict[str, bytes], float | None]:
+        """Read the current version of a dataset with its pre-rendered bodies.
+
+        Versions are immutable, so following the pointer needs no transaction.
+        The last element is when the source last confirmed the version, read
+        with the pointer. A payload stored without a (still live) version is
+        returned with a None version, no bodies and no confirmation time.
+        """
+        try:
+            version, checked = await self._pool.mget(f"{key}:etag", f"{key}:checked")
+            if version is not None:
+                fields = await self._pool.hgetall(version_key(version.decode()))
+                data = fields.pop(b"data", None)
+                if data is not None:
+                    variants = {k.decode(): v for k, v in fields.items()}
+                    confirmed_at = float(checked) if checked else None
+                    return deserialize(data), version.decode(), variants, confirmed_at
+            data = await self._pool.get(key)
+            return (deserialize(data) if data is not None else None), None, {}, None
+        except Exception:
+            logger.warning("cache_get_snapshot_error", key=key, exc_info=True)
+            return None, None, {}, None
+
+    async def acquire_lock(self, key: str, ttl: float) -> str | None:
+        """Take ``{key}:lock`` for ``ttl`` seconds. Returns a release token, or None if held.
+
+        Without Redis every caller gets a token: the lock only coalesces work.
+        """
+        token = secrets.token_hex(8)
+        try:
+            acquired = await self._pool.set(f"{key}:lock", token, nx=True, px=int(ttl * 1000))
+            return token if acquired else None
+        except Exception:
+            logger.warning("cache_lock_error", key=key, exc_info=True)
+            return token
+
+    async def release_lock(self, key: str, token: str) -> None:
+        try:
+            await self._pool.eval(_RELEASE_LOCK_SCRIPT, 1, f"{key}:lock", token)
+        except Exception:
+            logger.warning("cache_unlock_error", key=key, exc_info=True)
+
     async def delete(self, key: str) -> None:
         try:
             async with self._pool.pipeline(transaction=True) as pipe:
                 pipe.delete(key)
                 pipe.delete(f"{key}:etag")
+                pipe.delete(f"{key}:checked")
+                pipe.delete(f"{key}:versions")
+                pipe.delete(f"{key}:changes")
                 await pipe.execute()
         except Exception:
             logger.warning("cache_delete_error", key=key, exc_info=True)
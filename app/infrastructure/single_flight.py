@@ -0,0 +1,34 @@
+"""In-process request coalescing.
+
+Concurrent callers asking for the same key share one in-flight task
+instead of each running the same work: the first caller starts it, the
+others await its result (or its exception). The key is forgotten once
+the task finishes, so the next call after that runs the work again.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` unless a call for ``key`` is already in flight, and return its result."""
+        future = self._inflight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+        # Shielded: a caller that goes away must not cancel the work for the others.
+        return await asyncio.shield(future)
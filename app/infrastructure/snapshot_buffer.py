@@ -0,0 +1,86 @@
+"""Write-behind buffer for availability snapshots, kept in a Redis Stream.
+
+The ingest job appends each cycle's snapshot rows as one stream entry
+instead of inserting them, so its latency no longer depends on Postgres.
+An entry also carries the cycle's samples: the state of every parking,
+stored or not, which feeds the hourly and daily rollups.
+A separate job drains the stream in batches with ``COPY`` (see
+``ParkingDBRepository.copy_snapshots``) and deletes entries only after the
+rows are committed. Rows are unique per ``(parking_id, recorded_at)`` and
+the copy skips rows already stored, so a batch replayed after a crash or an
+outage is harmless. While the database is down the buffer grows, and its
+depth and lag (age of the oldest entry) tell how far behind history is.
+"""
+
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+
+import orjson
+import redis.asyncio as aioredis
+
+from app.config import settings
+
+SNAPSHOT_BUFFER_KEY = f"{settings.redis_key_prefix}snapshots:buffer"
+
+
+def _entry_time(entry_id: bytes) -> float:
+    """Stream IDs start with the millisecond timestamp of the append."""
+    return int(entry_id.split(b"-", 1)[0]) / 1000
+
+
+def _decode_rows(raw: bytes | None) -> list[dict]:
+    rows = orjson.loads(raw) if raw else []
+    for row in rows:
+        row["recorded_at"] = datetime.fromisoformat(row["recorded_at"])
+    return rows
+
+
+@dataclass(frozen=True)
+class BufferedCycle:
+    entry_id: bytes
+    rows: list[dict]
+    samples: list[dict]
+
+
+class SnapshotBuffer:
+    def __init__(self, pool: aioredis.Redis) -> None:
+        self._pool = pool
+
+    async def append(self, rows: list[dict], samples: Sequence[dict] = ()) -> None:
+        """Add one cycle's rows and samples.
+
+        Raises if Redis is unavailable, so nothing is lost silently.
+        """
+        if rows or samples:
+            await self._pool.xadd(
+                SNAPSHOT_BUFFER_KEY,
+                {"rows": orjson.dumps(rows), "samples": orjson.dumps(samples)},
+            )
+
+    async def pending(self, count: int) -> list[BufferedCycle]:
+        """The oldest ``count`` entries."""
+        entries = await self._pool.xrange(SNAPSHOT_BUFFER_KEY, count=count)
+        return [
+            BufferedCycle(
+                entry_id=entry_id,
+                rows=_decode_rows(fields.get(b"rows")),
+                samples=_decode_rows(fields.get(b"samples")),
+            )
+            for entry_id, fields in entries
+        ]
+
+    async def ack(self, entry_ids: list[bytes]) -> None:
+        """Drop entries whose rows are committed."""
+        if entry_ids:
+            await self._pool.xdel(SNAPSHOT_BUFFER_KEY, *entry_ids)
+
+    async def stats(self) -> dict:
+        try:
+            depth = await self._pool.xlen(SNAPSHOT_BUFFER_KEY)
+            oldest = await self._pool.xrange(SNAPSHOT_BUFFER_KEY, count=1)
+        except Exception:
+            return {}
+        lag = time.time() - _entry_time(oldest[0][0]) if oldest else 0.0
+        return {"depth": depth, "lag_seconds": round(lag, 1)}
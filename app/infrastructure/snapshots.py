@@ -0,0 +1,172 @@
+"""Change-only storage of availability snapshots.
+
+A snapshot row is written only when a parking's live fields (``free_spots``,
+``status``, ``tendence``) move, plus a periodic keyframe covering every
+parking. Reads rebuild the regular step series by carrying each stored row
+forward at the ingest cadence, so history consumers still see one point per
+fetch cycle.
+
+Longer ranges are served aggregated: hourly and daily rollups are kept by
+the flush job (one sample per parking and ingest cycle), and 5-minute
+buckets are computed from the rebuilt series.
+"""
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+
+from app.domain.models import HistoryBucket, Parking, Snapshot
+
+Resolution = Literal["raw", "5m", "1h", "1d"]
+
+BUCKET_WIDTHS: dict[str, timedelta] = {
+    "5m": timedelta(minutes=5),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+}
+
+STATUS_KEYS = ("open", "full", "no_data", "out_of_service")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _live_fields(parking: Parking) -> tuple[int | None, int, int | None]:
+    return parking.free_spots, parking.status, parking.tendence
+
+
+@dataclass(frozen=True)
+class SnapshotBatch:
+    parkings: list[Parking]
+    keyframe: bool
+
+
+class SnapshotChangeFilter:
+    """Tracks the last stored state per parking to drop repeated snapshots.
+
+    State lives in process memory: after a restart the first batch is a
+    keyframe, so no change can be lost.
+    """
+
+    def __init__(self, keyframe_interval: timedelta, changes_only: bool = True) -> None:
+        self._keyframe_interval = keyframe_interval
+        self._changes_only = changes_only
+        self._stored: dict[int, Parking] = {}
+        self._last_keyframe: datetime | None = None
+
+    def keyframe_due(self, now: datetime) -> bool:
+        return self._last_keyframe is None or now - self._last_keyframe >= self._keyframe_interval
+
+    def select(self, parkings: list[Parking], now: datetime) -> SnapshotBatch:
+        """Return the parkings that need a row at *now*."""
+        if not self._changes_only or self.keyframe_due(now):
+            return SnapshotBatch(parkings=list(parkings), keyframe=True)
+        changed = [
+            p
+            for p in parkings
+            if (last := self._stored.get(p.id)) is None or _live_fields(last) != _live_fields(p)
+        ]
+        return SnapshotBatch(parkings=changed, keyframe=False)
+
+    def keyframe(self) -> SnapshotBatch:
+        """Repeat the last stored state of every parking (used on skipped cycles)."""
+        return SnapshotBatch(parkings=list(self._stored.values()), keyframe=True)
+
+    def mark_stored(self, batch: SnapshotBatch, now: datetime) -> None:
+        """Record *batch* as written. Call only after the rows are committed."""
+        for p in batch.parkings:
+            self._stored[p.id] = p
+        if batch.keyframe:
+            self._last_keyframe = now
+
+
+def fill_gaps(
+    rows: list[Snapshot],
+    *,
+    step: timedelta,
+    max_hold: timedelta,
+    until: datetime,
+) -> list[Snapshot]:
+    """Expand change-only *rows* (ascending) into a regular step series.
+
+    Each row is repeated every *step* until the next stored row, the current
+    time *until*, or *max_hold* after it — whichever comes first. The hold
+    limit is the keyframe interval: a longer silence means ingest was down,
+    and that gap is preserved rather than invented.
+    """
+    series: list[Snapshot] = []
+    for i, row in enumerate(rows):
+        series.append(row)
+        limit = row.recorded_at + max_hold
+        if i + 1 < len(rows):
+            limit = min(limit, rows[i + 1].recorded_at - step / 2)
+        else:
+            limit = min(limit, until)
+        t = row.recorded_at + step
+        while t <= limit:
+            series.append(replace(row, recorded_at=t))
+            t += step
+    return series
+
+
+def pick_resolution(hours: int, step: timedelta, max_points: int) -> Resolution:
+    """The finest resolution that covers *hours* in at most *max_points* points."""
+    span = timedelta(hours=hours)
+    for resolution, width in (("raw", step), *BUCKET_WIDTHS.items()):
+        if span / width <= max_points:
+            return resolution
+    return "1d"
+
+
+def bucket_start(at: datetime, width: timedelta) -> datetime:
+    """Start of the UTC-aligned bucket of *width* containing *at*."""
+    return _EPOCH + (at - _EPOCH) // width * width
+
+
+def status_key(snapshot: Snapshot) -> str:
+    """The ``status_mix`` key of a sample, following ``Parking.status_label``."""
+    if snapshot.status == 0:
+        return "out_of_service"
+    if snapshot.free_spots is None:
+        return "no_data"
+    if snapshot.free_spots == 0:
+        return "full"
+    return "open"
+
+
+def occupancy(snapshot: Snapshot) -> float | None:
+    """Occupied share in percent, as ``Parking.occupancy_percentage`` before rounding."""
+    if snapshot.free_spots is None or snapshot.total_spots <= 0:
+        return None
+    clamped_free = max(0, min(snapshot.free_spots, snapshot.total_spots))
+    return (1 - clamped_free / snapshot.total_spots) * 100
+
+
+def _average(values: list) -> float | None:
+    return round(sum(values) / len(values), 1) if values else None
+
+
+def bucket_series(series: list[Snapshot], width: timedelta) -> list[HistoryBucket]:
+    """Aggregate a per-cycle *series* into UTC-aligned buckets of *width*, in input order."""
+    groups: dict[datetime, list[Snapshot]] = {}
+    for s in series:
+        groups.setdefault(bucket_start(s.recorded_at, width), []).append(s)
+    buckets = []
+    for start, samples in groups.items():
+        free = [s.free_spots for s in samples if s.free_spots is not None]
+        occupied = [o for s in samples if (o := occupancy(s)) is not None]
+        mix = dict.fromkeys(STATUS_KEYS, 0)
+        for s in samples:
+            mix[status_key(s)] += 1
+        buckets.append(
+            HistoryBucket(
+                parking_id=samples[0].parking_id,
+                bucket=start,
+                samples=len(samples),
+                free_min=min(free, default=None),
+                free_avg=_average(free),
+                free_max=max(free, default=None),
+                occupancy_avg=_average(occupied),
+                status_mix=mix,
+            )
+        )
+    return buckets
@@ -0,0 +1,71 @@
+"""In-memory grid index for radius queries over parking locations.
+
+Points are bucketed into square cells of roughly ``cell_meters`` a side,
+using an equirectangular projection around the points' mean latitude. A
+radius query only visits the cells overlapping the query's bounding box
+and then keeps the candidates within the exact haversine distance, so
+results match a PostGIS ``ST_DWithin`` on geography to within the
+spheroid/sphere difference. Longitudes are not wrapped at the antimeridian.
+"""
+
+import math
+from collections.abc import Iterable
+
+EARTH_RADIUS_M = 6_371_008.8
+# Length of one degree of latitude on the mean-radius sphere.
+_M_PER_DEG = math.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in meters between two WGS84 points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    def __init__(self, points: Iterable[tuple[int, float, float]], cell_meters: float = 1000.0):
+        self._points = {pid: (lat, lng) for pid, lat, lng in points}
+        ref_lat = (
+            sum(lat for lat, _ in self._points.values()) / len(self._points) if self._points else 0
+        )
+        self._dlat = cell_meters / _M_PER_DEG
+        self._dlng = cell_meters / (_M_PER_DEG * max(math.cos(math.radians(ref_lat)), 1e-6))
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        for pid, (lat, lng) in self._points.items():
+            self._cells.setdefault(self._cell(lat, lng), []).append(pid)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return math.floor(lat / self._dlat), math.floor(lng / self._dlng)
+
+    def within(self, lat: float, lng: float, radius_meters: float) -> list[tuple[float, int]]:
+        """``(distance, id)`` pairs within ``radius_meters`` of a point, nearest first."""
+        dlat = radius_meters / _M_PER_DEG
+        # Widest longitude span of the box: at the latitude closest to a pole.
+        cos_lat = math.cos(math.radians(min(89.9, abs(lat) + dlat)))
+        dlng = min(180.0, radius_meters / (_M_PER_DEG * cos_lat))
+        row_lo, col_lo = self._cell(lat - dlat, lng - dlng)
+        row_hi, col_hi = self._cell(lat + dlat, lng + dlng)
+        if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > len(self._cells):
+            # A box wider than the occupied cells: scanning those is cheaper.
+            candidates = self._points
+        else:
+            candidates = [
+                pid
+                for row in range(row_lo, row_hi + 1)
+                for col in range(col_lo, col_hi + 1)
+                for pid in self._cells.get((row, col), ())
+            ]
+        hits = []
+        for pid in candidates:
+            plat, plng = self._points[pid]
+            distance = haversine_m(lat, lng, plat, plng)
+            if distance <= radius_meters:
+                hits.append((distance, pid))
+        hits.sort()
+        return hits
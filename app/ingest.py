@@ -0,0 +1,65 @@
+"""Standalone ingest worker: ``python -m app.ingest``.
+
+Runs the scheduler jobs from ``app.scheduler`` in a process of its own,
+so that parsing the 5T feed and pre-rendering the published bodies never
+compete with request handling. API processes started with
+``INGEST_MODE=external`` then only read what this worker publishes to
+Redis and Postgres. Several workers can run side by side: the leader lease
+lets one of them ingest at a time.
+
+The dataset pointer doubles as the readiness handshake: API workers are
+ready (see ``/ready``) once the first version has been published.
+"""
+
+import asyncio
+import signal
+
+import httpx
+import sentry_sdk
+import structlog
+
+from app.config import settings
+from app.infrastructure.database import engine
+from app.infrastructure.redis_cache import create_redis_pool
+from app.logging_config import configure_logging
+from app.scheduler import configure_scheduler, release_leadership, scheduler
+
+logger = structlog.get_logger()
+
+
+async def run() -> None:
+    configure_logging()
+    if settings.sentry_dsn:
+        sentry_sdk.init(dsn=settings.sentry_dsn, environment=settings.environment)
+
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.httpx_max_connections,
+            max_keepalive_connections=settings.httpx_max_keepalive,
+            keepalive_expiry=settings.httpx_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.five_t_timeout, connect=5.0),
+    )
+    redis_pool = create_redis_pool()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    configure_scheduler(http_client, redis_pool)
+    scheduler.start()
+    logger.info("ingest_startup", environment=settings.environment)
+
+    await stop.wait()
+
+    scheduler.shutdown(wait=False)
+    await release_leadership()
+    await http_client.aclose()
+    await redis_pool.close()
+    await engine.dispose()
+    logger.info("ingest_shutdown")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
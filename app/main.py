@@ -3,6 +3,8 @@
 Creates the FastAPI instance with its middleware stack, registers
 route modules, and manages the lifecycle of shared resources
 including the Redis connection pool, HTTP client, and database engine.
+The ingest scheduler runs in-process unless ``INGEST_MODE=external``, in
+which case ``python -m app.ingest`` runs it.
 """
 
 from contextlib import asynccontextmanager
@@ -15,20 +17,24 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
+from app.api.broadcast import UpdateBroadcaster
+from app.api.detail_cache import DetailCache
 from app.api.exception_handlers import register_exception_handlers
+from app.api.live_data import LiveDatasetCache
 from app.api.middleware import (
     AccessLogMiddleware,
     RateLimitMiddleware,
     RequestIDMiddleware,
     SecurityHeadersMiddleware,
 )
+from app.api.nearby_index import NearbyIndex
 from app.api.routes import health, parkings
 from app.api.routes.admin import router as admin_router
 from app.config import settings
 from app.infrastructure.database import engine
 from app.infrastructure.redis_cache import create_redis_pool
 from app.logging_config import configure_logging
-from app.scheduler import configure_scheduler, scheduler
+from app.scheduler import configure_scheduler, release_leadership, scheduler
 
 logger = structlog.get_logger()
 
@@ -49,13 +55,18 @@ async def lifespan(app: FastAPI):
     )
     app.state.redis_pool = create_redis_pool()
 
-    configure_scheduler(app.state.http_client, app.state.redis_pool)
-    scheduler.start()
+    embedded = settings.ingest_mode == "embedded"
+    if embedded:
+        configure_scheduler(app.state.http_client, app.state.redis_pool)
+        scheduler.start()
 
-    logger.info("app_startup", environment=settings.environment)
+    logger.info("app_startup", environment=settings.environment, ingest_mode=settings.ingest_mode)
     yield
 
-    scheduler.shutdown(wait=False)
+    if embedded:
+        scheduler.shutdown(wait=False)
+        await release_leadership()
+    await app.state.broadcaster.close()
     await app.state.http_client.aclose()
     await app.state.redis_pool.close()
     await engine.dispose()
@@ -73,6 +84,23 @@ def create_app() -> FastAPI:
 
     register_exception_handlers(app)
 
+    # Per-worker copy of the live dataset, revalidated against Redis by version
+    app.state.live_data = LiveDatasetCache(
+        revalidate_interval=settings.live_cache_revalidate_seconds
+    )
+    # Per-worker copy of the GTT detail, reloaded when the table changes
+    app.state.detail_cache = DetailCache(probe_interval=settings.detail_cache_probe_seconds)
+    # Per-worker spatial index over master data, answering /nearby without a DB query
+    app.state.nearby_index = NearbyIndex(
+        app.state.detail_cache, refresh_interval=settings.nearby_index_refresh_seconds
+    )
+    # Per-worker fan-out of ingest updates to SSE clients (one pub/sub subscription)
+    app.state.broadcaster = UpdateBroadcaster(
+        app.state.live_data,
+        queue_size=settings.stream_queue_size,
+        heartbeat_interval=settings.stream_heartbeat_seconds,
+    )
+
     # Middleware stack (added last = executed first)
     app.add_middleware(SecurityHeadersMiddleware)
     app.add_middleware(AccessLogMiddleware)
@@ -3,32 +3,116 @@
 Uses APScheduler's AsyncIOScheduler to run periodic jobs inside the
 FastAPI event loop.  Jobs reuse the shared httpx client, Redis pool,
 and async SQLAlchemy session — no synchronous duplicates needed.
+
+Every process runs the scheduler, but only the holder of the Redis
+leader lease (see ``app.infrastructure.leader``) executes the jobs; the
+others keep competing for the lease and take over when it lapses. Ingest
+writes carry the leader's fencing token.
 """
 
-from datetime import datetime, timezone
+import functools
+import hashlib
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 
 import httpx
+import orjson
 import redis.asyncio as aioredis
 import structlog
-from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, JobExecutionEvent
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    JobEvent,
+    JobExecutionEvent,
+)
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy import insert, select, text
-from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from app.api.schemas import ParkingDetailSchema, ParkingSchema
+from app.api.detail_cache import DetailCache
+from app.api.schemas import ParkingListResponse, ParkingSchema
 from app.config import settings
+from app.domain.exceptions import CircuitOpenError, StaleLeaderError
+from app.domain.models import Parking
+from app.infrastructure.changes import changed_ids
+from app.infrastructure.circuit_breaker import CircuitBreaker, five_t_breaker
 from app.infrastructure.database import async_session_factory
-from app.infrastructure.db_models import ParkingDetailEntity, ParkingEntity, ParkingSnapshot
+from app.infrastructure.db_repository import ParkingDBRepository
+from app.infrastructure.ingest_stats import IngestCycle, IngestLog
+from app.infrastructure.leader import LeaderLease
 from app.infrastructure.parser import ParkingXMLParser
-from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY
-from app.infrastructure.serialization import serialize
+from app.infrastructure.partitions import drop_partitions_before, ensure_partitions
+from app.infrastructure.prerender import content_hash
+from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY, RedisCache
+from app.infrastructure.snapshot_buffer import SnapshotBuffer
+from app.infrastructure.snapshots import SnapshotBatch, SnapshotChangeFilter
 
 logger = structlog.get_logger()
 
 scheduler = AsyncIOScheduler(timezone="Europe/Rome")
 
+LEASE_JOB_ID = "renew_leadership"
+FLUSH_JOB_ID = "flush_snapshots"
+# Frequent jobs whose successful runs are not logged.
+_QUIET_JOBS = {LEASE_JOB_ID, FLUSH_JOB_ID}
+
+# Set by configure_scheduler; None when jobs are run directly (tests, scripts).
+_lease: LeaderLease | None = None
+
+
+@dataclass
+class _FeedState:
+    """Validators and fingerprint of the last fully ingested 5T payload, and what it published."""
+
+    etag: str | None = None
+    last_modified: str | None = None
+    fingerprint: str | None = None
+    version: str | None = None
+    parking_hashes: dict[int, str] = field(default_factory=dict)
+    # Master data hashes as last committed to the parkings table.
+    master_hashes: dict[int, str] = field(default_factory=dict)
+    skipped_cycles: int = 0
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def remember(
+        self,
+        response: httpx.Response,
+        fingerprint: str,
+        version: str,
+        parking_hashes: dict[int, str],
+        master_hashes: dict[int, str],
+    ) -> None:
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.fingerprint = fingerprint
+        self.version = version
+        self.parking_hashes = parking_hashes
+        self.master_hashes = master_hashes
+
+
+_feed_state = _FeedState()
+
+_snapshot_filter = SnapshotChangeFilter(
+    keyframe_interval=timedelta(minutes=settings.snapshot_keyframe_minutes),
+    changes_only=settings.snapshot_storage_mode == "changes",
+)
+
+
+# GTT detail, probed every cycle and reloaded only when it changed.
+_details = DetailCache()
+
 
 def _job_listener(event: JobExecutionEvent) -> None:
+    if event.job_id in _QUIET_JOBS and not event.exception:
+        return
     if event.exception:
         logger.error(
             "scheduler_job_error",
@@ -39,98 +123,301 @@ def _job_listener(event: JobExecutionEvent) -> None:
         logger.info("scheduler_job_done", job_id=event.job_id)
 
 
-async def _load_details_map() -> dict[int, dict]:
-    """Load all parking detail rows into a dict keyed by parking_id."""
-    async with async_session_factory() as session:
-        result = await session.execute(select(ParkingDetailEntity))
-        details = result.scalars().all()
-    return {d.parking_id: ParkingDetailSchema.model_validate(d).model_dump() for d in details}
+def _dropped_listener(event: JobEvent) -> None:
+    """Runs skipped because the previous one was still going (or was missed) are alerts."""
+    if event.job_id in _QUIET_JOBS:
+        return
+    logger.error(
+        "scheduler_job_dropped",
+        job_id=event.job_id,
+        reason="max_instances" if event.code == EVENT_JOB_MAX_INSTANCES else "missed",
+    )
+
+
+def _leader_only(job: Callable[..., Awaitable[None]]) -> Callable[..., Awaitable[None]]:
+    """Run ``job`` only in the process holding the leader lease."""
+
+    @functools.wraps(job)
+    async def run(*args, **kwargs) -> None:
+        if _lease is not None and not _lease.is_leader:
+            return
+        await job(*args, **kwargs)
+
+    return run
+
+
+def _fence() -> int | None:
+    return _lease.token if _lease is not None else None
+
+
+async def _check_fence(fence: int | None) -> None:
+    """Refuse to commit for a leader that has been superseded since the job started."""
+    if _lease is not None and not await _lease.check(fence):
+        raise StaleLeaderError(f"Fencing token {fence} is stale")
+
+
+async def renew_leadership() -> None:
+    """Acquire or renew the leader lease; a new leader ingests right away."""
+    if _lease is None:
+        return
+    was_leader = _lease.is_leader
+    is_leader = await _lease.renew()
+    if is_leader and not was_leader:
+        logger.info("scheduler_leader_acquired", holder=_lease.holder, token=_lease.token)
+        job = scheduler.get_job("fetch_parking_data")
+        if job is not None:
+            job.modify(next_run_time=datetime.now(timezone.utc))
+    elif was_leader and not is_leader:
+        logger.warning("scheduler_leader_lost", holder=_lease.holder)
+
+
+async def release_leadership() -> None:
+    """Hand the lease over on shutdown instead of letting it expire."""
+    if _lease is not None and _lease.is_leader:
+        await _lease.release()
+
+
+async def _get_feed(
+    http_client: httpx.AsyncClient,
+    breaker: CircuitBreaker,
+    headers: dict[str, str] | None = None,
+) -> httpx.Response:
+    """GET the 5T feed through the circuit breaker. A 304 counts as a success."""
+    await breaker.allow()
+    try:
+        response = await http_client.get(
+            settings.five_t_api_url, headers=headers, timeout=settings.five_t_timeout
+        )
+        if response.status_code != 304:
+            response.raise_for_status()
+    except httpx.HTTPError:
+        await breaker.record_failure()
+        raise
+    await breaker.record_success()
+    return response
+
+
+def _fingerprint(response: httpx.Response) -> str:
+    return hashlib.sha256(response.content).hexdigest()
+
+
+def _snapshot_rows(parkings: list[Parking], now: datetime) -> list[dict]:
+    return [
+        {
+            "parking_id": p.id,
+            "free_spots": p.free_spots,
+            "total_spots": p.total_spots,
+            "status": p.status,
+            "tendence": p.tendence,
+            "recorded_at": now,
+        }
+        for p in parkings
+    ]
+
+
+async def _buffer_cycle(
+    batch: SnapshotBatch,
+    parkings: list[Parking],
+    now: datetime,
+    fence: int | None,
+    cycle: IngestCycle,
+    buffer: SnapshotBuffer,
+) -> None:
+    """Buffer the cycle's snapshot rows, and every parking as a rollup sample."""
+    cycle.counts["snapshots"] = len(batch.parkings)
+    with cycle.stage("snapshots"):
+        await _check_fence(fence)
+        await buffer.append(_snapshot_rows(batch.parkings, now), _snapshot_rows(parkings, now))
+    _snapshot_filter.mark_stored(batch, now)
+
+
+async def _record_cycle(cycle: IngestCycle, outcome: str, redis_pool: aioredis.Redis) -> None:
+    """Close the cycle, alert on an overrun and append it to the ingest log."""
+    cycle.finish(outcome, settings.fetch_interval_seconds)
+    if cycle.overrun:
+        logger.error(
+            "fetch_parking_data_overrun",
+            duration_ms=cycle.duration_ms,
+            interval_seconds=settings.fetch_interval_seconds,
+            stages=cycle.stages,
+        )
+    await IngestLog(redis_pool, kept=settings.ingest_cycles_kept).add(cycle)
 
 
 async def fetch_parking_data(
     http_client: httpx.AsyncClient,
     redis_pool: aioredis.Redis,
 ) -> None:
-    """Fetch parking data from 5T, store snapshots, merge detail, update cache."""
+    """Fetch parking data from 5T, store snapshots, merge detail, update cache.
+
+    Sends conditional headers and fingerprints the raw body: when 5T has not
+    published anything new, the cached dataset only gets its TTL extended and
+    the parse/serialize/DB work is skipped. Every fully ingested payload is
+    published as a new immutable cache version (see ``RedisCache.publish``).
+    While the 5T circuit breaker is open the cycle is skipped without a call,
+    and the cached dataset keeps being served as last known good data.
+    Master data is only written for parkings whose name, capacity or
+    coordinates changed since the last committed cycle. Snapshots go to the
+    Redis snapshot buffer and reach Postgres through ``flush_snapshots``.
+    Every stage is timed and the cycle recorded (see ``ingest_stats``).
+    """
+    cache = RedisCache(redis_pool, default_ttl=settings.cache_ttl)
+    breaker = five_t_breaker(redis_pool)
+    buffer = SnapshotBuffer(redis_pool)
+    fence = _fence()
+    cycle = IngestCycle()
+    outcome = "error"
     try:
-        response = await http_client.get(settings.five_t_api_url, timeout=settings.five_t_timeout)
-        response.raise_for_status()
-
-        parser = ParkingXMLParser()
-        parkings = parser.parse_response(response.text)
-
-        # Load static detail data from DB (one query, cached per cycle)
-        details_map = await _load_details_map()
-
-        # Build enriched schemas with detail
-        schemas = [ParkingSchema.from_domain(p, detail=details_map.get(p.id)) for p in parkings]
-        cache_data = {
-            "total": len(schemas),
-            "last_update": datetime.now(timezone.utc).isoformat(),
-            "source": "5T Torino Open Data + GTT",
-            "parkings": [s.model_dump(mode="json") for s in schemas],
-        }
+        with cycle.stage("fetch"):
+            response = await _get_feed(http_client, breaker, _feed_state.conditional_headers())
+        not_modified = response.status_code == 304
+        if not_modified:
+            fingerprint = _feed_state.fingerprint
+        else:
+            cycle.bytes = len(response.content)
+            fingerprint = _fingerprint(response)
 
-        serialized = serialize(
-            cache_data,
-            compress=settings.cache_compression,
-            threshold=settings.cache_compression_threshold,
-        )
-        await redis_pool.set(PARKINGS_CACHE_KEY, serialized, ex=settings.cache_ttl)
+        if (
+            fingerprint is not None
+            and fingerprint == _feed_state.fingerprint
+            and _feed_state.version
+            and await cache.touch(PARKINGS_CACHE_KEY, _feed_state.version)
+        ):
+            _feed_state.skipped_cycles += 1
+            now = datetime.now(timezone.utc)
+            # The parkings are as last stored; the periodic keyframe stores them again.
+            current = _snapshot_filter.keyframe()
+            batch = current if _snapshot_filter.keyframe_due(now) else SnapshotBatch([], False)
+            await _buffer_cycle(batch, current.parkings, now, fence, cycle, buffer)
+            outcome = "not_modified" if not_modified else "same_fingerprint"
+            logger.info(
+                "fetch_parking_data_skipped",
+                reason=outcome,
+                skipped_cycles=_feed_state.skipped_cycles,
+                stages=cycle.stages,
+            )
+            return
 
-        # Batch upsert parking master data + store snapshots
-        now = datetime.now(timezone.utc)
-        async with async_session_factory() as session:
-            upsert_rows = [
-                {
-                    "id": p.id,
-                    "name": p.name,
-                    "total_spots": p.total_spots,
-                    "lat": p.lat,
-                    "lng": p.lng,
-                }
-                for p in parkings
-            ]
-            stmt = (
-                pg_insert(ParkingEntity)
-                .values(upsert_rows)
-                .on_conflict_do_update(
-                    index_elements=["id"],
-                    set_={
-                        "name": pg_insert(ParkingEntity).excluded.name,
-                        "total_spots": pg_insert(ParkingEntity).excluded.total_spots,
-                        "lat": pg_insert(ParkingEntity).excluded.lat,
-                        "lng": pg_insert(ParkingEntity).excluded.lng,
-                    },
-                )
+        if not_modified:
+            # The cached dataset expired meanwhile: the body is needed again.
+            with cycle.stage("fetch"):
+                response = await _get_feed(http_client, breaker)
+            cycle.bytes = len(response.content)
+            fingerprint = _fingerprint(response)
+
+        with cycle.stage("parse"):
+            parser = ParkingXMLParser()
+            parkings = parser.parse_response(response.content)
+        cycle.counts["parkings"] = len(parkings)
+
+        # Static detail data: one probe query, reloaded only when the table changed
+        with cycle.stage("details"):
+            try:
+                async with async_session_factory() as session:
+                    await _details.refresh(session)
+            except Exception:
+                # Keep enriching with the detail loaded last: the database may be down.
+                logger.warning("detail_cache_refresh_failed", exc_info=True)
+
+        with cycle.stage("serialize"):
+            listing = ParkingListResponse(
+                total=len(parkings),
+                last_update=datetime.now(timezone.utc),
+                source="5T Torino Open Data + GTT",
+                parkings=[ParkingSchema.from_domain(p) for p in parkings],
             )
-            await session.execute(stmt)
-
-            # Update PostGIS geometry from lat/lng in a single statement
-            await session.execute(
-                text(
-                    "UPDATE parkings SET location = ST_SetSRID(ST_MakePoint(lng, lat), 4326) "
-                    "WHERE location IS DISTINCT FROM ST_SetSRID(ST_MakePoint(lng, lat), 4326)"
-                )
+            # Only the live fields are dumped; the detail comes pre-serialized from the cache.
+            payload = listing.model_dump(mode="json", exclude={"parkings": {"__all__": {"detail"}}})
+            for row in payload["parkings"]:
+                row["detail"] = _details.fragment(row["id"])
+            # Per-parking content hashes: diffed against the previous cycle for the change log.
+            hashes = {row["id"]: content_hash(orjson.dumps(row)) for row in payload["parkings"]}
+        with cycle.stage("publish"):
+            version = await cache.publish(
+                PARKINGS_CACHE_KEY,
+                payload,
+                prev=_feed_state.version,
+                changed=changed_ids(_feed_state.parking_hashes, hashes),
+                fence=fence,
             )
 
-            snapshot_rows = [
-                {
-                    "parking_id": p.id,
-                    "free_spots": p.free_spots,
-                    "total_spots": p.total_spots,
-                    "status": p.status,
-                    "tendence": p.tendence,
-                    "recorded_at": now,
-                }
-                for p in parkings
-            ]
-            await session.execute(insert(ParkingSnapshot), snapshot_rows)
-            await session.commit()
+        # Snapshots go to the write-behind buffer; flush_snapshots copies them to Postgres.
+        now = datetime.now(timezone.utc)
+        batch = _snapshot_filter.select(parkings, now)
+        await _buffer_cycle(batch, parkings, now, fence, cycle, buffer)
+
+        # Master data almost never changes: only parkings whose hash moved are written.
+        with cycle.stage("upsert"):
+            changed, master_hashes = ParkingDBRepository.master_changes(
+                parkings, _feed_state.master_hashes
+            )
+            if changed:
+                async with async_session_factory() as session:
+                    await ParkingDBRepository(session).upsert_parking_metadata(changed)
+                    await _check_fence(fence)
+                    await session.commit()
+        cycle.counts["upserted"] = len(changed)
 
-        logger.info("fetch_parking_data_done", count=len(parkings))
+        _feed_state.remember(response, fingerprint, version, hashes, master_hashes)
+        outcome = "done"
+        logger.info(
+            "fetch_parking_data_done",
+            count=len(parkings),
+            upserted=len(changed),
+            snapshots=len(batch.parkings),
+            skipped_cycles=_feed_state.skipped_cycles,
+            bytes=cycle.bytes,
+            stages=cycle.stages,
+        )
+    except CircuitOpenError as e:
+        outcome = "circuit_open"
+        logger.warning(
+            "fetch_parking_data_skipped", reason="circuit_open", retry_after=round(e.retry_after)
+        )
+    except StaleLeaderError:
+        outcome = "fenced"
+        logger.warning("fetch_parking_data_fenced", token=fence)
     except Exception:
-        logger.error("fetch_parking_data_error", exc_info=True)
+        # The database may have lost rows: write all master data again next time.
+        _feed_state.master_hashes = {}
+        logger.error("fetch_parking_data_error", stages=cycle.stages, exc_info=True)
+    finally:
+        await _record_cycle(cycle, outcome, redis_pool)
+
+
+async def flush_snapshots(redis_pool: aioredis.Redis) -> None:
+    """Copy buffered snapshots to Postgres in batches until the buffer is drained.
+
+    The samples of the same cycles are merged into the hourly and daily
+    rollups in the same transaction. Entries are deleted only once their
+    rows are committed; a batch that fails stays buffered and is replayed on
+    the next run. A superseded leader stops before committing.
+    """
+    buffer = SnapshotBuffer(redis_pool)
+    fence = _fence()
+    entries = rows = 0
+    try:
+        while pending := await buffer.pending(settings.snapshot_flush_batch):
+            async with async_session_factory() as session:
+                repo = ParkingDBRepository(session)
+                rows += await repo.copy_snapshots([r for c in pending for r in c.rows])
+                await repo.update_rollups([s for c in pending for s in c.samples])
+                await _check_fence(fence)
+                await session.commit()
+            await buffer.ack([c.entry_id for c in pending])
+            entries += len(pending)
+            if len(pending) < settings.snapshot_flush_batch:
+                break
+    except StaleLeaderError:
+        logger.warning("flush_snapshots_fenced", token=fence, entries=entries)
+        return
+    except Exception:
+        logger.error(
+            "flush_snapshots_error", entries=entries, **await buffer.stats(), exc_info=True
+        )
+        return
+    if entries:
+        logger.info("flush_snapshots_done", entries=entries, rows=rows)
 
 
 async def log_cache_stats(redis_pool: aioredis.Redis) -> None:
@@ -147,20 +434,29 @@ async def log_cache_stats(redis_pool: aioredis.Redis) -> None:
         logger.error("cache_stats_error", exc_info=True)
 
 
-async def purge_old_snapshots() -> None:
-    """Delete snapshots older than retention period."""
+async def create_snapshot_partitions() -> None:
+    """Create the daily snapshot partitions for the coming days."""
+    today = datetime.now(timezone.utc).date()
     try:
         async with async_session_factory() as session:
-            result = await session.execute(
-                text(
-                    "DELETE FROM parking_snapshots "
-                    "WHERE recorded_at < NOW() - make_interval(days => :days)"
-                ),
-                {"days": settings.snapshot_retention_days},
+            created = await ensure_partitions(
+                session, today, settings.snapshot_partitions_ahead_days
             )
             await session.commit()
-            deleted = result.rowcount
-        logger.info("purge_snapshots_done", deleted=deleted)
+        if created:
+            logger.info("snapshot_partitions_created", partitions=created)
+    except Exception:
+        logger.error("snapshot_partitions_error", exc_info=True)
+
+
+async def purge_old_snapshots() -> None:
+    """Drop the daily snapshot partitions older than the retention period."""
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=settings.snapshot_retention_days)
+    try:
+        async with async_session_factory() as session:
+            dropped = await drop_partitions_before(session, cutoff)
+            await session.commit()
+        logger.info("purge_snapshots_done", dropped=dropped)
     except Exception:
         logger.error("purge_snapshots_error", exc_info=True)
 
@@ -169,13 +465,27 @@ def configure_scheduler(
     http_client: httpx.AsyncClient,
     redis_pool: aioredis.Redis,
 ) -> None:
-    """Register all jobs and the event listener."""
+    """Register all jobs, the leader lease and the event listener."""
+    global _lease
+    _lease = LeaderLease(redis_pool, ttl=settings.leader_lease_seconds)
     scheduler.add_listener(_job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+    scheduler.add_listener(_dropped_listener, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
+
+    # Renew well within the lease so a live leader never loses it.
+    scheduler.add_job(
+        renew_leadership,
+        "interval",
+        seconds=settings.leader_lease_seconds / 3,
+        id=LEASE_JOB_ID,
+        next_run_time=datetime.now(timezone.utc),
+        max_instances=1,
+        replace_existing=True,
+    )
 
     scheduler.add_job(
-        fetch_parking_data,
+        _leader_only(fetch_parking_data),
         "interval",
-        seconds=120,
+        seconds=settings.fetch_interval_seconds,
         args=[http_client, redis_pool],
         id="fetch_parking_data",
         max_instances=1,
@@ -184,7 +494,18 @@ def configure_scheduler(
     )
 
     scheduler.add_job(
-        log_cache_stats,
+        _leader_only(flush_snapshots),
+        "interval",
+        seconds=settings.snapshot_flush_seconds,
+        args=[redis_pool],
+        id=FLUSH_JOB_ID,
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+
+    scheduler.add_job(
+        _leader_only(log_cache_stats),
         "cron",
         minute=0,
         args=[redis_pool],
@@ -194,7 +515,16 @@ def configure_scheduler(
     )
 
     scheduler.add_job(
-        purge_old_snapshots,
+        _leader_only(create_snapshot_partitions),
+        "cron",
+        minute=30,
+        id="create_snapshot_partitions",
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    scheduler.add_job(
+        _leader_only(purge_old_snapshots),
         "cron",
         hour=3,
         minute=0,
@@ -1,5 +1,5 @@
 import { useEffect, useMemo, useState } from "react";
-import type { Parking, Snapshot } from "../types/parking";
+import type { HistoryBucket, Parking } from "../types/parking";
 import { getParkingHistory } from "../services/api";
 import { getStatusColor, getNavigationUrl } from "../utils/parking";
 import {
@@ -7,43 +7,24 @@ import {
   Bus, Train, Roof, Clock, Shield, Camera, Accessibility, Navigation,
 } from "./Icons";
 
-interface HourBucket {
+interface HourBar {
   label: string;
   avgOccupancy: number;
   avgFree: number | null;
-  totalSpots: number;
   timestamp: number;
 }
 
-function aggregateByHour(snapshots: Snapshot[]): HourBucket[] {
-  const buckets = new Map<string, { occupancy: number[]; free: number[]; total: number; ts: number }>();
-
-  for (const s of snapshots) {
-    const d = new Date(s.recorded_at);
-    const key = `${d.getFullYear()}-${d.getMonth()}-${d.getDate()}-${d.getHours()}`;
-
-    if (!buckets.has(key)) {
-      buckets.set(key, { occupancy: [], free: [], total: s.total_spots, ts: d.getTime() });
-    }
-    const b = buckets.get(key)!;
-    if (s.free_spots !== null && s.total_spots > 0) {
-      b.occupancy.push(((s.total_spots - s.free_spots) / s.total_spots) * 100);
-      b.free.push(s.free_spots);
-    }
-  }
-
-  const result: HourBucket[] = [];
-  for (const [, val] of buckets) {
-    if (val.occupancy.length === 0) continue;
-    const avgOcc = val.occupancy.reduce((a, b) => a + b, 0) / val.occupancy.length;
-    const avgFree = val.free.reduce((a, b) => a + b, 0) / val.free.length;
-    const d = new Date(val.ts);
+/** Hourly buckets from the API, oldest first, skipping hours without data. */
+function toHourBars(buckets: HistoryBucket[]): HourBar[] {
+  const result: HourBar[] = [];
+  for (const b of buckets) {
+    if (b.occupancy_avg === null) continue;
+    const d = new Date(b.bucket);
     result.push({
       label: d.toLocaleTimeString("it-IT", { hour: "2-digit", minute: "2-digit" }).replace(/:\d{2}$/, ":00"),
-      avgOccupancy: avgOcc,
-      avgFree: Math.round(avgFree),
-      totalSpots: val.total,
-      timestamp: val.ts,
+      avgOccupancy: b.occupancy_avg,
+      avgFree: b.free_avg === null ? null : Math.round(b.free_avg),
+      timestamp: d.getTime(),
     });
   }
 
@@ -69,7 +50,7 @@ interface Props {
 }
 
 export default function ParkingDetail({ parking, onBack }: Props) {
-  const [snapshots, setSnapshots] = useState<Snapshot[]>([]);
+  const [buckets, setBuckets] = useState<HistoryBucket[]>([]);
   const [loadingHistory, setLoadingHistory] = useState(true);
   const [tooltipIdx, setTooltipIdx] = useState<number | null>(null);
   const color = getStatusColor(parking);
@@ -78,10 +59,10 @@ export default function ParkingDetail({ parking, onBack }: Props) {
   useEffect(() => {
     const controller = new AbortController();
     setLoadingHistory(true);
-    getParkingHistory(parking.id, 6, controller.signal)
-      .then((res) => setSnapshots(res.snapshots))
+    getParkingHistory(parking.id, 6, controller.signal, "1h")
+      .then((res) => setBuckets(res.buckets))
       .catch(() => {
-        if (!controller.signal.aborted) setSnapshots([]);
+        if (!controller.signal.aborted) setBuckets([]);
       })
       .finally(() => {
         if (!controller.signal.aborted) setLoadingHistory(false);
@@ -89,7 +70,7 @@ export default function ParkingDetail({ parking, onBack }: Props) {
     return () => controller.abort();
   }, [parking.id]);
 
-  const hourBuckets = useMemo(() => aggregateByHour(snapshots), [snapshots]);
+  const hourBuckets = useMemo(() => toHourBars(buckets), [buckets]);
 
   const hasRates =
     d &&
@@ -323,11 +304,11 @@ export default function ParkingDetail({ parking, onBack }: Props) {
                 onKeyDown={(e) => { if (e.key === "Enter" || e.key === " ") { e.preventDefault(); setTooltipIdx(tooltipIdx === i ? null : i); } }}
                 role="button"
                 tabIndex={0}
-                aria-label={`${b.label}: ${b.avgFree} posti liberi su ${b.totalSpots}`}
+                aria-label={`${b.label}: ${b.avgFree} posti liberi su ${parking.total_spots}`}
               >
                 {tooltipIdx === i && (
                   <div className="history-tooltip">
-                    {b.label} - {b.avgFree} liberi su {b.totalSpots}
+                    {b.label} - {b.avgFree} liberi su {parking.total_spots}
                   </div>
                 )}
                 <div
@@ -1,4 +1,8 @@
-import type { ParkingListResponse, ParkingHistoryResponse } from "../types/parking";
+import type {
+  ParkingListResponse,
+  ParkingHistoryResponse,
+  HistoryResolution,
+} from "../types/parking";
 
 const API_BASE = import.meta.env.VITE_API_URL || "";
 
@@ -34,9 +38,10 @@ export async function getParkingHistory(
   parkingId: number,
   hours = 24,
   signal?: AbortSignal,
+  resolution: HistoryResolution = "raw",
 ): Promise<ParkingHistoryResponse> {
   return fetchJSON(
-    `${API_BASE}/api/v1/parkings/${parkingId}/history?hours=${hours}`,
+    `${API_BASE}/api/v1/parkings/${parkingId}/history?hours=${hours}&resolution=${resolution}`,
     signal,
   );
 }
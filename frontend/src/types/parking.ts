@@ -31,6 +31,8 @@ export interface Parking {
   is_available: boolean;
   occupancy_percentage: number | null;
   detail: ParkingDetail | null;
+  /** Set only by /parkings/nearby and sort=distance */
+  distance_m?: number;
 }
 
 export interface ParkingListResponse {
@@ -38,6 +40,7 @@ export interface ParkingListResponse {
   last_update: string;
   source: string;
   parkings: Parking[];
+  stale?: boolean;
 }
 
 export interface Snapshot {
@@ -48,9 +51,24 @@ export interface Snapshot {
   recorded_at: string;
 }
 
+export type HistoryResolution = "raw" | "5m" | "1h" | "1d";
+
+export interface HistoryBucket {
+  bucket: string;
+  samples: number;
+  free_min: number | null;
+  free_avg: number | null;
+  free_max: number | null;
+  occupancy_avg: number | null;
+  status_mix: Record<string, number>;
+}
+
 export interface ParkingHistoryResponse {
   parking_id: number;
   hours: number;
+  resolution: HistoryResolution;
   total_snapshots: number;
   snapshots: Snapshot[];
+  /** Filled instead of `snapshots` for any resolution but raw */
+  buckets: HistoryBucket[];
 }
@@ -0,0 +1,219 @@
+"""Benchmark the HTTP middleware stack: requests/s and latency on /api/v1/parkings.
+
+Runs the same workload through two builds of the real ASGI app, driven
+in-process with a fixed number of concurrent clients:
+
+* ``baseline`` - the middleware classes from ``app/api/middleware.py`` at a
+  git revision (by default the last one built on ``BaseHTTPMiddleware``);
+* ``current`` - the middleware in the working tree.
+
+Everything else (routes, GZip/CORS/proxy middleware, Redis rate limiter,
+live dataset) is shared, so the difference is the middleware itself. Log
+output is dropped in both. Needs a local Redis and git.
+
+Usage:
+    python scripts/bench_middleware.py --requests 20000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+MIDDLEWARE = "app/api/middleware.py"
+NAMES = (
+    "RequestIDMiddleware",
+    "AccessLogMiddleware",
+    "RateLimitMiddleware",
+    "SecurityHeadersMiddleware",
+)
+
+
+def git(*args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def baseline_revision() -> str:
+    """The newest revision whose middleware module still uses BaseHTTPMiddleware."""
+    for rev in git("log", "--format=%H", "--", MIDDLEWARE).splitlines():
+        if "BaseHTTPMiddleware" in git("show", f"{rev}:{MIDDLEWARE}"):
+            return rev
+    raise SystemExit("no revision of app/api/middleware.py uses BaseHTTPMiddleware")
+
+
+def load_middleware(rev: str) -> types.ModuleType:
+    module = types.ModuleType(f"middleware_{rev[:8]}")
+    source = git("show", f"{rev}:{MIDDLEWARE}")
+    exec(compile(source, f"{rev[:8]}:{MIDDLEWARE}", "exec"), module.__dict__)
+    return module
+
+
+def build_app(module: types.ModuleType | None):
+    from starlette.middleware import Middleware
+
+    from app.main import create_app
+
+    app = create_app()
+    if module is not None:
+        app.user_middleware = [
+            Middleware(getattr(module, m.cls.__name__), *m.args, **m.kwargs)
+            if m.cls.__name__ in NAMES
+            else m
+            for m in app.user_middleware
+        ]
+    return app
+
+
+def listing(parkings: int) -> dict:
+    return {
+        "total": parkings,
+        "last_update": "2026-01-01T00:00:00+00:00",
+        "source": "bench",
+        "parkings": [
+            {
+                "id": i,
+                "name": f"Parcheggio {i}",
+                "status": 1,
+                "total_spots": 500,
+                "free_spots": 100,
+                "lat": 45.07,
+                "lng": 7.68,
+                "status_label": "aperto",
+                "is_available": True,
+            }
+            for i in range(parkings)
+        ],
+    }
+
+
+async def request(app, path: bytes) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path.decode(),
+        "raw_path": path,
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept-encoding", b"gzip")],
+        "client": ("10.0.0.1", 40000),
+        "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+    status = 0
+    sent = False
+
+    async def receive() -> dict:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return status
+
+
+async def run(app, path: bytes, requests: int, concurrency: int) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            status = await request(app, path)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise RuntimeError(f"unexpected status {status}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    import httpx
+    import structlog
+
+    from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY, RedisCache, create_redis_pool
+
+    def drop(*_):
+        raise structlog.DropEvent
+
+    structlog.configure(processors=[drop])
+    logging.disable(logging.CRITICAL)
+
+    rev = args.baseline or baseline_revision()
+    stacks = {"baseline": build_app(load_middleware(rev)), "current": build_app(None)}
+    pool = create_redis_pool()
+    http_client = httpx.AsyncClient()
+    for app in stacks.values():
+        app.state.redis_pool = pool
+        app.state.http_client = http_client
+    cache = RedisCache(pool, default_ttl=600)
+    await cache.publish(PARKINGS_CACHE_KEY, listing(args.parkings))
+
+    path = args.path.encode()
+    results: dict[str, list[tuple[float, list[float]]]] = {name: [] for name in stacks}
+    for app in stacks.values():
+        await run(app, path, args.warmup, args.concurrency)
+    # Interleave the rounds so drift (Redis, CPU frequency) hits both stacks alike.
+    for _ in range(args.rounds):
+        for name, app in stacks.items():
+            results[name].append(await run(app, path, args.requests, args.concurrency))
+
+    print(f"baseline revision   {rev[:12]}")
+    print(f"{args.rounds} x {args.requests} requests, concurrency {args.concurrency}, {args.path}")
+    print(f"{'stack':10} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, rounds in results.items():
+        rps = statistics.median(len(lat) / elapsed for elapsed, lat in rounds)
+        latencies = sorted(x for _, lat in rounds for x in lat)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        print(f"{name:10} {rps:10.0f} {p50:9.2f} {p99:9.2f}")
+
+    await cache.delete(PARKINGS_CACHE_KEY)
+    await http_client.aclose()
+    await pool.aclose()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--requests", type=int, default=5_000, help="requests per round and stack")
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--warmup", type=int, default=500)
+    ap.add_argument("--path", default="/api/v1/parkings")
+    ap.add_argument("--parkings", type=int, default=40, help="size of the synthetic dataset")
+    ap.add_argument("--baseline", help="git revision for the baseline middleware")
+    ap.add_argument("--redis-url", default="redis://localhost:6379/15")
+    args = ap.parse_args()
+    os.environ.setdefault("REDIS_URL", args.redis_url)
+    os.environ.setdefault("REDIS_MAX_CONNECTIONS", str(2 * args.concurrency))
+    # One client address for every request: keep the limiter checking, never refusing.
+    os.environ.setdefault("RATE_LIMIT_ANONYMOUS", str(10**9))
+    asyncio.run(main(args))
@@ -0,0 +1,94 @@
+"""Benchmark the 5T XML parser: parse time and peak memory.
+
+Compares the single-pass streaming parser with the previous two-pass
+implementation (defusedxml.minidom validation + xmltodict) on a captured
+5T payload and on a synthetic 10k-entry feed. Requires requirements-dev.txt.
+
+Usage:
+    curl -so get_pk.xml https://opendata.5t.torino.it/get_pk
+    python scripts/bench_parser.py --fixture get_pk.xml
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import defusedxml.minidom  # noqa: E402
+import structlog  # noqa: E402
+import xmltodict  # noqa: E402
+
+from app.infrastructure.parser import ParkingXMLParser  # noqa: E402
+
+
+def legacy_parse(xml: bytes) -> list:
+    """The pre-streaming implementation: DOM validation pass + dict tree."""
+    defusedxml.minidom.parseString(xml)
+    pk_list = xmltodict.parse(xml)["traffic_data"]["PK_data"]
+    if isinstance(pk_list, dict):
+        pk_list = [pk_list]
+    return [p for pk in pk_list if (p := ParkingXMLParser.parse_entry(pk)) is not None]
+
+
+def synthetic_feed(entries: int, seed: int = 42) -> bytes:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(entries):
+        total = rng.randint(50, 1500)
+        rows.append(
+            f'<PK_data ID="{i}" Name="Parcheggio {i}" status="{rng.randint(0, 1)}" '
+            f'Total="{total}" Free="{rng.randint(-5, total)}" tendence="{rng.randint(-1, 1)}" '
+            f'lat="{45.0 + rng.random() * 0.1:.6f}" lng="{7.6 + rng.random() * 0.1:.6f}"/>'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<traffic_data xmlns="https://simone.5t.torino.it/ns/traffic_data.xsd">\n'
+        + "\n".join(rows)
+        + "\n</traffic_data>\n"
+    ).encode()
+
+
+def measure(fn: Callable[[bytes], list], payload: bytes, repeat: int) -> tuple[float, float, int]:
+    """Return (median ms, peak KiB, parsed entries)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(payload)
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    fn(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / 1024, len(result)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--fixture", type=Path, help="captured 5T get_pk response")
+    ap.add_argument("--entries", type=int, default=10_000, help="synthetic feed size")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    # Silence per-entry warnings for the negative/invalid values in the feeds.
+    structlog.configure(logger_factory=structlog.ReturnLoggerFactory())
+
+    cases = []
+    if args.fixture:
+        cases.append((f"fixture {args.fixture.name}", args.fixture.read_bytes()))
+    cases.append((f"synthetic {args.entries} entries", synthetic_feed(args.entries)))
+
+    print(f"{'payload':<28} {'parser':<10} {'median ms':>10} {'peak KiB':>10} {'entries':>8}")
+    for label, payload in cases:
+        for name, fn in (("legacy", legacy_parse), ("streaming", ParkingXMLParser.parse_response)):
+            ms, peak, count = measure(fn, payload, args.repeat)
+            print(f"{label:<28} {name:<10} {ms:>10.2f} {peak:>10.0f} {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Benchmark the SSE stream: memory per idle connection and fan-out latency.
+
+Drives the real ASGI app (full middleware stack) in-process with N
+concurrent GET /api/v1/parkings/stream requests, waits until every client
+has its first event, then measures process RSS (and, with --trace, traced
+Python memory) per connection. A new version is then published and the time until all
+clients have received it is reported. Socket buffers and the HTTP server's
+protocol objects are not included (there is no server). Needs a local Redis.
+
+Usage:
+    python scripts/bench_stream.py --clients 10000
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def rss_kib() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def listing(parkings: int, free: int) -> dict:
+    return {
+        "total": parkings,
+        "last_update": "2026-01-01T00:00:00+00:00",
+        "source": "bench",
+        "parkings": [
+            {
+                "id": i,
+                "name": f"Parcheggio {i}",
+                "status": 1,
+                "total_spots": 500,
+                "free_spots": free if i == 0 else 100,
+                "lat": 45.07,
+                "lng": 7.68,
+                "status_label": "aperto",
+                "is_available": True,
+            }
+            for i in range(parkings)
+        ],
+    }
+
+
+class Client:
+    __slots__ = ("status", "events", "first", "second")
+
+    def __init__(self) -> None:
+        self.status = 0
+        self.events = 0
+        self.first = asyncio.Event()
+        self.second = asyncio.Event()
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            if self.status != 200:
+                self.first.set()
+        elif message["type"] == "http.response.body" and message.get("body", b"").startswith(
+            b"id:"
+        ):
+            self.events += 1
+            (self.first if self.events == 1 else self.second).set()
+
+
+async def connect(app, client: Client, n: int, disconnect: asyncio.Event) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/parkings/stream",
+        "raw_path": b"/api/v1/parkings/stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept", b"text/event-stream")],
+        # Distinct addresses keep the per-IP rate limiter out of the way.
+        "client": (f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}", 40000),
+        "server": ("bench", 80),
+    }
+
+    async def receive() -> dict:
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    await app(scope, receive, client.send)
+
+
+async def main(args: argparse.Namespace) -> None:
+    import httpx
+    import structlog
+
+    from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY, RedisCache, create_redis_pool
+    from app.main import create_app
+
+    def drop(*_):
+        raise structlog.DropEvent
+
+    structlog.configure(processors=[drop])
+    logging.disable(logging.CRITICAL)
+    app = create_app()
+    app.state.redis_pool = create_redis_pool()
+    app.state.http_client = httpx.AsyncClient()
+    cache = RedisCache(app.state.redis_pool, default_ttl=600)
+    version = await cache.publish(PARKINGS_CACHE_KEY, listing(args.parkings, free=50))
+
+    disconnect = asyncio.Event()
+    gc.collect()
+    rss_before = rss_kib()
+    if args.trace:
+        tracemalloc.start()
+    traced_before, _ = tracemalloc.get_traced_memory()
+
+    clients = [Client() for _ in range(args.clients)]
+    tasks = []
+    start = time.perf_counter()
+    # Connect in waves, as clients would arrive, instead of one 10k-request burst.
+    for offset in range(0, len(clients), args.batch):
+        wave = list(enumerate(clients))[offset : offset + args.batch]
+        tasks += [asyncio.create_task(connect(app, c, n, disconnect)) for n, c in wave]
+        await asyncio.gather(*(c.first.wait() for _, c in wave))
+        if failed := [c.status for _, c in wave if c.status != 200]:
+            raise SystemExit(f"{len(failed)} streams refused, e.g. HTTP {failed[0]}")
+    connect_s = time.perf_counter() - start
+
+    gc.collect()
+    traced_after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = rss_kib()
+
+    start = time.perf_counter()
+    update = listing(args.parkings, free=49)
+    await cache.publish(PARKINGS_CACHE_KEY, update, prev=version, changed=(0,))
+    await asyncio.gather(*(c.second.wait() for c in clients))
+    fanout_ms = (time.perf_counter() - start) * 1000
+
+    n = args.clients
+    print(f"clients                  {n}")
+    print(f"connect + first event    {connect_s:.2f} s")
+    print(f"RSS per connection       {(rss_after - rss_before) / n:.1f} KiB")
+    if args.trace:
+        print(f"traced per connection    {(traced_after - traced_before) / n / 1024:.1f} KiB")
+    print(f"fan-out of one update    {fanout_ms:.0f} ms")
+    print(f"broadcaster              {app.state.broadcaster.stats()}")
+
+    disconnect.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await app.state.broadcaster.close()
+    await cache.delete(PARKINGS_CACHE_KEY)
+    await app.state.http_client.aclose()
+    await app.state.redis_pool.aclose()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--clients", type=int, default=10_000)
+    ap.add_argument("--batch", type=int, default=250, help="clients connecting at once")
+    ap.add_argument("--parkings", type=int, default=40, help="size of the synthetic dataset")
+    ap.add_argument("--trace", action="store_true", help="also report tracemalloc (slower)")
+    ap.add_argument("--redis-url", default="redis://localhost:6379/15")
+    args = ap.parse_args()
+    os.environ.setdefault("REDIS_URL", args.redis_url)
+    os.environ.setdefault("REDIS_MAX_CONNECTIONS", str(4 * args.batch))
+    asyncio.run(main(args))
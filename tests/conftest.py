@@ -6,11 +6,15 @@ and testcontainers are skipped.
 """
 
 import os
+import time
 from unittest.mock import patch
 
 import pytest
 import pytest_asyncio
 
+# Pure domain module: importing it reads no settings.
+from app.domain.models import ChangeRecord, Parking
+
 # ---------------------------------------------------------------------------
 # Detect CI vs local
 # ---------------------------------------------------------------------------
@@ -168,3 +172,114 @@ async def db_session():
     async with async_session_factory() as session:
         yield session
         await session.rollback()
+
+
+# ---------------------------------------------------------------------------
+# Factories and in-memory doubles
+# ---------------------------------------------------------------------------
+def make_parking(**overrides) -> Parking:
+    """An open 100-spot parking in Turin; the name follows the ID unless given."""
+    values = {
+        "id": 1,
+        "status": 1,
+        "total_spots": 100,
+        "free_spots": 50,
+        "tendence": 0,
+        "lat": 45.07,
+        "lng": 7.68,
+        **overrides,
+    }
+    values.setdefault("name", f"P{values['id']}")
+    return Parking(**values)
+
+
+class FakeCache:
+    """In-memory ``CacheService`` double holding one published dataset.
+
+    Versions are numbered ``v1``, ``v2``... in publish order, and Redis
+    round-trips (pointer and snapshot reads) are counted. ``put`` installs a
+    payload directly; a ``None`` version stands for one written unversioned.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[str, dict] = {}
+        self.data: dict | None = None
+        self.version: str | None = None
+        self.checked_at: float | None = None
+        self.bodies: dict[str, bytes] = {}
+        self.changes: list[ChangeRecord] = []
+        self.lock: str | None = None
+        self.publishes = 0
+        self.pointer_reads = 0
+        self.snapshot_reads = 0
+
+    def put(self, data: dict, version: str | None) -> None:
+        self.data, self.version = data, version
+
+    async def get(self, key: str) -> dict | None:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: dict, ttl: int | None = None) -> None:
+        self.values[key] = value
+
+    async def publish(
+        self,
+        key: str,
+        value: dict,
+        ttl: int | None = None,
+        prev: str | None = None,
+        changed: tuple[int, ...] = (),
+        fence: int | None = None,
+    ) -> str:
+        self.publishes += 1
+        version = f"v{self.publishes}"
+        if prev is not None:
+            self.changes.insert(0, ChangeRecord(version=version, prev=prev, ids=changed))
+        self.put(value, version)
+        self.checked_at = time.time()
+        return version
+
+    async def touch(self, key: str, version: str, ttl: int | None = None) -> bool:
+        if version != self.version:
+            return False
+        self.checked_at = time.time()
+        return True
+
+    async def get_changes(self, key: str) -> list[ChangeRecord]:
+        return list(self.changes)
+
+    async def get_etag(self, key: str) -> str | None:
+        return self.version
+
+    async def get_pointer(self, key: str) -> tuple[str | None, float | None]:
+        self.pointer_reads += 1
+        return self.version, self.checked_at
+
+    async def get_snapshot(
+        self, key: str
+    ) -> tuple[dict | None, str | None, dict[str, bytes], float | None]:
+        self.snapshot_reads += 1
+        return self.data, self.version, self.bodies, self.checked_at
+
+    async def acquire_lock(self, key: str, ttl: float) -> str | None:
+        if self.lock is not None:
+            return None
+        self.lock = "token"
+        return self.lock
+
+    async def release_lock(self, key: str, token: str) -> None:
+        if self.lock == token:
+            self.lock = None
+
+    async def delete(self, key: str) -> None:
+        self.values.pop(key, None)
+        self.data = self.version = self.checked_at = None
+        self.changes.clear()
+
+    async def ping(self) -> bool:
+        return True
+
+
+@pytest.fixture
+def fake_cache() -> FakeCache:
+    return FakeCache()
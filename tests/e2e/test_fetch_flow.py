@@ -8,7 +8,7 @@ import pytest
 import respx
 from httpx import Response
 
-from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY
+from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY, RedisCache
 
 MOCK_5T_XML = """<?xml version="1.0" encoding="UTF-8"?>
 <traffic_data>
@@ -29,7 +29,7 @@ async def test_full_fetch_to_api_flow(client, _create_tables):
     pool = create_redis_pool()
     try:
         # Clear any pre-existing cache
-        await pool.delete(PARKINGS_CACHE_KEY)
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
 
         # Mock the external 5T API
         with respx.mock:
@@ -75,5 +75,281 @@ async def test_full_fetch_to_api_flow(client, _create_tables):
         assert resp_404.status_code == 404
 
     finally:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_cycle_stages_are_recorded(client, _create_tables, monkeypatch):
+    """Each ingest cycle is timed per stage and kept in the ingest log."""
+    import app.scheduler as scheduler_mod
+    from app.config import settings
+    from app.infrastructure.ingest_stats import IngestLog
+    from app.infrastructure.redis_cache import create_redis_pool
+
+    monkeypatch.setattr(scheduler_mod, "_feed_state", scheduler_mod._FeedState())
+    http_client = client._transport.app.state.http_client  # type: ignore[attr-defined]
+    pool = create_redis_pool()
+    try:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        with respx.mock:
+            respx.get(settings.five_t_api_url).mock(return_value=Response(200, text=MOCK_5T_XML))
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+
+        cycle = (await IngestLog(pool).recent(limit=1))[0]
+        assert cycle["outcome"] == "done"
+        assert list(cycle["stages"]) == [
+            "fetch",
+            "parse",
+            "details",
+            "serialize",
+            "publish",
+            "snapshots",
+            "upsert",
+        ]
+        assert cycle["counts"]["parkings"] == 2
+        assert cycle["bytes"] == len(MOCK_5T_XML.encode())
+        assert cycle["overrun"] is False
+
+        resp = await client.get(
+            "/api/v1/admin/ingest",
+            headers={"X-Admin-Key": "test-admin-key-that-is-long-enough-32ch"},
+        )
+        assert resp.status_code == 200
+        assert resp.json()["recent"][0]["outcome"] == "done"
+    finally:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        await pool.close()
+
+
+async def _count_snapshots() -> int:
+    from sqlalchemy import func, select
+
+    from app.infrastructure.database import async_session_factory
+    from app.infrastructure.db_models import ParkingSnapshot
+
+    async with async_session_factory() as session:
+        return (await session.execute(select(func.count(ParkingSnapshot.id)))).scalar_one()
+
+
+async def _count_rollup_samples() -> int:
+    from sqlalchemy import func, select
+
+    from app.infrastructure.database import async_session_factory
+    from app.infrastructure.db_models import ParkingStatsHourly
+
+    async with async_session_factory() as session:
+        stmt = select(func.coalesce(func.sum(ParkingStatsHourly.samples), 0))
+        return (await session.execute(stmt)).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_payload_skips_cycle(client, _create_tables, monkeypatch):
+    """A byte-identical 5T payload only extends the cache TTL."""
+    import app.scheduler as scheduler_mod
+    from app.config import settings
+    from app.infrastructure.redis_cache import create_redis_pool
+
+    monkeypatch.setattr(scheduler_mod, "_feed_state", scheduler_mod._FeedState())
+    http_client = client._transport.app.state.http_client  # type: ignore[attr-defined]
+    pool = create_redis_pool()
+    try:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        with respx.mock:
+            respx.get(settings.five_t_api_url).mock(return_value=Response(200, text=MOCK_5T_XML))
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+            await scheduler_mod.flush_snapshots(pool)
+            snapshots_after_first = await _count_snapshots()
+
+            await pool.expire(PARKINGS_CACHE_KEY, 5)
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+            await scheduler_mod.flush_snapshots(pool)
+
+        assert scheduler_mod._feed_state.skipped_cycles == 1
+        assert await _count_snapshots() == snapshots_after_first
+        assert await pool.ttl(PARKINGS_CACHE_KEY) > 5
+    finally:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_not_modified_response_skips_cycle(client, _create_tables, monkeypatch):
+    """5T answering 304 to the conditional request skips the cycle."""
+    import app.scheduler as scheduler_mod
+    from app.config import settings
+    from app.infrastructure.redis_cache import create_redis_pool
+
+    def _conditional(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return Response(304)
+        return Response(200, text=MOCK_5T_XML, headers={"ETag": '"v1"'})
+
+    monkeypatch.setattr(scheduler_mod, "_feed_state", scheduler_mod._FeedState())
+    http_client = client._transport.app.state.http_client  # type: ignore[attr-defined]
+    pool = create_redis_pool()
+    try:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        with respx.mock:
+            route = respx.get(settings.five_t_api_url).mock(side_effect=_conditional)
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+
+        assert route.call_count == 2
+        assert scheduler_mod._feed_state.skipped_cycles == 1
+
+        # Once the cache is gone a 304 is not enough: the body is re-downloaded.
         await pool.delete(PARKINGS_CACHE_KEY)
+        with respx.mock:
+            route = respx.get(settings.five_t_api_url).mock(side_effect=_conditional)
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+
+        assert route.call_count == 2
+        assert await pool.get(PARKINGS_CACHE_KEY) is not None
+    finally:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_unfiltered_list_served_pre_rendered(client, _create_tables):
+    """The ingest job publishes HTTP-ready bodies the list endpoint streams as-is."""
+    from app.config import settings
+    from app.infrastructure.redis_cache import create_redis_pool
+    from app.scheduler import fetch_parking_data
+
+    pool = create_redis_pool()
+    try:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        with respx.mock:
+            respx.get(settings.five_t_api_url).mock(return_value=Response(200, text=MOCK_5T_XML))
+            await fetch_parking_data(
+                http_client=client._transport.app.state.http_client,  # type: ignore[attr-defined]
+                redis_pool=pool,
+            )
+        etag = (await pool.get(f"{PARKINGS_CACHE_KEY}:etag")).decode()
+
+        for encoding in ("br", "gzip", "identity"):
+            resp = await client.get("/api/v1/parkings", headers={"Accept-Encoding": encoding})
+            assert resp.status_code == 200
+            assert resp.headers["etag"] == f'"{etag}"'
+            assert resp.headers.get("content-encoding", "identity") == encoding
+            assert resp.json()["total"] == 2
+
+        resp_304 = await client.get("/api/v1/parkings", headers={"If-None-Match": f'"{etag}"'})
+        assert resp_304.status_code == 304
+    finally:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_ingest_publishes_immutable_versions(client, _create_tables, monkeypatch):
+    """Each ingested payload becomes a new version; the previous one stays readable."""
+    import app.scheduler as scheduler_mod
+    from app.config import settings
+    from app.infrastructure.redis_cache import create_redis_pool, version_key
+
+    monkeypatch.setattr(scheduler_mod, "_feed_state", scheduler_mod._FeedState())
+    http_client = client._transport.app.state.http_client  # type: ignore[attr-defined]
+    pool = create_redis_pool()
+    try:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        with respx.mock:
+            route = respx.get(settings.five_t_api_url)
+            route.mock(return_value=Response(200, text=MOCK_5T_XML))
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+            first = (await pool.get(f"{PARKINGS_CACHE_KEY}:etag")).decode()
+
+            route.mock(return_value=Response(200, text=MOCK_5T_XML.replace('"123"', '"122"')))
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+            second = (await pool.get(f"{PARKINGS_CACHE_KEY}:etag")).decode()
+
+        assert first != second
+        versions = await pool.lrange(f"{PARKINGS_CACHE_KEY}:versions", 0, -1)
+        assert [v.decode() for v in versions] == [second, first]
+        assert await pool.hexists(version_key(first), "data")
+
+        resp = await client.get("/api/v1/parkings", headers={"If-None-Match": f'"{first}"'})
+        assert resp.status_code == 200
+        assert resp.headers["etag"] == f'"{second}"'
+    finally:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_changes_since_previous_version(client, _create_tables, monkeypatch):
+    """/changes returns only the parkings that moved since the client's version."""
+    import app.scheduler as scheduler_mod
+    from app.config import settings
+    from app.infrastructure.redis_cache import create_redis_pool
+
+    monkeypatch.setattr(scheduler_mod, "_feed_state", scheduler_mod._FeedState())
+    http_client = client._transport.app.state.http_client  # type: ignore[attr-defined]
+    pool = create_redis_pool()
+    try:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        with respx.mock:
+            route = respx.get(settings.five_t_api_url)
+            route.mock(return_value=Response(200, text=MOCK_5T_XML))
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+            first = (await pool.get(f"{PARKINGS_CACHE_KEY}:etag")).decode()
+
+            route.mock(return_value=Response(200, text=MOCK_5T_XML.replace('"80"', '"79"')))
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+            second = (await pool.get(f"{PARKINGS_CACHE_KEY}:etag")).decode()
+
+        resp = await client.get("/api/v1/parkings/changes", params={"since": f'"{first}"'})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["version"] == second
+        assert body["full"] is False
+        assert [(p["id"], p["free_spots"]) for p in body["parkings"]] == [(2, 79)]
+        assert body["removed"] == []
+
+        resp_same = await client.get("/api/v1/parkings/changes", params={"since": second})
+        assert resp_same.json()["parkings"] == []
+
+        resp_old = await client.get("/api/v1/parkings/changes", params={"since": "unknown"})
+        body_old = resp_old.json()
+        assert body_old["full"] is True
+        assert len(body_old["parkings"]) == 2
+    finally:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_replayed_snapshot_batch_is_not_duplicated(client, _create_tables, monkeypatch):
+    """A buffer entry flushed again after a lost ack is neither stored nor counted twice."""
+    import app.scheduler as scheduler_mod
+    from app.config import settings
+    from app.infrastructure.redis_cache import create_redis_pool
+    from app.infrastructure.snapshot_buffer import SnapshotBuffer
+
+    monkeypatch.setattr(scheduler_mod, "_feed_state", scheduler_mod._FeedState())
+    http_client = client._transport.app.state.http_client  # type: ignore[attr-defined]
+    pool = create_redis_pool()
+    buffer = SnapshotBuffer(pool)
+    try:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        await scheduler_mod.flush_snapshots(pool)
+        with respx.mock:
+            respx.get(settings.five_t_api_url).mock(return_value=Response(200, text=MOCK_5T_XML))
+            await scheduler_mod.fetch_parking_data(http_client=http_client, redis_pool=pool)
+
+        [cycle] = await buffer.pending(10)
+        await scheduler_mod.flush_snapshots(pool)
+        stored = await _count_snapshots()
+        counted = await _count_rollup_samples()
+        assert (await buffer.stats())["depth"] == 0
+
+        await buffer.append(cycle.rows, cycle.samples)
+        await scheduler_mod.flush_snapshots(pool)
+        assert await _count_snapshots() == stored
+        assert await _count_rollup_samples() == counted
+        assert (await buffer.stats())["depth"] == 0
+    finally:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
         await pool.close()
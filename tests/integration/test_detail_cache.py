@@ -0,0 +1,84 @@
+"""Integration tests for the in-memory GTT detail cache."""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+
+from app.api.detail_cache import DetailCache
+
+
+@pytest.fixture(autouse=True)
+def _tables(_create_tables):
+    """Ensure tables exist."""
+
+
+@pytest_asyncio.fixture
+async def _seed_detail(db_session):
+    await db_session.execute(
+        text(
+            "INSERT INTO parkings (id, name, total_spots, lat, lng) "
+            "VALUES (951, 'Dettaglio', 100, 45.07, 7.68), (952, 'Nuovo', 50, 45.08, 7.69) "
+            "ON CONFLICT (id) DO NOTHING"
+        )
+    )
+    await db_session.execute(text("DELETE FROM parking_details WHERE parking_id IN (951, 952)"))
+    await db_session.execute(
+        text(
+            "INSERT INTO parking_details (parking_id, address, payment_methods) "
+            "VALUES (951, 'Via Roma 1', ARRAY['contanti'])"
+        )
+    )
+    await db_session.commit()
+    yield
+    await db_session.execute(text("DELETE FROM parking_details WHERE parking_id IN (951, 952)"))
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_loads_detail_and_fragment(db_session, _seed_detail):
+    details = DetailCache()
+    await details.refresh(db_session)
+
+    assert details.get(951).address == "Via Roma 1"
+    assert details.fragment(951)["payment_methods"] == ["contanti"]
+    assert details.get(952) is None
+
+
+@pytest.mark.asyncio
+async def test_unchanged_table_is_not_reloaded(db_session, _seed_detail):
+    details = DetailCache()
+    await details.refresh(db_session)
+    await details.refresh(db_session)
+
+    assert (details.probes, details.reloads) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_reloads_on_update_and_insert(db_session, _seed_detail):
+    details = DetailCache()
+    await details.refresh(db_session)
+
+    await db_session.execute(
+        text(
+            "UPDATE parking_details SET address = 'Via Po 2', "
+            "updated_at = now() + interval '1 second' WHERE parking_id = 951"
+        )
+    )
+    await db_session.commit()
+    await details.refresh(db_session)
+    assert details.get(951).address == "Via Po 2"
+
+    await db_session.execute(text("INSERT INTO parking_details (parking_id) VALUES (952)"))
+    await db_session.commit()
+    await details.refresh(db_session)
+    assert details.get(952) is not None
+    assert details.reloads == 3
+
+
+@pytest.mark.asyncio
+async def test_probes_are_throttled(db_session, _seed_detail):
+    details = DetailCache(probe_interval=3600)
+    await details.refresh(db_session)
+    await details.refresh(db_session)
+
+    assert details.probes == 1
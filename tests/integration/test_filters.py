@@ -75,3 +75,95 @@ async def test_no_filter_returns_all(client, _populate_cache):
     assert resp.status_code == 200
     body = resp.json()
     assert body["total"] == 4
+
+
+@pytest.mark.asyncio
+async def test_sort_by_distance_with_limit(client, _populate_cache):
+    resp = await client.get("/api/v1/parkings?sort=distance&lat=45.10&lng=7.71&limit=2")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [p["name"] for p in body["parkings"]] == ["Chiuso", "Libero"]
+    assert body["parkings"][0]["distance_m"] == 0
+    assert body["total"] == 2
+
+
+@pytest.mark.asyncio
+async def test_closest_with_space(client, _populate_cache):
+    """The "closest five with space" query: filters and distance sort combine."""
+    resp = await client.get("/api/v1/parkings?sort=distance&lat=45.07&lng=7.68&min_spots=1&limit=5")
+    assert [p["name"] for p in resp.json()["parkings"]] == ["Pochi posti", "Libero"]
+
+
+@pytest.mark.asyncio
+async def test_sort_by_free_spots(client, _populate_cache):
+    resp = await client.get("/api/v1/parkings?sort=free_spots")
+    assert resp.status_code == 200
+    free = [p["free_spots"] for p in resp.json()["parkings"]]
+    assert free == sorted(free, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_sort_by_distance_requires_point(client, _populate_cache):
+    resp = await client.get("/api/v1/parkings?sort=distance&lat=45.07")
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_filtered_list_has_own_etag(client, _populate_cache):
+    full = await client.get("/api/v1/parkings")
+    resp = await client.get("/api/v1/parkings?available=true&min_spots=10")
+    assert [p["name"] for p in resp.json()["parkings"]] == ["Libero"]
+    etag = resp.headers["ETag"]
+    assert etag != full.headers["ETag"]
+
+    cached = await client.get(
+        "/api/v1/parkings?min_spots=10&available=true", headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_filter_by_detail_fields(client, _populate_cache):
+    """Without GTT detail rows no lot is covered or accepts Telepass."""
+    resp = await client.get("/api/v1/parkings?payment=telepass")
+    assert resp.json()["total"] == 0
+    resp = await client.get("/api/v1/parkings?covered=false")
+    assert resp.json()["total"] == 4
+
+
+@pytest.mark.asyncio
+async def test_sorted_and_stale_lists_have_own_etag(client, _populate_cache):
+    """Per-request renders never answer 304 to the validator of a different body."""
+    import time
+
+    from app.api.live_data import LiveDatasetCache
+    from app.infrastructure.redis_cache import create_redis_pool
+
+    full = await client.get("/api/v1/parkings")
+    version = full.headers["ETag"]
+
+    by_free = await client.get("/api/v1/parkings?sort=free_spots")
+    assert by_free.headers["ETag"] != version
+    not_modified = await client.get(
+        "/api/v1/parkings?sort=free_spots", headers={"If-None-Match": version}
+    )
+    assert not_modified.status_code == 200
+    assert (
+        await client.get(
+            "/api/v1/parkings?sort=free_spots",
+            headers={"If-None-Match": by_free.headers["ETag"]},
+        )
+    ).status_code == 304
+
+    pool = create_redis_pool()
+    try:
+        await pool.set(f"{PARKINGS_CACHE_KEY}:checked", time.time() - 3600)
+    finally:
+        await pool.close()
+    # A fresh worker copy, as after a restart: it reads the confirmation time with the data.
+    client._transport.app.state.live_data = LiveDatasetCache()  # type: ignore[attr-defined]
+
+    stale = await client.get("/api/v1/parkings", headers={"If-None-Match": version})
+    assert stale.status_code == 200
+    assert stale.json()["stale"] is True
+    assert stale.headers["ETag"] not in (version, by_free.headers["ETag"])
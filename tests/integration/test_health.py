@@ -2,6 +2,8 @@
 
 import pytest
 
+from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY, RedisCache, create_redis_pool
+
 
 @pytest.mark.asyncio
 async def test_health_returns_healthy(client):
@@ -11,3 +13,31 @@ async def test_health_returns_healthy(client):
     assert body["status"] == "healthy"
     assert body["services"]["redis"] == "up"
     assert body["services"]["postgres"] == "up"
+
+
+@pytest.mark.asyncio
+async def test_ready_waits_for_first_dataset(client):
+    pool = create_redis_pool()
+    cache = RedisCache(pool)
+    try:
+        await cache.delete(PARKINGS_CACHE_KEY)
+        resp = await client.get("/ready")
+        assert resp.status_code == 503
+        assert resp.json()["status"] == "waiting"
+
+        await cache.publish(
+            PARKINGS_CACHE_KEY,
+            {
+                "total": 0,
+                "last_update": "2026-01-01T00:00:00+00:00",
+                "source": "test",
+                "parkings": [],
+            },
+        )
+        resp = await client.get("/ready")
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["status"] == "ready"
+        assert body["dataset_version"]
+    finally:
+        await pool.close()
@@ -1,6 +1,6 @@
 """Integration tests for parking history endpoint."""
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import pytest
 import pytest_asyncio
@@ -32,7 +32,7 @@ async def _seed_history(db_session):
             "total_spots": 100,
             "status": 1,
             "tendence": 1,
-            "recorded_at": now.replace(hour=max(0, now.hour - i)),
+            "recorded_at": now - timedelta(hours=i),
         }
         for i in range(5)
     ]
@@ -61,3 +61,158 @@ async def test_history_empty_for_unknown_parking(client):
     body = resp.json()
     assert body["total_snapshots"] == 0
     assert body["snapshots"] == []
+
+
+@pytest.mark.asyncio
+async def test_history_fills_change_only_gaps(client, db_session):
+    """Rows stored only on change are expanded back to one point per cycle."""
+    from app.config import settings
+
+    await db_session.execute(
+        text(
+            "INSERT INTO parkings (id, name, total_spots, lat, lng) "
+            "VALUES (998, 'Gap Parking', 100, 45.07, 7.68) "
+            "ON CONFLICT (id) DO NOTHING"
+        )
+    )
+    step = timedelta(seconds=settings.fetch_interval_seconds)
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "parking_id": 998,
+            "free_spots": free,
+            "total_spots": 100,
+            "status": 1,
+            "tendence": 0,
+            "recorded_at": now - ago * step,
+        }
+        for free, ago in ((30, 10), (20, 4))
+    ]
+    await db_session.execute(insert(ParkingSnapshot), rows)
+    await db_session.commit()
+
+    resp = await client.get("/api/v1/parkings/998/history?hours=1")
+    assert resp.status_code == 200
+    snapshots = resp.json()["snapshots"]
+    assert len(snapshots) == 11
+    assert [s["free_spots"] for s in snapshots] == [20] * 5 + [30] * 6
+
+
+@pytest.mark.asyncio
+async def test_rollups_merge_samples_once(client, db_session):
+    """Samples are merged into hourly and daily buckets; replayed ones are skipped."""
+    from sqlalchemy import func, select
+
+    from app.infrastructure.db_models import ParkingStatsDaily
+    from app.infrastructure.db_repository import ParkingDBRepository
+
+    await db_session.execute(
+        text(
+            "INSERT INTO parkings (id, name, total_spots, lat, lng) "
+            "VALUES (997, 'Rollup Parking', 100, 45.07, 7.68) "
+            "ON CONFLICT (id) DO NOTHING"
+        )
+    )
+    hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    hour -= timedelta(hours=1)
+    # The rollups' first bucket is partial and answered from raw rows (none here).
+    first = {
+        "parking_id": 997,
+        "free_spots": 99,
+        "total_spots": 100,
+        "status": 1,
+        "recorded_at": hour - timedelta(minutes=30),
+    }
+    samples = [
+        {
+            "parking_id": 997,
+            "free_spots": free,
+            "total_spots": 100,
+            "status": 1,
+            "recorded_at": hour + timedelta(minutes=minutes),
+        }
+        for free, minutes in ((40, 0), (20, 2), (0, 4))
+    ]
+    repo = ParkingDBRepository(db_session)
+    await repo.update_rollups([first, *samples[:2]])
+    await db_session.commit()
+    # The first two samples again, as after a lost ack, plus a new one.
+    await repo.update_rollups(samples)
+    await db_session.commit()
+
+    resp = await client.get("/api/v1/parkings/997/history?hours=3&resolution=1h")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["resolution"] == "1h"
+    assert body["snapshots"] == []
+    [bucket] = body["buckets"]
+    assert bucket["samples"] == 3
+    assert (bucket["free_min"], bucket["free_avg"], bucket["free_max"]) == (0, 20.0, 40)
+    assert bucket["occupancy_avg"] == 80.0
+    assert bucket["status_mix"] == {"open": 2, "full": 1, "no_data": 0, "out_of_service": 0}
+
+    daily = select(func.sum(ParkingStatsDaily.samples)).where(ParkingStatsDaily.parking_id == 997)
+    assert (await db_session.execute(daily)).scalar_one() == 4
+
+
+@pytest.mark.asyncio
+async def test_history_resolution_follows_range(client, _seed_history):
+    short = (await client.get("/api/v1/parkings/999/history?hours=24")).json()
+    assert short["resolution"] == "raw"
+
+    medium = (await client.get("/api/v1/parkings/999/history?hours=48")).json()
+    assert medium["resolution"] == "5m"
+    assert medium["buckets"][0]["samples"] >= 1
+
+    # No rollups exist for this parking: the hourly buckets come from raw rows.
+    long = (await client.get("/api/v1/parkings/999/history?hours=720")).json()
+    assert long["resolution"] == "1h"
+    assert sum(b["samples"] for b in long["buckets"]) >= 5
+
+
+@pytest.mark.asyncio
+async def test_overlapping_rollup_merges_count_samples_once(db_session):
+    """A second flush of the same samples waits for the first and then skips them."""
+    import asyncio
+
+    from app.infrastructure.database import async_session_factory
+    from app.infrastructure.db_repository import ParkingDBRepository
+
+    await db_session.execute(
+        text(
+            "INSERT INTO parkings (id, name, total_spots, lat, lng) "
+            "VALUES (996, 'Overlap Parking', 100, 45.07, 7.68) "
+            "ON CONFLICT (id) DO NOTHING"
+        )
+    )
+    await db_session.commit()
+    hour = datetime(2030, 2, 1, 10, tzinfo=timezone.utc)
+    samples = [
+        {
+            "parking_id": 996,
+            "free_spots": 10 + i,
+            "total_spots": 100,
+            "status": 1,
+            "recorded_at": hour + timedelta(minutes=2 * i),
+        }
+        for i in range(3)
+    ]
+
+    async def merge(session) -> None:
+        await ParkingDBRepository(session).update_rollups(samples)
+        await session.commit()
+
+    async with async_session_factory() as first, async_session_factory() as second:
+        await ParkingDBRepository(first).update_rollups(samples)
+        overlapping = asyncio.create_task(merge(second))
+        await asyncio.sleep(0.2)
+        assert not overlapping.done()
+        await first.commit()
+        await overlapping
+
+    total = (
+        await db_session.execute(
+            text("SELECT samples FROM parking_stats_hourly WHERE parking_id = 996")
+        )
+    ).scalar_one()
+    assert total == 3
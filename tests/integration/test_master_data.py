@@ -0,0 +1,47 @@
+"""Integration tests for the diff-based master data upsert."""
+
+import pytest
+from sqlalchemy import text
+
+from app.infrastructure.db_repository import ParkingDBRepository
+from tests.conftest import make_parking
+
+
+@pytest.fixture(autouse=True)
+def _tables(_create_tables):
+    """Ensure tables exist."""
+
+
+async def _row(db_session) -> tuple:
+    return (
+        await db_session.execute(
+            text(
+                "SELECT xmin::text, total_spots, ST_Y(location::geometry) "
+                "FROM parkings WHERE id = 971"
+            )
+        )
+    ).one()
+
+
+@pytest.mark.asyncio
+async def test_upsert_writes_geography_and_skips_identical_rows(db_session):
+    repo = ParkingDBRepository(db_session)
+    await db_session.execute(text("DELETE FROM parkings WHERE id = 971"))
+    await repo.upsert_parking_metadata([make_parking(id=971)])
+    await db_session.commit()
+    xmin, spots, lat = await _row(db_session)
+    assert (spots, lat) == (100, pytest.approx(45.07))
+
+    # Same values: the conflicting row is not rewritten.
+    await repo.upsert_parking_metadata([make_parking(id=971)])
+    await db_session.commit()
+    assert (await _row(db_session))[0] == xmin
+
+    await repo.upsert_parking_metadata([make_parking(id=971, total_spots=120, lat=45.08)])
+    await db_session.commit()
+    new_xmin, spots, lat = await _row(db_session)
+    assert new_xmin != xmin
+    assert (spots, lat) == (120, pytest.approx(45.08))
+
+    await db_session.execute(text("DELETE FROM parkings WHERE id = 971"))
+    await db_session.commit()
@@ -40,6 +40,92 @@ async def test_nearby_returns_close_parkings(client, _seed_parkings):
     assert 903 not in ids
 
 
+@pytest.mark.asyncio
+async def test_nearby_served_from_index_with_live_data(client, _seed_parkings):
+    """With a live dataset, results come from the in-memory index, nearest first."""
+    from app.infrastructure.redis_cache import PARKINGS_CACHE_KEY, RedisCache, create_redis_pool
+
+    pool = create_redis_pool()
+    cache = RedisCache(pool)
+    try:
+        await cache.publish(
+            PARKINGS_CACHE_KEY,
+            {
+                "total": 1,
+                "last_update": "2026-01-01T00:00:00+00:00",
+                "source": "test",
+                "parkings": [
+                    {
+                        "id": 902,
+                        "name": "Vicino",
+                        "status": 1,
+                        "total_spots": 80,
+                        "free_spots": 42,
+                        "lat": 45.0710,
+                        "lng": 7.6875,
+                        "status_label": "aperto",
+                        "is_available": True,
+                    }
+                ],
+            },
+        )
+        resp = await client.get("/api/v1/parkings/nearby?lat=45.0709&lng=7.6874&radius=500")
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["source"].startswith("Spatial index")
+        assert [p["id"] for p in body["parkings"]] == [902, 901]
+        assert body["parkings"][0]["free_spots"] == 42
+        assert 0 < body["parkings"][0]["distance_m"] < body["parkings"][1]["distance_m"]
+        # Known from master data only
+        assert body["parkings"][1]["status_label"] == "nessun dato"
+    finally:
+        await cache.delete(PARKINGS_CACHE_KEY)
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_find_nearby_nearest_first_with_distance(db_session, _seed_parkings):
+    from app.infrastructure.db_repository import ParkingDBRepository
+
+    rows = await ParkingDBRepository(db_session).find_nearby(45.0709, 7.6874, 10_000, limit=2)
+    assert [e.id for e, _ in rows] == [902, 901]
+    assert rows[0][1] < rows[1][1]
+    # ~77 m between Centro and the query point
+    assert rows[1][1] == pytest.approx(77, abs=2)
+
+
+@pytest.mark.asyncio
+async def test_nearby_expand_returns_limit_nearest(client, _seed_parkings):
+    """expand widens the search beyond radius until limit parkings are found."""
+    url = "/api/v1/parkings/nearby?lat=45.0703&lng=7.6869&radius=100&limit=3"
+    assert len((await client.get(url)).json()["parkings"]) < 3
+
+    resp = await client.get(url + "&expand=true")
+    assert resp.status_code == 200
+    parkings = resp.json()["parkings"]
+    assert len(parkings) == 3
+    assert [p["id"] for p in parkings][:2] == [901, 902]
+    distances = [p["distance_m"] for p in parkings]
+    assert distances == sorted(distances)
+
+
+@pytest.mark.asyncio
+async def test_nearby_query_uses_knn_index_scan(db_session, _seed_parkings):
+    """EXPLAIN: rows come nearest first from the GiST index, not a sort."""
+    from sqlalchemy.dialects import postgresql
+
+    from app.infrastructure.db_repository import ParkingDBRepository
+
+    stmt = ParkingDBRepository.nearby_statement(45.0703, 7.6869, 1000, 10)
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    # The seeded table is tiny: rule out the plans a planner prefers for a handful of rows.
+    for setting in ("enable_seqscan", "enable_bitmapscan", "enable_sort"):
+        await db_session.execute(text(f"SET LOCAL {setting} = off"))
+    plan = "\n".join(row[0] for row in await db_session.execute(text("EXPLAIN " + sql)))
+    assert "Index Scan using idx_parkings_location" in plan
+    assert "Order By: (location <-> " in plan.replace("parkings.location", "location")
+
+
 @pytest.mark.asyncio
 async def test_nearby_requires_lat_lng(client):
     resp = await client.get("/api/v1/parkings/nearby")
@@ -116,3 +116,87 @@ async def test_get_single_parking(client):
     finally:
         await pool.delete(PARKINGS_CACHE_KEY)
         await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_repeated_reads_served_from_worker_memory(client):
+    """Versioned data is decoded once per worker and then served from memory."""
+    from app.infrastructure.redis_cache import RedisCache, create_redis_pool
+
+    pool = create_redis_pool()
+    try:
+        cache = RedisCache(pool)
+        await cache.publish(
+            PARKINGS_CACHE_KEY,
+            {
+                "total": 0,
+                "last_update": "2026-01-01T00:00:00+00:00",
+                "source": "test",
+                "parkings": [],
+            },
+        )
+        for _ in range(3):
+            resp = await client.get("/api/v1/parkings")
+            assert resp.status_code == 200
+
+        stats = await client.get(
+            "/api/v1/admin/cache",
+            headers={"X-Admin-Key": "test-admin-key-that-is-long-enough-32ch"},
+        )
+        assert stats.status_code == 200
+        live = stats.json()["live"]
+        assert live["version"] == await cache.get_etag(PARKINGS_CACHE_KEY)
+        assert live["misses"] == 1
+        assert live["hits"] == 2
+    finally:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_single_parking_conditional_get(client):
+    """Each parking carries its own ETag and answers 304 while unchanged."""
+    from app.infrastructure.redis_cache import RedisCache, create_redis_pool
+
+    parking = {
+        "id": 7,
+        "name": "P7",
+        "status": 1,
+        "total_spots": 80,
+        "free_spots": 10,
+        "tendence": 1,
+        "lat": 45.07,
+        "lng": 7.68,
+        "status_label": "aperto",
+        "is_available": True,
+        "occupancy_percentage": 87.5,
+        "detail": None,
+    }
+    pool = create_redis_pool()
+    try:
+        cache = RedisCache(pool)
+        await cache.publish(
+            PARKINGS_CACHE_KEY,
+            {
+                "total": 2,
+                "last_update": "2026-01-01T00:00:00+00:00",
+                "source": "test",
+                "parkings": [parking, {**parking, "id": 8, "name": "P8"}],
+            },
+        )
+        resp = await client.get("/api/v1/parkings/7")
+        assert resp.status_code == 200
+        assert resp.json()["name"] == "P7"
+        etag = resp.headers["etag"]
+        assert etag.strip('"') != await cache.get_etag(PARKINGS_CACHE_KEY)
+
+        resp_304 = await client.get("/api/v1/parkings/7", headers={"If-None-Match": etag})
+        assert resp_304.status_code == 304
+        assert resp_304.headers["etag"] == etag
+
+        resp_other = await client.get("/api/v1/parkings/8", headers={"If-None-Match": etag})
+        assert resp_other.status_code == 200
+        assert resp_other.headers["etag"] != etag
+    finally:
+        await RedisCache(pool).delete(PARKINGS_CACHE_KEY)
+        await pool.close()
@@ -0,0 +1,79 @@
+"""Integration tests for daily snapshot partition creation and retention."""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.infrastructure.partitions import (
+    drop_partitions_before,
+    ensure_partitions,
+    list_partitions,
+    partition_name,
+)
+
+DAY = date(2030, 1, 10)
+
+
+@pytest.fixture(autouse=True)
+def _tables(_create_tables):
+    """Ensure tables exist."""
+
+
+async def _insert(db_session, at: datetime) -> None:
+    await db_session.execute(
+        text(
+            "INSERT INTO parking_snapshots "
+            "(parking_id, free_spots, total_spots, status, tendence, recorded_at) "
+            "VALUES (961, 5, 100, 1, 0, :at)"
+        ),
+        {"at": at},
+    )
+
+
+async def _partition_of(db_session, at: datetime) -> str:
+    return (
+        await db_session.execute(
+            text(
+                "SELECT tableoid::regclass::text FROM parking_snapshots "
+                "WHERE parking_id = 961 AND recorded_at = :at"
+            ),
+            {"at": at},
+        )
+    ).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_partitions_are_created_ahead_and_dropped_whole(db_session):
+    await db_session.execute(
+        text(
+            "INSERT INTO parkings (id, name, total_spots, lat, lng) "
+            "VALUES (961, 'Partitioned', 100, 45.07, 7.68) ON CONFLICT (id) DO NOTHING"
+        )
+    )
+    # A row that arrived before its partition existed sits in the default partition.
+    early = datetime(2030, 1, 11, 9, 0, tzinfo=timezone.utc)
+    await _insert(db_session, early)
+    assert await _partition_of(db_session, early) == "parking_snapshots_default"
+
+    created = await ensure_partitions(db_session, DAY, ahead=2)
+    assert created == [partition_name(DAY + timedelta(days=i)) for i in range(3)]
+    assert await ensure_partitions(db_session, DAY, ahead=2) == []
+    # Creating its day's partition moved the row out of the default partition.
+    assert await _partition_of(db_session, early) == partition_name(date(2030, 1, 11))
+
+    later = datetime(2030, 1, 12, 23, 59, tzinfo=timezone.utc)
+    await _insert(db_session, later)
+    assert await _partition_of(db_session, later) == partition_name(date(2030, 1, 12))
+
+    dropped = await drop_partitions_before(db_session, date(2030, 1, 12))
+    assert dropped == [partition_name(DAY), partition_name(date(2030, 1, 11))]
+    remaining = await list_partitions(db_session)
+    assert date(2030, 1, 12) in remaining and DAY not in remaining
+    count = (
+        await db_session.execute(
+            text("SELECT count(*) FROM parking_snapshots WHERE parking_id = 961")
+        )
+    ).scalar_one()
+    assert count == 1
+    await db_session.rollback()
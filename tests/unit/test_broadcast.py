@@ -0,0 +1,101 @@
+"""Unit tests for the per-worker SSE update broadcaster."""
+
+import asyncio
+
+import orjson
+import pytest
+
+from app.api.broadcast import KEEPALIVE, Subscription, UpdateBroadcaster, sse_event
+from app.api.live_data import LiveDataset, LiveDatasetCache
+from app.api.schemas import ParkingListResponse
+from app.domain.models import ChangeRecord
+from app.infrastructure.changes import encode_record
+
+
+def _dataset(version: str, free: int) -> LiveDataset:
+    parking = {
+        "id": 1,
+        "name": "P1",
+        "status": 1,
+        "total_spots": 100,
+        "free_spots": free,
+        "lat": 45.07,
+        "lng": 7.68,
+        "status_label": "aperto",
+        "is_available": True,
+    }
+    listing = ParkingListResponse(
+        total=1, last_update="2026-01-01T00:00:00+00:00", source="test", parkings=[parking]
+    )
+    return LiveDataset(version=version, listing=listing)
+
+
+def _data(event: bytes) -> dict:
+    return orjson.loads(event.split(b"data: ", 1)[1])
+
+
+class TestUpdateBroadcaster:
+    def test_sse_event_format(self):
+        assert sse_event("v1", b"{}") == b"id: v1\nevent: changes\ndata: {}\n\n"
+
+    def test_broadcast_reaches_every_subscriber(self):
+        broadcaster = UpdateBroadcaster(LiveDatasetCache(), queue_size=2)
+        subs = [Subscription(queue=asyncio.Queue(maxsize=2)) for _ in range(3)]
+        broadcaster._subscribers.update(subs)
+
+        broadcaster.broadcast(b"e1")
+        assert [s.queue.get_nowait() for s in subs] == [b"e1"] * 3
+
+    def test_slow_consumer_evicted(self):
+        broadcaster = UpdateBroadcaster(LiveDatasetCache(), queue_size=2)
+        slow = Subscription(queue=asyncio.Queue(maxsize=2))
+        broadcaster._subscribers.add(slow)
+
+        for event in (b"e1", b"e2", b"e3"):
+            broadcaster.broadcast(event)
+        assert slow.queue.get_nowait() is None
+        assert slow.queue.empty()
+        assert broadcaster.stats()["subscribers"] == 0
+        assert broadcaster.evictions == 1
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_keeps_idle_clients_alive(self):
+        broadcaster = UpdateBroadcaster(LiveDatasetCache(), heartbeat_interval=0.01)
+        sub = Subscription(queue=asyncio.Queue(maxsize=4))
+        broadcaster._subscribers.add(sub)
+
+        task = asyncio.create_task(broadcaster._heartbeat())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        assert sub.queue.get_nowait() == KEEPALIVE
+
+    @pytest.mark.asyncio
+    async def test_message_renders_delta_then_full_after_gap(self):
+        live = LiveDatasetCache(revalidate_interval=60)
+        broadcaster = UpdateBroadcaster(live)
+        sub = Subscription(queue=asyncio.Queue(maxsize=4))
+        broadcaster._subscribers.add(sub)
+        broadcaster._last_version = "v1"
+
+        live.put(_dataset("v2", free=10))
+        record = ChangeRecord(version="v2", prev="v1", ids=(1,))
+        await broadcaster._on_message(None, encode_record(record))
+        delta = _data(sub.queue.get_nowait())
+        assert (delta["version"], delta["full"], len(delta["parkings"])) == ("v2", False, 1)
+
+        # v3 was never announced: the v4 event cannot be a delta.
+        live.put(_dataset("v4", free=8))
+        record = ChangeRecord(version="v4", prev="v3", ids=())
+        await broadcaster._on_message(None, encode_record(record))
+        full = _data(sub.queue.get_nowait())
+        assert (full["version"], full["full"]) == ("v4", True)
+
+    @pytest.mark.asyncio
+    async def test_duplicate_message_ignored(self):
+        live = LiveDatasetCache(revalidate_interval=60)
+        broadcaster = UpdateBroadcaster(live)
+        broadcaster._last_version = "v2"
+        live.put(_dataset("v2", free=10))
+
+        await broadcaster._on_message(None, encode_record(ChangeRecord("v2", "v1", (1,))))
+        assert broadcaster.events == 0
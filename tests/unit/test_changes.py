@@ -0,0 +1,53 @@
+"""Unit tests for the published-dataset change log."""
+
+from app.domain.models import ChangeRecord
+from app.infrastructure.changes import changed_ids, decode_record, encode_record, touched_since
+
+
+class TestChangedIds:
+    def test_detects_modified_added_and_removed(self):
+        old = {1: "a", 2: "b", 3: "c"}
+        new = {1: "a", 2: "x", 4: "d"}
+        assert changed_ids(old, new) == (2, 3, 4)
+
+    def test_identical_maps(self):
+        assert changed_ids({1: "a"}, {1: "a"}) == ()
+
+
+class TestTouchedSince:
+    records = [
+        ChangeRecord(version="v3", prev="v2", ids=(3,)),
+        ChangeRecord(version="v2", prev="v1", ids=(1, 2)),
+        ChangeRecord(version="v1", prev="v0", ids=(9,)),
+    ]
+
+    def test_same_version(self):
+        assert touched_since(self.records, "v3", "v3") == set()
+
+    def test_unions_ids_along_the_chain(self):
+        assert touched_since(self.records, "v3", "v2") == {3}
+        assert touched_since(self.records, "v3", "v1") == {1, 2, 3}
+        assert touched_since(self.records, "v3", "v0") == {1, 2, 3, 9}
+
+    def test_version_older_than_log(self):
+        assert touched_since(self.records, "v3", "unknown") is None
+
+    def test_log_not_starting_at_current(self):
+        assert touched_since(self.records, "v4", "v2") is None
+
+    def test_broken_chain(self):
+        records = [self.records[0], self.records[2]]
+        assert touched_since(records, "v3", "v1") is None
+
+    def test_revert_to_earlier_content(self):
+        records = [
+            ChangeRecord(version="a", prev="b", ids=(1,)),
+            ChangeRecord(version="b", prev="a", ids=(1,)),
+        ]
+        assert touched_since(records, "a", "b") == {1}
+
+
+class TestRecordEncoding:
+    def test_roundtrip(self):
+        record = ChangeRecord(version="v2", prev="v1", ids=(1, 5))
+        assert decode_record(encode_record(record)) == record
@@ -0,0 +1,121 @@
+"""Unit tests for the Redis-backed circuit breaker."""
+
+import httpx
+import pytest
+import pytest_asyncio
+import redis.asyncio as aioredis
+import respx
+from httpx import Response
+
+from app.domain.exceptions import CircuitOpenError, FiveTApiError
+from app.infrastructure.circuit_breaker import CircuitBreaker
+from app.infrastructure.five_t_client import FiveTClient
+from app.infrastructure.redis_cache import create_redis_pool
+
+
+@pytest_asyncio.fixture
+async def pool():
+    pool = create_redis_pool()
+    yield pool
+    await pool.flushdb()
+    await pool.close()
+
+
+def _breaker(pool, **kwargs) -> CircuitBreaker:
+    options = {"failure_threshold": 2, "base_backoff": 10.0, "probe_timeout": 5.0}
+    return CircuitBreaker(pool, "test", **{**options, **kwargs})
+
+
+async def _expire_cool_down(pool) -> None:
+    await pool.hset("parking:breaker:test", "open_until", 0)
+
+
+class TestCircuitBreaker:
+    @pytest.mark.asyncio
+    async def test_opens_after_consecutive_failures(self, pool):
+        breaker = _breaker(pool)
+        await breaker.allow()
+        await breaker.record_failure()
+        await breaker.allow()
+        await breaker.record_failure()
+        with pytest.raises(CircuitOpenError) as exc:
+            await breaker.allow()
+        assert 5.0 <= exc.value.retry_after <= 10.0
+        stats = await breaker.stats()
+        assert stats["state"] == "open"
+        assert stats["transitions"] == {"open": 1}
+
+    @pytest.mark.asyncio
+    async def test_success_resets_failure_count(self, pool):
+        breaker = _breaker(pool)
+        await breaker.record_failure()
+        await breaker.record_success()
+        await breaker.record_failure()
+        await breaker.allow()
+
+    @pytest.mark.asyncio
+    async def test_shared_between_instances(self, pool):
+        await _breaker(pool).record_failure()
+        await _breaker(pool).record_failure()
+        with pytest.raises(CircuitOpenError):
+            await _breaker(pool).allow()
+
+    @pytest.mark.asyncio
+    async def test_single_half_open_probe(self, pool):
+        breaker = _breaker(pool)
+        await breaker.record_failure()
+        await breaker.record_failure()
+        await _expire_cool_down(pool)
+
+        await breaker.allow()
+        assert (await breaker.stats())["state"] == "half_open"
+        with pytest.raises(CircuitOpenError):
+            await _breaker(pool).allow()
+
+        await breaker.record_success()
+        assert (await breaker.stats())["state"] == "closed"
+        await _breaker(pool).allow()
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_reopens_for_longer(self, pool):
+        breaker = _breaker(pool)
+        await breaker.record_failure()
+        await breaker.record_failure()
+        await _expire_cool_down(pool)
+        await breaker.allow()
+        await breaker.record_failure()
+
+        with pytest.raises(CircuitOpenError) as exc:
+            await breaker.allow()
+        assert 10.0 <= exc.value.retry_after <= 20.0
+        assert (await breaker.stats())["transitions"] == {"open": 2, "half_open": 1}
+
+    def test_backoff_is_jittered_and_capped(self, pool):
+        breaker = _breaker(pool, max_backoff=60.0)
+        assert 5.0 <= breaker.backoff(1) <= 10.0
+        assert 20.0 <= breaker.backoff(3) <= 40.0
+        assert 30.0 <= breaker.backoff(10) <= 60.0
+
+    @pytest.mark.asyncio
+    async def test_lets_calls_through_without_redis(self):
+        unreachable = aioredis.from_url("redis://127.0.0.1:1/0", socket_connect_timeout=0.1)
+        try:
+            await _breaker(unreachable).allow()
+        finally:
+            await unreachable.close()
+
+
+class TestFiveTClientWithBreaker:
+    @pytest.mark.asyncio
+    async def test_open_breaker_skips_upstream_call(self, pool):
+        url = "https://mock-5t.test/get_pk"
+        breaker = _breaker(pool, failure_threshold=1)
+        async with httpx.AsyncClient() as http:
+            with respx.mock:
+                route = respx.get(url).mock(return_value=Response(503))
+                client = FiveTClient(client=http, url=url, timeout=5, breaker=breaker)
+                with pytest.raises(FiveTApiError, match="request failed"):
+                    await client.fetch_all()
+                with pytest.raises(CircuitOpenError):
+                    await client.fetch_all()
+        assert route.call_count == 1
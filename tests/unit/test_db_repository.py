@@ -0,0 +1,51 @@
+"""Unit tests for the master data diff, the batched upsert and the rollup statements."""
+
+from sqlalchemy.dialects import postgresql
+
+from app.infrastructure.db_repository import ParkingDBRepository
+from tests.conftest import make_parking
+
+
+class TestMasterChanges:
+    def test_everything_is_new_without_known_hashes(self):
+        parkings = [make_parking(id=1), make_parking(id=2)]
+        changed, hashes = ParkingDBRepository.master_changes(parkings, {})
+        assert changed == parkings
+        assert set(hashes) == {1, 2}
+
+    def test_availability_is_not_master_data(self):
+        _, hashes = ParkingDBRepository.master_changes([make_parking(id=1)], {})
+        changed, _ = ParkingDBRepository.master_changes(
+            [make_parking(id=1, free_spots=3, status=0, tendence=-1)], hashes
+        )
+        assert changed == []
+
+    def test_only_changed_parkings(self):
+        _, hashes = ParkingDBRepository.master_changes([make_parking(id=1), make_parking(id=2)], {})
+        moved = make_parking(id=2, lat=45.08)
+        changed, _ = ParkingDBRepository.master_changes(
+            [make_parking(id=1), moved, make_parking(id=3)], hashes
+        )
+        assert [p.id for p in changed] == [2, 3]
+
+
+def test_upsert_statement_skips_unchanged_rows():
+    stmt = ParkingDBRepository.upsert_statement([make_parking(id=1), make_parking(id=2)])
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.count("ST_SetSRID(ST_MakePoint(") == 2
+    assert "ON CONFLICT (id) DO UPDATE" in sql
+    assert "IS DISTINCT FROM excluded.name" in sql
+    assert "location = excluded.location" in sql
+
+
+class TestRollupStatement:
+    def test_buckets_by_unit_in_utc(self):
+        sql = ParkingDBRepository.rollup_statement("parking_stats_daily", "day")
+        assert "INSERT INTO parking_stats_daily AS r" in sql
+        assert "date_trunc('day', s.recorded_at AT TIME ZONE 'UTC')" in sql
+
+    def test_counted_samples_are_skipped(self):
+        sql = ParkingDBRepository.rollup_statement("parking_stats_hourly", "hour")
+        assert "f.recorded_at > e.last_sample_at" in sql
+        assert "samples = r.samples + EXCLUDED.samples" in sql
+        assert "free_min = LEAST(r.free_min, EXCLUDED.free_min)" in sql
@@ -0,0 +1,97 @@
+"""Unit tests for ingest cycle timing and its Redis ring buffer."""
+
+import time
+
+import pytest
+import pytest_asyncio
+
+from app.infrastructure.ingest_stats import IngestCycle, IngestLog
+from app.infrastructure.redis_cache import create_redis_pool
+
+
+@pytest_asyncio.fixture
+async def pool():
+    pool = create_redis_pool()
+    yield pool
+    await pool.flushdb()
+    await pool.close()
+
+
+class TestIngestCycle:
+    def test_stages_are_timed(self):
+        cycle = IngestCycle()
+        with cycle.stage("parse"):
+            time.sleep(0.01)
+        assert cycle.stages["parse"] >= 10
+
+    def test_repeated_stage_adds_up(self):
+        cycle = IngestCycle()
+        with cycle.stage("fetch"):
+            time.sleep(0.005)
+        first = cycle.stages["fetch"]
+        with cycle.stage("fetch"):
+            time.sleep(0.005)
+        assert cycle.stages["fetch"] > first
+
+    def test_stage_timed_on_error(self):
+        cycle = IngestCycle()
+        with pytest.raises(RuntimeError), cycle.stage("publish"):
+            raise RuntimeError
+        assert "publish" in cycle.stages
+
+    def test_overrun(self):
+        cycle = IngestCycle()
+        time.sleep(0.02)
+        cycle.finish("done", interval=0.01)
+        assert cycle.overrun is True
+        assert cycle.duration_ms >= 20
+
+        cycle = IngestCycle()
+        cycle.finish("done", interval=120)
+        assert cycle.overrun is False
+
+    def test_record_is_serializable(self):
+        cycle = IngestCycle(bytes=1024, counts={"parkings": 3})
+        cycle.finish("done", interval=120)
+        record = cycle.record()
+        assert "_started" not in record
+        assert record["outcome"] == "done"
+        assert record["counts"] == {"parkings": 3}
+
+
+class TestIngestLog:
+    @pytest.mark.asyncio
+    async def test_keeps_last_cycles_newest_first(self, pool):
+        log = IngestLog(pool, kept=3)
+        for n in range(5):
+            cycle = IngestCycle(counts={"n": n})
+            cycle.finish("done", interval=120)
+            await log.add(cycle)
+        recent = await log.recent()
+        assert [c["counts"]["n"] for c in recent] == [4, 3, 2]
+        assert len(await log.recent(limit=1)) == 1
+
+    @pytest.mark.asyncio
+    async def test_stats(self, pool):
+        log = IngestLog(pool)
+        for ms, outcome, interval in (
+            (10.0, "done", 120),
+            (30.0, "done", 0.001),
+            (20.0, "error", 120),
+        ):
+            cycle = IngestCycle(stages={"fetch": ms})
+            time.sleep(0.002)
+            cycle.finish(outcome, interval=interval)
+            await log.add(cycle)
+        stats = await log.stats()
+        assert stats["cycles"] == 3
+        assert stats["overruns"] == 1
+        assert stats["outcomes"] == {"done": 2, "error": 1}
+        assert stats["stages_ms"]["fetch"] == {"median": 20.0, "max": 30.0}
+        assert len(stats["recent"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_empty(self, pool):
+        stats = await IngestLog(pool).stats()
+        assert stats["cycles"] == 0
+        assert stats["stages_ms"] == {}
@@ -0,0 +1,78 @@
+"""Unit tests for the Redis leader lease and its fencing tokens."""
+
+import pytest
+import pytest_asyncio
+
+from app.domain.exceptions import StaleLeaderError
+from app.infrastructure.leader import LEADER_KEY, LeaderLease
+from app.infrastructure.redis_cache import RedisCache, create_redis_pool
+
+
+@pytest_asyncio.fixture
+async def pool():
+    pool = create_redis_pool()
+    yield pool
+    await pool.flushdb()
+    await pool.close()
+
+
+class TestLeaderLease:
+    @pytest.mark.asyncio
+    async def test_single_holder(self, pool):
+        first, second = LeaderLease(pool), LeaderLease(pool)
+        assert await first.renew() is True
+        assert await second.renew() is False
+        assert first.is_leader and not second.is_leader
+
+    @pytest.mark.asyncio
+    async def test_renew_keeps_token(self, pool):
+        lease = LeaderLease(pool)
+        await lease.renew()
+        token = lease.token
+        assert await lease.renew() is True
+        assert lease.token == token
+
+    @pytest.mark.asyncio
+    async def test_takeover_after_expiry_issues_newer_token(self, pool):
+        first, second = LeaderLease(pool), LeaderLease(pool)
+        await first.renew()
+        await pool.delete(LEADER_KEY)  # lease expired without renewal
+        assert await second.renew() is True
+        assert second.token > first.token
+        assert await first.check(first.token) is False
+        assert await second.check(second.token) is True
+
+    @pytest.mark.asyncio
+    async def test_stale_holder_loses_lease_on_renew(self, pool):
+        first, second = LeaderLease(pool), LeaderLease(pool)
+        await first.renew()
+        await pool.delete(LEADER_KEY)
+        await second.renew()
+        assert await first.renew() is False
+        assert first.token is None
+
+    @pytest.mark.asyncio
+    async def test_release_hands_over_immediately(self, pool):
+        first, second = LeaderLease(pool), LeaderLease(pool)
+        await first.renew()
+        await first.release()
+        assert not first.is_leader
+        assert await second.renew() is True
+
+    @pytest.mark.asyncio
+    async def test_check_without_token(self, pool):
+        assert await LeaderLease(pool).check(None) is False
+
+    @pytest.mark.asyncio
+    async def test_publish_rejects_stale_fence(self, pool):
+        cache = RedisCache(pool, default_ttl=60)
+        first, second = LeaderLease(pool), LeaderLease(pool)
+        await first.renew()
+        assert await cache.publish("parking:test", {"n": 1}, fence=first.token)
+
+        await pool.delete(LEADER_KEY)
+        await second.renew()
+        with pytest.raises(StaleLeaderError):
+            await cache.publish("parking:test", {"n": 2}, fence=first.token)
+        assert await cache.publish("parking:test", {"n": 3}, fence=second.token)
+        assert await cache.get("parking:test") == {"n": 3}
@@ -0,0 +1,154 @@
+"""Unit tests for the per-worker in-memory live dataset fake_cache."""
+
+import time
+
+import orjson
+import pytest
+
+from app.api.live_data import LiveDataset, LiveDatasetCache
+from app.api.ranking import ListFilters
+from app.api.schemas import ParkingListResponse, ParkingSchema
+from app.domain.models import Parking
+from tests.conftest import make_parking
+
+
+def _payload(total: int) -> dict:
+    return {
+        "total": total,
+        "last_update": "2026-01-01T00:00:00+00:00",
+        "source": "test",
+        "parkings": [],
+    }
+
+
+class TestLiveDatasetCache:
+    @pytest.mark.asyncio
+    async def test_empty_cache_returns_none(self, fake_cache):
+        live = LiveDatasetCache()
+        assert await live.get(fake_cache) is None
+        assert live.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_serves_from_memory_within_interval(self, fake_cache):
+        fake_cache.put(_payload(1), "v1")
+        live = LiveDatasetCache(revalidate_interval=60)
+
+        first = await live.get(fake_cache)
+        second = await live.get(fake_cache)
+        assert first is second
+        assert first.version == "v1"
+        assert (fake_cache.snapshot_reads, fake_cache.pointer_reads) == (1, 0)
+        assert live.stats() == {
+            "version": "v1",
+            "age": None,
+            "hits": 1,
+            "misses": 1,
+            "probes": 0,
+            "refreshes": 0,
+            "refreshes_shared": 0,
+        }
+
+    @pytest.mark.asyncio
+    async def test_revalidates_with_version_probe(self, fake_cache):
+        fake_cache.put(_payload(1), "v1")
+        live = LiveDatasetCache(revalidate_interval=0)
+
+        await live.get(fake_cache)
+        await live.get(fake_cache)
+        assert (fake_cache.snapshot_reads, fake_cache.pointer_reads) == (1, 1)
+
+        fake_cache.put(_payload(2), "v2")
+        dataset = await live.get(fake_cache)
+        assert dataset.version == "v2"
+        assert dataset.listing.total == 2
+        assert fake_cache.snapshot_reads == 2
+
+    @pytest.mark.asyncio
+    async def test_unversioned_payload_not_kept(self, fake_cache):
+        fake_cache.put(_payload(1), None)
+        live = LiveDatasetCache(revalidate_interval=60)
+
+        assert (await live.get(fake_cache)).listing.total == 1
+        fake_cache.put(_payload(3), None)
+        assert (await live.get(fake_cache)).listing.total == 3
+
+    @pytest.mark.asyncio
+    async def test_age_from_last_confirmation(self, fake_cache):
+        fake_cache.put(_payload(1), "v1")
+        fake_cache.checked_at = time.time() - 300
+        live = LiveDatasetCache(revalidate_interval=0)
+
+        # Known from the first load, without waiting for a probe.
+        await live.get(fake_cache)
+        assert live.age() == pytest.approx(300, abs=5)
+        fake_cache.checked_at = time.time() - 10
+        await live.get(fake_cache)
+        assert live.age() == pytest.approx(10, abs=5)
+
+    @pytest.mark.asyncio
+    async def test_put_installs_dataset(self, fake_cache):
+        live = LiveDatasetCache(revalidate_interval=60)
+        listing = ParkingListResponse(**_payload(4))
+        live.put(LiveDataset(version="v9", listing=listing))
+
+        dataset = await live.get(fake_cache)
+        assert dataset.version == "v9"
+        assert live.hits == 1
+
+
+def _dataset(version: str, *parkings: Parking) -> LiveDataset:
+    listing = ParkingListResponse(
+        **{
+            **_payload(len(parkings)),
+            "parkings": [ParkingSchema.from_domain(p) for p in parkings],
+        }
+    )
+    return LiveDataset(version=version, listing=listing)
+
+
+class TestLiveDatasetEntries:
+    def test_indexed_by_id(self):
+        dataset = _dataset(
+            "v1", make_parking(id=1, free_spots=10), make_parking(id=2, free_spots=20)
+        )
+        entry = dataset.entries[2]
+        assert entry.parking.free_spots == 20
+        assert orjson.loads(entry.body)["name"] == "P2"
+        assert 3 not in dataset.entries
+
+    def test_built_once_per_version(self):
+        dataset = _dataset("v1", make_parking(id=1, free_spots=10))
+        assert dataset.entries is dataset.entries
+
+    def test_etag_moves_only_for_changed_parking(self):
+        old = _dataset("v1", make_parking(id=1, free_spots=10), make_parking(id=2, free_spots=20))
+        new = _dataset("v2", make_parking(id=1, free_spots=10), make_parking(id=2, free_spots=19))
+        assert old.entries[1].etag == new.entries[1].etag
+        assert old.entries[2].etag != new.entries[2].etag
+
+    def test_body_omits_unset_distance(self):
+        entry = _dataset("v1", make_parking(id=1, free_spots=10)).entries[1]
+        assert "distance_m" not in orjson.loads(entry.body)
+        ranked = entry.parking.model_copy(update={"distance_m": 12.5})
+        assert orjson.loads(ranked.model_dump_json())["distance_m"] == 12.5
+
+
+class TestLiveDatasetFiltered:
+    def test_renders_matching_parkings(self):
+        dataset = _dataset(
+            "v1",
+            make_parking(id=1, free_spots=0),
+            make_parking(id=2, free_spots=20),
+            make_parking(id=3, free_spots=5),
+        )
+        body = orjson.loads(dataset.filtered_body(ListFilters(min_spots=5)).variants["identity"])
+        assert [p["id"] for p in body["parkings"]] == [2, 3]
+        assert body["total"] == 2
+
+    def test_rendered_once_per_filter_combination(self):
+        dataset = _dataset(
+            "v1", make_parking(id=1, free_spots=0), make_parking(id=2, free_spots=20)
+        )
+        first = dataset.filtered_body(ListFilters(available=True))
+        assert dataset.filtered_body(ListFilters(available=True)) is first
+        assert dataset.filtered_body(ListFilters(available=False)).etag != first.etag
@@ -0,0 +1,78 @@
+"""Unit tests for the pure-ASGI middleware on streamed responses."""
+
+import asyncio
+
+import pytest
+import structlog
+from starlette.responses import StreamingResponse
+
+from app.api.middleware import AccessLogMiddleware, RequestIDMiddleware, SecurityHeadersMiddleware
+
+
+def _scope(headers: list[tuple[bytes, bytes]] | None = None) -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/stream",
+        "query_string": b"",
+        "headers": headers or [],
+        "client": ("127.0.0.1", 40000),
+    }
+
+
+class TestMiddlewareStreaming:
+    @pytest.mark.asyncio
+    async def test_headers_set_and_chunks_pass_through_unbuffered(self):
+        release = asyncio.Event()
+
+        async def chunks():
+            yield b"first"
+            await release.wait()
+            yield b"second"
+
+        async def endpoint(scope, receive, send):
+            await StreamingResponse(chunks(), media_type="text/event-stream")(scope, receive, send)
+
+        app = RequestIDMiddleware(SecurityHeadersMiddleware(AccessLogMiddleware(endpoint)))
+        messages: list[dict] = []
+        first_chunk = asyncio.Event()
+
+        async def send(message):
+            messages.append(message)
+            if message.get("body") == b"first":
+                first_chunk.set()
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        task = asyncio.create_task(app(_scope([(b"x-request-id", b"req-1")]), receive, send))
+        # The first chunk reaches the client while the generator is still suspended.
+        await asyncio.wait_for(first_chunk.wait(), 1)
+        release.set()
+        await asyncio.wait_for(task, 1)
+
+        headers = dict(messages[0]["headers"])
+        assert headers[b"x-request-id"] == b"req-1"
+        assert headers[b"x-frame-options"] == b"DENY"
+        assert headers[b"content-type"].startswith(b"text/event-stream")
+        assert [m.get("body") for m in messages[1:] if m.get("body")] == [b"first", b"second"]
+
+    @pytest.mark.asyncio
+    async def test_request_id_unbound_after_error(self):
+        async def failing(scope, receive, send):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await RequestIDMiddleware(failing)(_scope(), None, None)
+        assert "request_id" not in structlog.contextvars.get_contextvars()
+
+    @pytest.mark.asyncio
+    async def test_non_http_scope_passes_through(self):
+        seen = []
+
+        async def inner(scope, receive, send):
+            seen.append(scope["type"])
+
+        app = SecurityHeadersMiddleware(RequestIDMiddleware(inner))
+        await app({"type": "lifespan"}, None, None)
+        assert seen == ["lifespan"]
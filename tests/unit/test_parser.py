@@ -78,3 +78,49 @@ class TestParkingXMLParser:
         p = ParkingXMLParser.parse_entry(entry)
         assert p is not None
         assert p.free_spots == 0
+
+    def test_parse_bytes_with_namespaced_root(self):
+        xml = (
+            b'<?xml version="1.0" encoding="UTF-8"?>\n'
+            b'<traffic_data xmlns="https://simone.5t.torino.it/ns/traffic_data.xsd" '
+            b'generation_time="2026-03-01T12:00:00+01:00">'
+            b'<PK_data ID="7" Name="Caf\xc3\xa8" status="1" Total="10" Free="4" '
+            b'lat="45.0" lng="7.6"/>'
+            b"</traffic_data>"
+        )
+        parkings = ParkingXMLParser.parse_response(xml)
+        assert len(parkings) == 1
+        assert parkings[0].name == "Cafè"
+        assert parkings[0].tendence is None
+
+    def test_wrong_root_raises(self):
+        xml = '<other><PK_data ID="1" Name="A" lat="45.0" lng="7.6"/></other>'
+        with pytest.raises(FiveTApiError, match="Unexpected 5T XML format"):
+            ParkingXMLParser.parse_response(xml)
+
+    def test_no_entries_raises(self):
+        with pytest.raises(FiveTApiError, match="Unexpected 5T XML format"):
+            ParkingXMLParser.parse_response("<traffic_data/>")
+
+    def test_nested_pk_data_ignored(self):
+        xml = (
+            '<traffic_data><PK_data ID="1" Name="A" lat="45.0" lng="7.6">'
+            '<PK_data ID="2" Name="Nested" lat="45.0" lng="7.6"/>'
+            "</PK_data></traffic_data>"
+        )
+        assert [p.id for p in ParkingXMLParser.parse_response(xml)] == [1]
+
+    def test_entity_expansion_rejected(self):
+        xml = (
+            '<?xml version="1.0"?><!DOCTYPE t [<!ENTITY x "boom">]>'
+            '<traffic_data><PK_data ID="1" Name="&x;" lat="45.0" lng="7.6"/></traffic_data>'
+        )
+        with pytest.raises(FiveTApiError, match="Unexpected 5T XML format"):
+            ParkingXMLParser.parse_response(xml)
+
+    def test_iter_parkings_streams_across_chunks(self, monkeypatch):
+        import app.infrastructure.parser as parser_mod
+
+        monkeypatch.setattr(parser_mod, "CHUNK_SIZE", 16)
+        ids = [p.id for p in ParkingXMLParser.iter_parkings(MULTI_ENTRY_XML)]
+        assert ids == [1, 2]
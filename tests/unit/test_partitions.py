@@ -0,0 +1,23 @@
+"""Unit tests for daily snapshot partition naming and bounds."""
+
+from datetime import date, datetime, timezone
+
+from app.infrastructure.partitions import partition_bounds, partition_day, partition_name
+
+
+def test_name_round_trips_to_day():
+    day = date(2026, 10, 17)
+    assert partition_name(day) == "parking_snapshots_p20261017"
+    assert partition_day(partition_name(day)) == day
+
+
+def test_other_tables_are_not_daily_partitions():
+    assert partition_day("parking_snapshots_default") is None
+    assert partition_day("parking_snapshots_pnotadate") is None
+    assert partition_day("parkings") is None
+
+
+def test_bounds_cover_one_utc_day():
+    start, end = partition_bounds(date(2026, 12, 31))
+    assert start == datetime(2026, 12, 31, tzinfo=timezone.utc)
+    assert end == datetime(2027, 1, 1, tzinfo=timezone.utc)
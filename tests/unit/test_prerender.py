@@ -0,0 +1,55 @@
+"""Unit tests for pre-rendered response bodies and encoding negotiation."""
+
+import gzip
+
+import brotli
+import pytest
+
+from app.infrastructure.prerender import negotiate, render, response_headers
+
+BODY = b'{"total":1,"parkings":[{"id":1,"name":"Lingotto"}]}' * 20
+
+
+class TestRender:
+    def test_variants_decode_to_identity(self):
+        rendered = render(BODY)
+        assert rendered.variants["identity"] == BODY
+        assert gzip.decompress(rendered.variants["gzip"]) == BODY
+        assert brotli.decompress(rendered.variants["br"]) == BODY
+
+    def test_etag_is_stable_content_hash(self):
+        assert render(BODY).etag == render(BODY).etag
+        assert render(BODY).etag != render(BODY + b" ").etag
+        assert len(render(BODY).etag) == 32
+
+    def test_gzip_variant_is_deterministic(self):
+        assert render(BODY).variants["gzip"] == render(BODY).variants["gzip"]
+
+
+class TestNegotiate:
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            (None, "identity"),
+            ("", "identity"),
+            ("gzip", "gzip"),
+            ("gzip, deflate, br", "br"),
+            ("gzip;q=1.0, br;q=0.5", "gzip"),
+            ("br;q=0, gzip", "gzip"),
+            ("*", "br"),
+            ("deflate", "identity"),
+            ("GZIP", "gzip"),
+            ("gzip;q=bogus", "identity"),
+        ],
+    )
+    def test_negotiate(self, header, expected):
+        assert negotiate(header) == expected
+
+
+class TestResponseHeaders:
+    def test_identity_has_no_content_encoding(self):
+        headers = response_headers("abc", "identity")
+        assert headers == {"ETag": '"abc"', "Vary": "Accept-Encoding"}
+
+    def test_compressed_sets_content_encoding(self):
+        assert response_headers("abc", "br")["Content-Encoding"] == "br"
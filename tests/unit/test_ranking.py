@@ -0,0 +1,90 @@
+"""Unit tests for column-oriented filtering and ranking of the live dataset."""
+
+import pytest
+
+from app.api.ranking import ListFilters, ParkingColumns
+from app.api.schemas import ParkingDetailSchema, ParkingSchema
+from app.infrastructure.spatial import haversine_m
+from tests.conftest import make_parking
+
+
+def _parking(
+    pid: int, lat: float, free: int | None, rate: float | None = None, **detail
+) -> ParkingSchema:
+    return ParkingSchema.from_domain(
+        make_parking(id=pid, lat=lat, free_spots=free),
+        (
+            ParkingDetailSchema(hourly_rate_daytime=rate, **{"is_covered": False, **detail})
+            if rate is not None
+            else None
+        ),
+    )
+
+
+PARKINGS = [
+    _parking(1, 45.10, 10, rate=2.0, payment_methods=["Telepass", "Carte"], is_covered=True),
+    _parking(2, 45.07, 0, rate=1.5, payment_methods=["Contanti"], disabled_spots=4),
+    _parking(3, 45.08, None),
+    _parking(4, 45.05, 40, rate=2.5, payment_methods=["TELEPASS"], has_metro_access=True),
+]
+
+
+def _ids(order) -> list[int]:
+    return [PARKINGS[i].id for i in order.tolist()]
+
+
+class TestParkingColumns:
+    def setup_method(self):
+        self.columns = ParkingColumns.from_parkings(PARKINGS)
+
+    def test_distance_matches_haversine(self):
+        order, distances = self.columns.rank("distance", 45.071, 7.68)
+        assert _ids(order) == [2, 3, 4, 1]
+        expected = [haversine_m(45.071, 7.68, PARKINGS[i].lat, 7.68) for i in order.tolist()]
+        assert distances.tolist() == pytest.approx(expected)
+
+    def test_free_spots_descending_unknown_last(self):
+        order, distances = self.columns.rank("free_spots")
+        assert _ids(order) == [4, 1, 2, 3]
+        assert distances is None
+
+    def test_occupancy_and_price_ascending_unknown_last(self):
+        assert _ids(self.columns.rank("occupancy")[0]) == [4, 1, 2, 3]
+        assert _ids(self.columns.rank("price")[0]) == [2, 1, 4, 3]
+
+    def test_point_independent_orders_cached(self):
+        first = self.columns.order("price")
+        assert self.columns.order("price") is first
+
+    def test_filters_and_limit(self):
+        filters = ListFilters(available=True)
+        order, _ = self.columns.rank("distance", 45.071, 7.68, filters, limit=1)
+        assert _ids(order) == [4]
+        order, _ = self.columns.rank(None, filters=ListFilters(min_spots=5))
+        assert _ids(order) == [1, 4]
+
+    def test_min_spots_boundaries(self):
+        assert _ids(self.columns.mask(ListFilters(min_spots=0)).nonzero()[0]) == [1, 2, 4]
+        assert _ids(self.columns.mask(ListFilters(min_spots=40)).nonzero()[0]) == [4]
+        assert not self.columns.mask(ListFilters(min_spots=41)).any()
+
+    def test_payment_is_case_insensitive_substring(self):
+        assert _ids(self.columns.mask(ListFilters(payment=" Telepass ")).nonzero()[0]) == [1, 4]
+        assert _ids(self.columns.mask(ListFilters(payment="cart")).nonzero()[0]) == [1]
+        assert not self.columns.mask(ListFilters(payment="bitcoin")).any()
+
+    def test_detail_flags(self):
+        assert _ids(self.columns.mask(ListFilters(covered=True)).nonzero()[0]) == [1]
+        assert _ids(self.columns.mask(ListFilters(metro=False)).nonzero()[0]) == [1, 2, 3]
+        assert _ids(self.columns.mask(ListFilters(disabled=True)).nonzero()[0]) == [2]
+        combined = ListFilters(available=True, payment="telepass", metro=True)
+        assert _ids(self.columns.mask(combined).nonzero()[0]) == [4]
+
+    def test_masks_cached_per_normalized_filters(self):
+        first = self.columns.mask(ListFilters(payment="Telepass"))
+        assert self.columns.mask(ListFilters(payment="telepass ")) is first
+        assert ListFilters(payment="  ").is_empty()
+
+    def test_empty_dataset(self):
+        order, distances = ParkingColumns.from_parkings([]).rank("distance", 45.0, 7.0)
+        assert order.size == 0 and distances.size == 0
@@ -1,9 +1,17 @@
 """Unit tests for RedisCache operations."""
 
+import time
+
+import orjson
 import pytest
 import pytest_asyncio
+import redis
 
-from app.infrastructure.redis_cache import RedisCache, create_redis_pool
+from app.config import settings
+from app.domain.models import ChangeRecord
+from app.infrastructure import redis_cache
+from app.infrastructure.changes import decode_record
+from app.infrastructure.redis_cache import RedisCache, create_redis_pool, version_key
 
 
 @pytest_asyncio.fixture
@@ -28,15 +36,9 @@ class TestRedisCache:
         result = await cache.get("test:missing")
         assert result is None
 
-    @pytest.mark.asyncio
-    async def test_set_with_etag(self, cache):
-        etag = await cache.set_with_etag("test:etag", {"b": 2})
-        assert isinstance(etag, str)
-        assert len(etag) == 32  # MD5 hex
-
     @pytest.mark.asyncio
     async def test_get_etag(self, cache):
-        etag = await cache.set_with_etag("test:etag2", {"c": 3})
+        etag = await cache.publish("test:etag2", {"c": 3})
         stored_etag = await cache.get_etag("test:etag2")
         assert stored_etag == etag
 
@@ -52,6 +54,20 @@ class TestRedisCache:
         result = await cache.get("test:del")
         assert result is None
 
+    @pytest.mark.asyncio
+    async def test_lock_held_until_released(self, cache):
+        token = await cache.acquire_lock("test:lock", ttl=5)
+        assert token is not None
+        assert await cache.acquire_lock("test:lock", ttl=5) is None
+        await cache.release_lock("test:lock", token)
+        assert await cache.acquire_lock("test:lock", ttl=5) is not None
+
+    @pytest.mark.asyncio
+    async def test_release_ignores_foreign_token(self, cache):
+        await cache.acquire_lock("test:lock2", ttl=5)
+        await cache.release_lock("test:lock2", "not-ours")
+        assert await cache.acquire_lock("test:lock2", ttl=5) is None
+
     @pytest.mark.asyncio
     async def test_ping(self, cache):
         assert await cache.ping() is True
@@ -61,3 +77,135 @@ class TestRedisCache:
         info = await cache.info()
         assert "used_memory" in info
         assert "keys" in info
+
+    @pytest.mark.asyncio
+    async def test_publish(self, cache):
+        version = await cache.publish("test:pub", {"e": 5})
+        assert len(version) == 32
+        assert await cache.get_etag("test:pub") == version
+        assert await cache.get("test:pub") == {"e": 5}
+        assert await cache._pool.exists(version_key(version))
+
+    @pytest.mark.asyncio
+    async def test_publish_is_content_addressed(self, cache):
+        first = await cache.publish("test:pub2", {"f": 6})
+        second = await cache.publish("test:pub2", {"f": 7})
+        assert first != second
+        assert await cache.publish("test:pub2", {"f": 6}) == first
+        versions = await cache._pool.lrange("test:pub2:versions", 0, -1)
+        assert [v.decode() for v in versions] == [first, second]
+
+    @pytest.mark.asyncio
+    async def test_publish_keeps_last_versions(self, cache):
+        published = [await cache.publish("test:pub3", {"n": n}) for n in range(8)]
+        versions = await cache._pool.lrange("test:pub3:versions", 0, -1)
+        assert [v.decode() for v in versions] == published[::-1][: settings.cache_versions_kept]
+        # Superseded versions stay readable until they expire.
+        assert await cache._pool.exists(version_key(published[0]))
+
+    @pytest.mark.asyncio
+    async def test_publish_records_changes(self, cache):
+        first = await cache.publish("test:chg", {"h": 1})
+        assert await cache.get_changes("test:chg") == []
+        second = await cache.publish("test:chg", {"h": 2}, prev=first, changed=(4, 7))
+        await cache.publish("test:chg", {"h": 2}, prev=second, changed=())
+        assert await cache.get_changes("test:chg") == [
+            ChangeRecord(version=second, prev=first, ids=(4, 7))
+        ]
+
+    @pytest.mark.asyncio
+    async def test_publish_announces_new_versions(self, cache):
+        async with cache._pool.pubsub() as pubsub:
+            await pubsub.subscribe("test:ann:updates")
+            assert (await pubsub.get_message(timeout=1))["type"] == "subscribe"
+            first = await cache.publish("test:ann", {"i": 1})
+            await cache.publish("test:ann", {"i": 1}, prev=first)
+            message = await pubsub.get_message(timeout=1)
+            assert decode_record(message["data"]) == ChangeRecord(version=first, prev="", ids=())
+            assert await pubsub.get_message(timeout=0.1) is None
+
+    @pytest.mark.asyncio
+    async def test_current_version_outlives_superseded_ones(self, cache):
+        old = await cache.publish("test:hard", {"h": 1}, ttl=10)
+        new = await cache.publish("test:hard", {"h": 2}, ttl=10)
+        assert await cache._pool.ttl(version_key(old)) <= 10 * (settings.cache_versions_kept + 1)
+        assert await cache._pool.ttl(version_key(new)) > 10 * (settings.cache_versions_kept + 1)
+        assert await cache._pool.ttl("test:hard:etag") > 10
+
+    @pytest.mark.asyncio
+    async def test_republishing_current_version_keeps_it_alive(self, cache):
+        version = await cache.publish("test:same", {"s": 1}, ttl=10)
+        await cache.publish("test:same", {"s": 1}, ttl=10)
+        assert await cache._pool.ttl(version_key(version)) > 10 * (settings.cache_versions_kept + 1)
+
+    @pytest.mark.asyncio
+    async def test_publish_retries_when_the_pointer_moves(self, cache, monkeypatch):
+        """Only the version current at EXEC is shortened, not the one first read."""
+        old = await cache.publish("test:race", {"r": 1}, ttl=10)
+        other = await cache.publish("test:race:other", {"r": 2}, ttl=10)
+        short = 10 * (settings.cache_versions_kept + 1)
+        racer = redis.Redis.from_url(settings.redis_url)
+        reads = []
+
+        def racing_version_key(version: str) -> str:
+            if version in (old, other):
+                reads.append(version)
+                if len(reads) == 1:
+                    # Another publish moves the pointer between the read and EXEC.
+                    racer.set("test:race:etag", other)
+            return version_key(version)
+
+        monkeypatch.setattr(redis_cache, "version_key", racing_version_key)
+        new = await cache.publish("test:race", {"r": 3}, ttl=10)
+        racer.close()
+        assert reads == [old, other]
+        assert (await cache.get_pointer("test:race"))[0] == new
+        assert await cache._pool.ttl(version_key(old)) > short
+        assert await cache._pool.ttl(version_key(other)) <= short
+
+    @pytest.mark.asyncio
+    async def test_get_pointer(self, cache):
+        assert await cache.get_pointer("test:ptr") == (None, None)
+        before = time.time()
+        version = await cache.publish("test:ptr", {"p": 1})
+        current, checked = await cache.get_pointer("test:ptr")
+        assert current == version
+        assert checked >= before
+        await cache._pool.set("test:ptr:checked", before - 600)
+        assert await cache.touch("test:ptr", version) is True
+        assert (await cache.get_pointer("test:ptr"))[1] >= before
+
+    @pytest.mark.asyncio
+    async def test_touch(self, cache):
+        old = await cache.publish("test:touch", {"g": 7})
+        new = await cache.publish("test:touch", {"g": 8})
+        assert await cache.touch("test:touch", new) is True
+        assert await cache.touch("test:touch", old) is False
+        await cache.delete("test:touch")
+        assert await cache.touch("test:touch", new) is False
+
+    @pytest.mark.asyncio
+    async def test_get_snapshot(self, cache):
+        version = await cache.publish("test:snap", {"e": 5})
+        before = time.time()
+        data, etag, bodies, checked = await cache.get_snapshot("test:snap")
+        assert data == {"e": 5}
+        assert etag == version
+        assert before - 1 <= checked <= time.time()
+        assert set(bodies) == {"identity", "gzip", "br"}
+        assert orjson.loads(bodies["identity"]) == {"e": 5}
+
+    @pytest.mark.asyncio
+    async def test_get_snapshot_unversioned(self, cache):
+        await cache.set("test:snap2", {"f": 6})
+        assert await cache.get_snapshot("test:snap2") == ({"f": 6}, None, {}, None)
+
+    @pytest.mark.asyncio
+    async def test_get_snapshot_ignores_pointer_to_expired_version(self, cache):
+        await cache.set("test:snap3", {"g": 7})
+        await cache._pool.set("test:snap3:etag", "expired")
+        assert await cache.get_snapshot("test:snap3") == ({"g": 7}, None, {}, None)
+
+    @pytest.mark.asyncio
+    async def test_get_snapshot_missing(self, cache):
+        assert await cache.get_snapshot("test:no_snap") == (None, None, {}, None)
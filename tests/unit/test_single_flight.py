@@ -0,0 +1,176 @@
+"""Unit tests for single-flight coalescing of upstream refreshes."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.api.live_data import LiveDatasetCache
+from app.api.routes.parkings import _get_parkings_data
+from app.domain.exceptions import DatasetNotReadyError
+from app.domain.models import Parking
+from app.infrastructure.single_flight import SingleFlight
+from tests.conftest import make_parking
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_run(self):
+        flight = SingleFlight()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return runs
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(10)))
+        assert results == [1] * 10
+        assert (flight.calls, flight.shared) == (1, 9)
+
+    @pytest.mark.asyncio
+    async def test_runs_again_once_finished(self):
+        flight = SingleFlight()
+
+        async def work():
+            return "ok"
+
+        assert await flight.do("k", work) == "ok"
+        assert await flight.do("k", work) == "ok"
+        assert flight.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_error_reaches_every_caller(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(
+            *(flight.do("k", fail) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.calls == 1
+
+
+class CountingRepository:
+    def __init__(self) -> None:
+        self.fetches = 0
+
+    async def fetch_all(self) -> list[Parking]:
+        self.fetches += 1
+        await asyncio.sleep(0.05)
+        return [make_parking()]
+
+
+@pytest.mark.asyncio
+async def test_cold_cache_stampede_fetches_upstream_once(fake_cache):
+    repository, live = CountingRepository(), LiveDatasetCache()
+
+    datasets = await asyncio.gather(
+        *(_get_parkings_data(fake_cache, repository, live) for _ in range(500))
+    )
+
+    assert repository.fetches == 1
+    assert fake_cache.publishes == 1
+    assert {d.version for d in datasets} == {"v1"}
+    assert fake_cache.lock is None
+
+
+@pytest.mark.asyncio
+async def test_waits_for_refresh_by_another_worker(fake_cache, monkeypatch):
+    monkeypatch.setattr("app.api.routes.parkings.REFRESH_POLL_SECONDS", 0.01)
+    repository, live = CountingRepository(), LiveDatasetCache()
+    fake_cache.lock = "other-worker"
+
+    async def other_worker_publishes():
+        await asyncio.sleep(0.03)
+        await fake_cache.publish(
+            "k",
+            {
+                "total": 0,
+                "last_update": "2026-01-01T00:00:00+00:00",
+                "source": "test",
+                "parkings": [],
+            },
+        )
+
+    dataset, _ = await asyncio.gather(
+        _get_parkings_data(fake_cache, repository, live), other_worker_publishes()
+    )
+    assert dataset.version == "v1"
+    assert repository.fetches == 0
+
+
+@pytest.mark.asyncio
+async def test_stale_data_served_while_refreshing_in_background(fake_cache):
+    repository = CountingRepository()
+    live = LiveDatasetCache(revalidate_interval=0)
+    await _get_parkings_data(fake_cache, repository, live)
+    fake_cache.checked_at = time.time() - 3600
+
+    dataset = await _get_parkings_data(fake_cache, repository, live)
+    assert dataset.version == "v1"
+    assert live.age() > 3000
+    assert repository.fetches == 1
+
+    await asyncio.sleep(0.1)
+    assert repository.fetches == 2
+    assert (await _get_parkings_data(fake_cache, repository, live)).version == "v2"
+    assert live.age() < 5
+
+
+@pytest.mark.asyncio
+async def test_external_ingest_miss_waits_instead_of_fetching(fake_cache, monkeypatch):
+    monkeypatch.setattr("app.api.routes.parkings.settings.ingest_mode", "external")
+    monkeypatch.setattr("app.api.routes.parkings.REFRESH_POLL_SECONDS", 0.01)
+    repository, live = CountingRepository(), LiveDatasetCache()
+
+    async def ingest_publishes():
+        await asyncio.sleep(0.03)
+        await fake_cache.publish(
+            "k",
+            {
+                "total": 0,
+                "last_update": "2026-01-01T00:00:00+00:00",
+                "source": "test",
+                "parkings": [],
+            },
+        )
+
+    datasets = await asyncio.gather(
+        *(_get_parkings_data(fake_cache, repository, live) for _ in range(10)), ingest_publishes()
+    )
+    assert {d.version for d in datasets[:-1]} == {"v1"}
+    assert repository.fetches == 0
+    assert fake_cache.lock is None
+
+
+@pytest.mark.asyncio
+async def test_external_ingest_not_ready(fake_cache, monkeypatch):
+    monkeypatch.setattr("app.api.routes.parkings.settings.ingest_mode", "external")
+    monkeypatch.setattr("app.api.routes.parkings.settings.refresh_wait_seconds", 0.05)
+    monkeypatch.setattr("app.api.routes.parkings.REFRESH_POLL_SECONDS", 0.01)
+    repository, live = CountingRepository(), LiveDatasetCache()
+
+    with pytest.raises(DatasetNotReadyError):
+        await _get_parkings_data(fake_cache, repository, live)
+    assert repository.fetches == 0
+
+
+@pytest.mark.asyncio
+async def test_external_ingest_serves_stale_data_without_refreshing(fake_cache, monkeypatch):
+    monkeypatch.setattr("app.api.routes.parkings.settings.ingest_mode", "external")
+    repository = CountingRepository()
+    live = LiveDatasetCache(revalidate_interval=0)
+    await fake_cache.publish(
+        "k",
+        {"total": 0, "last_update": "2026-01-01T00:00:00+00:00", "source": "test", "parkings": []},
+    )
+    fake_cache.checked_at = time.time() - 3600
+
+    assert (await _get_parkings_data(fake_cache, repository, live)).version == "v1"
+    await asyncio.sleep(0.1)
+    assert repository.fetches == 0
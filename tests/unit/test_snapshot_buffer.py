@@ -0,0 +1,92 @@
+"""Unit tests for the Redis Stream snapshot write-behind buffer."""
+
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+
+from app.infrastructure.redis_cache import create_redis_pool
+from app.infrastructure.snapshot_buffer import SnapshotBuffer
+
+
+@pytest_asyncio.fixture
+async def pool():
+    pool = create_redis_pool()
+    yield pool
+    await pool.flushdb()
+    await pool.close()
+
+
+def _row(parking_id: int, free: int) -> dict:
+    return {
+        "parking_id": parking_id,
+        "free_spots": free,
+        "total_spots": 100,
+        "status": 1,
+        "tendence": 0,
+        "recorded_at": datetime(2026, 10, 17, 8, 0, tzinfo=timezone.utc),
+    }
+
+
+@pytest.mark.asyncio
+async def test_round_trip_keeps_order_and_types(pool):
+    buffer = SnapshotBuffer(pool)
+    await buffer.append([_row(1, 10), _row(2, 20)])
+    await buffer.append([_row(1, 11)])
+
+    pending = await buffer.pending(10)
+    assert [len(c.rows) for c in pending] == [2, 1]
+    first = pending[0].rows[0]
+    assert first == _row(1, 10)
+    assert isinstance(first["recorded_at"], datetime)
+
+
+@pytest.mark.asyncio
+async def test_samples_travel_with_rows(pool):
+    buffer = SnapshotBuffer(pool)
+    await buffer.append([], [_row(1, 10), _row(2, 20)])
+
+    [cycle] = await buffer.pending(10)
+    assert cycle.rows == []
+    assert cycle.samples == [_row(1, 10), _row(2, 20)]
+
+
+@pytest.mark.asyncio
+async def test_pending_is_limited_to_oldest(pool):
+    buffer = SnapshotBuffer(pool)
+    for free in range(3):
+        await buffer.append([_row(1, free)])
+    pending = await buffer.pending(2)
+    assert [c.rows[0]["free_spots"] for c in pending] == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_ack_removes_entries(pool):
+    buffer = SnapshotBuffer(pool)
+    await buffer.append([_row(1, 10)])
+    await buffer.append([_row(2, 20)])
+    first = (await buffer.pending(1))[0]
+
+    await buffer.ack([first.entry_id])
+    pending = await buffer.pending(10)
+    assert [c.rows[0]["parking_id"] for c in pending] == [2]
+
+
+@pytest.mark.asyncio
+async def test_empty_append_is_noop(pool):
+    buffer = SnapshotBuffer(pool)
+    await buffer.append([])
+    await buffer.ack([])
+    assert await buffer.pending(10) == []
+
+
+@pytest.mark.asyncio
+async def test_stats_report_depth_and_lag(pool):
+    buffer = SnapshotBuffer(pool)
+    assert await buffer.stats() == {"depth": 0, "lag_seconds": 0.0}
+
+    await buffer.append([_row(1, 10)])
+    await buffer.append([_row(2, 20)])
+    stats = await buffer.stats()
+    assert stats["depth"] == 2
+    assert 0 <= stats["lag_seconds"] < 5
@@ -0,0 +1,148 @@
+"""Unit tests for change-only snapshot selection, gap filling and bucketing."""
+
+from datetime import datetime, timedelta, timezone
+
+from app.domain.models import Snapshot
+from app.infrastructure.snapshots import (
+    SnapshotChangeFilter,
+    bucket_series,
+    fill_gaps,
+    pick_resolution,
+)
+from tests.conftest import make_parking
+
+T0 = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+STEP = timedelta(seconds=120)
+
+
+def _snapshot(at: datetime, free_spots: int | None = 50, status: int = 1) -> Snapshot:
+    return Snapshot(
+        parking_id=1,
+        free_spots=free_spots,
+        total_spots=100,
+        status=status,
+        tendence=0,
+        recorded_at=at,
+    )
+
+
+class TestSnapshotChangeFilter:
+    def test_first_batch_is_keyframe(self):
+        f = SnapshotChangeFilter(keyframe_interval=timedelta(hours=1))
+        batch = f.select([make_parking(id=1), make_parking(id=2)], T0)
+        assert batch.keyframe is True
+        assert len(batch.parkings) == 2
+
+    def test_only_changed_parkings_selected(self):
+        f = SnapshotChangeFilter(keyframe_interval=timedelta(hours=1))
+        f.mark_stored(f.select([make_parking(id=1), make_parking(id=2)], T0), T0)
+
+        batch = f.select([make_parking(id=1), make_parking(id=2, free_spots=49)], T0 + STEP)
+        assert batch.keyframe is False
+        assert [p.id for p in batch.parkings] == [2]
+
+    def test_status_and_tendence_count_as_changes(self):
+        f = SnapshotChangeFilter(keyframe_interval=timedelta(hours=1))
+        f.mark_stored(f.select([make_parking(id=1), make_parking(id=2)], T0), T0)
+
+        batch = f.select([make_parking(id=1, status=0), make_parking(id=2, tendence=-1)], T0 + STEP)
+        assert {p.id for p in batch.parkings} == {1, 2}
+
+    def test_unstored_batch_is_selected_again(self):
+        f = SnapshotChangeFilter(keyframe_interval=timedelta(hours=1))
+        f.mark_stored(f.select([make_parking(id=1)], T0), T0)
+
+        f.select([make_parking(id=1, free_spots=10)], T0 + STEP)  # commit failed
+        batch = f.select([make_parking(id=1, free_spots=10)], T0 + 2 * STEP)
+        assert len(batch.parkings) == 1
+
+    def test_keyframe_after_interval(self):
+        f = SnapshotChangeFilter(keyframe_interval=timedelta(hours=1))
+        f.mark_stored(f.select([make_parking(id=1), make_parking(id=2)], T0), T0)
+
+        batch = f.select([make_parking(id=1), make_parking(id=2)], T0 + timedelta(hours=1))
+        assert batch.keyframe is True
+        assert len(batch.parkings) == 2
+
+    def test_full_mode_selects_everything(self):
+        f = SnapshotChangeFilter(keyframe_interval=timedelta(hours=1), changes_only=False)
+        f.mark_stored(f.select([make_parking(id=1)], T0), T0)
+        assert len(f.select([make_parking(id=1)], T0 + STEP).parkings) == 1
+
+    def test_keyframe_repeats_last_stored_state(self):
+        f = SnapshotChangeFilter(keyframe_interval=timedelta(hours=1))
+        f.mark_stored(f.select([make_parking(id=1, free_spots=7)], T0), T0)
+
+        batch = f.keyframe()
+        assert batch.keyframe is True
+        assert batch.parkings[0].free_spots == 7
+
+
+class TestFillGaps:
+    def test_carries_rows_forward_until_next_change(self):
+        rows = [_snapshot(T0, 50), _snapshot(T0 + 5 * STEP, 40)]
+        series = fill_gaps(rows, step=STEP, max_hold=timedelta(hours=1), until=T0 + 5 * STEP)
+        assert [s.recorded_at for s in series] == [T0 + i * STEP for i in range(6)]
+        assert [s.free_spots for s in series] == [50] * 5 + [40]
+
+    def test_tolerates_cycle_jitter(self):
+        rows = [_snapshot(T0), _snapshot(T0 + 2 * STEP + timedelta(seconds=3), 40)]
+        series = fill_gaps(rows, step=STEP, max_hold=timedelta(hours=1), until=T0 + 3 * STEP)
+        assert len(series) == 3
+
+    def test_last_row_carried_until_now(self):
+        series = fill_gaps(
+            [_snapshot(T0)], step=STEP, max_hold=timedelta(hours=1), until=T0 + 3 * STEP
+        )
+        assert len(series) == 4
+
+    def test_gap_longer_than_hold_is_preserved(self):
+        series = fill_gaps(
+            [_snapshot(T0)], step=STEP, max_hold=10 * STEP, until=T0 + timedelta(hours=5)
+        )
+        assert series[-1].recorded_at == T0 + 10 * STEP
+
+    def test_full_series_unchanged(self):
+        rows = [_snapshot(T0 + i * STEP, 50 - i) for i in range(4)]
+        series = fill_gaps(rows, step=STEP, max_hold=timedelta(hours=1), until=T0 + 3 * STEP)
+        assert series == rows
+
+    def test_empty(self):
+        assert fill_gaps([], step=STEP, max_hold=timedelta(hours=1), until=T0) == []
+
+
+class TestPickResolution:
+    def test_short_range_stays_raw(self):
+        assert pick_resolution(24, STEP, max_points=800) == "raw"
+
+    def test_finest_bucket_within_budget(self):
+        assert pick_resolution(48, STEP, max_points=800) == "5m"
+        assert pick_resolution(720, STEP, max_points=800) == "1h"
+
+    def test_daily_when_nothing_else_fits(self):
+        assert pick_resolution(720, STEP, max_points=100) == "1d"
+
+
+class TestBucketSeries:
+    def test_aggregates_per_aligned_bucket(self):
+        width = timedelta(minutes=5)
+        series = [
+            _snapshot(T0 + timedelta(minutes=6), 0),
+            _snapshot(T0 + timedelta(minutes=4), 30),
+            _snapshot(T0 + timedelta(minutes=2), None),
+            _snapshot(T0, 10, status=0),
+        ]
+        newest, oldest = bucket_series(series, width)
+
+        assert newest.bucket == T0 + width
+        assert (newest.samples, newest.free_avg, newest.occupancy_avg) == (1, 0.0, 100.0)
+        assert newest.status_mix["full"] == 1
+
+        assert oldest.bucket == T0
+        assert oldest.samples == 3
+        assert (oldest.free_min, oldest.free_avg, oldest.free_max) == (10, 20.0, 30)
+        assert oldest.occupancy_avg == 80.0
+        assert oldest.status_mix == {"open": 1, "full": 0, "no_data": 1, "out_of_service": 1}
+
+    def test_empty(self):
+        assert bucket_series([], timedelta(hours=1)) == []
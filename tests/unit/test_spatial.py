@@ -0,0 +1,47 @@
+"""Unit tests for the in-memory grid spatial index."""
+
+import random
+
+import pytest
+
+from app.infrastructure.spatial import GridIndex, haversine_m
+
+PIAZZA_CASTELLO = (45.0711, 7.6858)
+
+
+class TestHaversine:
+    def test_zero_distance(self):
+        assert haversine_m(*PIAZZA_CASTELLO, *PIAZZA_CASTELLO) == 0
+
+    def test_one_degree_of_latitude(self):
+        assert haversine_m(45.0, 7.0, 46.0, 7.0) == pytest.approx(111_195, rel=1e-4)
+
+    def test_symmetric(self):
+        a, b = (45.0703, 7.6869), (45.1200, 7.7500)
+        assert haversine_m(*a, *b) == pytest.approx(haversine_m(*b, *a))
+
+
+class TestGridIndex:
+    def test_within_sorted_by_distance(self):
+        index = GridIndex([(1, 45.0710, 7.6875), (2, 45.0703, 7.6869), (3, 45.1200, 7.7500)])
+        hits = index.within(45.0703, 7.6869, 500)
+        assert [pid for _, pid in hits] == [2, 1]
+        assert hits[0][0] == 0
+
+    def test_empty_index(self):
+        assert GridIndex([]).within(*PIAZZA_CASTELLO, 5000) == []
+        assert len(GridIndex([])) == 0
+
+    @pytest.mark.parametrize("radius", [100, 750, 1000, 2500, 5000, 20000])
+    def test_matches_brute_force(self, radius):
+        rng = random.Random(radius)
+        points = [(i, 45.0 + rng.uniform(0, 0.15), 7.6 + rng.uniform(0, 0.15)) for i in range(300)]
+        index = GridIndex(points, cell_meters=800)
+        for _ in range(20):
+            lat, lng = 45.0 + rng.uniform(0, 0.15), 7.6 + rng.uniform(0, 0.15)
+            expected = sorted(
+                (haversine_m(lat, lng, plat, plng), pid)
+                for pid, plat, plng in points
+                if haversine_m(lat, lng, plat, plng) <= radius
+            )
+            assert index.within(lat, lng, radius) == expected